@@ -0,0 +1,353 @@
+"""
+In-process audio conversion and FLAC encoding for STT uploads (NumPy).
+
+AudioData.get_flac_data() forks the external `flac` binary for every
+utterance and converts rate/width with audioop (removed in Python 3.13).
+Here everything happens in-process:
+
+- pcm_to_int16 / downmix / resample: vectorized conversion to 16 kHz mono
+  16-bit (windowed-sinc low-pass before decimation, filters cached per
+  rate pair)
+- FlacEncoder: fixed-predictor FLAC (orders 0–4, Rice-coded residuals
+  packed with NumPy), a valid stream any FLAC decoder accepts
+- rms: frame energy without audioop (pure Python if NumPy is missing too)
+"""
+
+import array
+import math
+import struct
+import sys
+from typing import Dict, Optional, Tuple
+
+import speech_recognition as sr
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import audioop
+except ImportError:  # Python 3.13+
+    audioop = None
+
+STT_SAMPLE_RATE = 16000
+FLAC_BLOCK_SIZE = 4096
+FILTER_TAPS_PER_RATIO = 24  # speech only needs a gentle transition band
+MAX_RICE_PARAM = 14  # 15 is the escape code
+
+
+# ==============================================================================
+# PCM CONVERSION
+# ==============================================================================
+
+def pcm_to_int16(data: bytes, sample_width: int) -> "np.ndarray":
+    """Little-endian PCM of any width (8-bit unsigned, 16/24/32-bit signed) → int16."""
+    usable = len(data) - len(data) % sample_width
+    raw = np.frombuffer(data[:usable], dtype=np.uint8)
+    if sample_width == 1:
+        return ((raw.astype(np.int16) - 128) << 8).astype(np.int16)
+    if sample_width == 2:
+        return raw.view("<i2")
+    if sample_width == 3:
+        triples = raw.reshape(-1, 3).astype(np.int32)
+        value = triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)
+        value = np.where(value & 0x800000, value - 0x1000000, value)
+        return (value >> 8).astype(np.int16)
+    if sample_width == 4:
+        return (raw.view("<i4") >> 16).astype(np.int16)
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
+def downmix(samples: "np.ndarray", channels: int) -> "np.ndarray":
+    """Interleaved multi-channel int16 → mono (channel average)."""
+    if channels <= 1:
+        return samples
+    frames = samples[: len(samples) - len(samples) % channels].reshape(-1, channels)
+    return frames.mean(axis=1).astype(np.int16)
+
+
+_filters: Dict[Tuple[int, int], "np.ndarray"] = {}
+
+
+def _lowpass(src_rate: int, dst_rate: int) -> "np.ndarray":
+    """Windowed-sinc anti-aliasing filter for src → dst (cached)."""
+    key = (src_rate, dst_rate)
+    taps = _filters.get(key)
+    if taps is None:
+        ratio = src_rate / dst_rate
+        cutoff = 0.45 / ratio  # cycles/sample, a little below the new Nyquist
+        half = int(math.ceil(FILTER_TAPS_PER_RATIO * ratio / 2))
+        n = np.arange(-half, half + 1)
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(len(n))
+        taps = (taps / taps.sum()).astype(np.float32)
+        _filters[key] = taps
+    return taps
+
+
+def resample(samples: "np.ndarray", src_rate: int, dst_rate: int = STT_SAMPLE_RATE) -> "np.ndarray":
+    """Resample int16 mono audio (low-pass + interpolation when downsampling)."""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    x = samples.astype(np.float32)
+    if src_rate > dst_rate:
+        x = np.convolve(x, _lowpass(src_rate, dst_rate), mode="same")
+    count = int(len(samples) * dst_rate / src_rate)
+    if src_rate % dst_rate == 0:
+        y = x[:: src_rate // dst_rate][:count]  # 48 kHz / 32 kHz mics: plain decimation
+    else:
+        y = np.interp(np.arange(count) * (src_rate / dst_rate), np.arange(len(x)), x)
+    return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+
+def to_stt_samples(audio: sr.AudioData, sample_rate: int = STT_SAMPLE_RATE) -> "np.ndarray":
+    """AudioData → int16 mono at `sample_rate` (AudioData is always mono)."""
+    samples = pcm_to_int16(audio.frame_data, audio.sample_width)
+    return resample(samples, audio.sample_rate, sample_rate)
+
+
+def _rms_python(data: bytes, sample_width: int) -> int:
+    """rms() without NumPy or audioop (Python 3.13+ without NumPy)."""
+    if sample_width == 2:
+        samples = array.array("h", data)
+        if sys.byteorder == "big":
+            samples.byteswap()
+    else:
+        # audioop reads 8-bit samples as signed too
+        samples = [int.from_bytes(data[i:i + sample_width], "little", signed=True)
+                   for i in range(0, len(data), sample_width)]
+    return int(math.sqrt(sum(s * s for s in samples) / len(samples)))
+
+
+def rms(data: bytes, sample_width: int) -> int:
+    """RMS energy of a PCM chunk (same scale as audioop.rms)."""
+    usable = len(data) - len(data) % sample_width
+    if usable == 0:
+        return 0
+    if not NUMPY_AVAILABLE:
+        if audioop is not None:
+            return audioop.rms(data[:usable], sample_width)
+        return _rms_python(data[:usable], sample_width)
+    if sample_width == 3:
+        # 24-bit has no NumPy dtype; keep audioop's scale via the int16 view
+        samples = pcm_to_int16(data[:usable], 3).astype(np.float64) * 256
+    else:
+        samples = np.frombuffer(data[:usable], dtype={1: "i1", 2: "<i2", 4: "<i4"}[sample_width])
+    return int(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+
+# ==============================================================================
+# FLAC ENCODER
+# ==============================================================================
+
+def _crc_table(poly: int, width: int) -> Tuple[int, ...]:
+    top, mask = 1 << (width - 1), (1 << width) - 1
+    table = []
+    for byte in range(256):
+        crc = byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & top else (crc << 1)
+        table.append(crc & mask)
+    return tuple(table)
+
+
+_CRC8 = _crc_table(0x07, 8)
+_CRC16 = _crc_table(0x8005, 16)
+
+
+def _crc8(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = _CRC8[crc ^ byte]
+    return crc
+
+
+def _crc16_slow(data: bytes) -> int:
+    crc = 0
+    table = _CRC16
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+
+# CRC-16 is linear: crc(A + B) = (crc(A) * x^(8|B|) mod P) ^ crc(B). Per level
+# of a binary tree, (hi, lo) byte tables multiply a CRC by x^(8 * 2^level).
+_crc16_shift: list = []
+
+
+def _shift_tables(level: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    if not _crc16_shift:
+        table = np.array(_CRC16, dtype=np.uint16)
+        _crc16_shift.append((table, (np.arange(256, dtype=np.uint16) << 8)))
+    while len(_crc16_shift) <= level:
+        hi, lo = _crc16_shift[-1]
+        # Shifting twice by 2^l bytes = shifting by 2^(l+1)
+        _crc16_shift.append((hi[hi >> 8] ^ lo[hi & 0xFF], hi[lo >> 8] ^ lo[lo & 0xFF]))
+    return _crc16_shift[level]
+
+
+def _crc16(data: bytes) -> int:
+    """CRC-16 (poly 0x8005), vectorized as a tree reduction over the bytes."""
+    if len(data) < 64:
+        return _crc16_slow(data)
+    size = 1 << (len(data) - 1).bit_length()
+    raw = np.zeros(size, dtype=np.uint8)
+    raw[size - len(data):] = np.frombuffer(data, dtype=np.uint8)  # leading zeros don't change it
+    crcs = np.array(_CRC16, dtype=np.uint16)[raw]
+    level = 0
+    while len(crcs) > 1:
+        hi, lo = _shift_tables(level)
+        left, right = crcs[0::2], crcs[1::2]
+        crcs = hi[left >> 8] ^ lo[left & 0xFF] ^ right
+        level += 1
+    return int(crcs[0])
+
+
+def _utf8_number(n: int) -> bytes:
+    """FLAC's UTF-8-style frame number coding."""
+    if n < 0x80:
+        return bytes([n])
+    for length, limit in ((2, 1 << 11), (3, 1 << 16), (4, 1 << 21), (5, 1 << 26), (6, 1 << 31)):
+        if n < limit:
+            out = []
+            for _ in range(length - 1):
+                out.append(0x80 | (n & 0x3F))
+                n >>= 6
+            lead = (0xFF << (8 - length)) & 0xFF
+            return bytes([lead | n] + out[::-1])
+    raise ValueError("frame number too large")
+
+
+_SAMPLE_RATE_CODES = {88200: 1, 176400: 2, 192000: 3, 8000: 4, 16000: 5, 22050: 6,
+                      24000: 7, 32000: 8, 44100: 9, 48000: 10, 96000: 11}
+_BLOCK_SIZE_CODES = {192: 1, 576: 2, 1152: 3, 2304: 4, 4608: 5, 256: 8, 512: 9,
+                     1024: 10, 2048: 11, 4096: 12, 8192: 13, 16384: 14, 32768: 15}
+
+
+def _bits(value: int, count: int) -> "np.ndarray":
+    """`count` low bits of value, MSB first."""
+    return ((value >> np.arange(count - 1, -1, -1)) & 1).astype(np.uint8)
+
+
+class FlacEncoder:
+    """
+    Mono 16-bit FLAC encoder (fixed predictors + Rice coding, no subprocess).
+
+    Reusable across utterances: CRC tables and resampling filters are
+    built once per process.
+    """
+
+    def __init__(self, block_size: int = FLAC_BLOCK_SIZE):
+        self.block_size = block_size
+
+    def encode(self, samples: "np.ndarray", sample_rate: int) -> bytes:
+        samples = np.asarray(samples, dtype=np.int16)
+        out = [b"fLaC", self._streaminfo(len(samples), sample_rate)]
+        for number, start in enumerate(range(0, len(samples), self.block_size)):
+            out.append(self._frame(samples[start:start + self.block_size], number, sample_rate))
+        return b"".join(out)
+
+    def _streaminfo(self, total: int, sample_rate: int) -> bytes:
+        block = self.block_size
+        last_block = total % block or block if total else block
+        info = struct.pack(">HH", min(block, last_block) if total > block else last_block, block)
+        info += b"\x00" * 6  # min/max frame size unknown
+        packed = (sample_rate << 44) | (0 << 41) | (15 << 36) | total  # mono, 16-bit
+        info += packed.to_bytes(8, "big") + b"\x00" * 16  # MD5 not computed
+        return bytes([0x80]) + len(info).to_bytes(3, "big") + info  # last metadata block
+
+    def _frame(self, block: "np.ndarray", number: int, sample_rate: int) -> bytes:
+        n = len(block)
+        size_code = _BLOCK_SIZE_CODES.get(n, 7)
+        rate_code = _SAMPLE_RATE_CODES.get(sample_rate, 0)
+        header = bytearray(b"\xff\xf8")
+        header.append((size_code << 4) | rate_code)
+        header.append(0b0000_100_0)  # mono, 16 bits per sample
+        header += _utf8_number(number)
+        if size_code == 7:
+            header += (n - 1).to_bytes(2, "big")
+        header.append(_crc8(header))
+
+        bits = self._subframe(block.astype(np.int32))
+        pad = (-len(bits)) % 8
+        if pad:
+            bits = np.concatenate([bits, np.zeros(pad, dtype=np.uint8)])
+        frame = bytes(header) + np.packbits(bits).tobytes()
+        return frame + _crc16(frame).to_bytes(2, "big")
+
+    def _subframe(self, x: "np.ndarray") -> "np.ndarray":
+        n = len(x)
+        if n and np.all(x == x[0]):
+            return np.concatenate([_bits(0b00000000, 8), _bits(int(x[0]) & 0xFFFF, 16)])  # CONSTANT
+
+        # Like libFLAC: the order with the smallest total |residual| wins
+        order, residual, best = 0, x, None
+        for candidate in range(min(4, n - 1) + 1):
+            diff = np.diff(x, candidate) if candidate else x
+            total = int(np.abs(diff).sum())
+            if best is None or total < best:
+                order, residual, best = candidate, diff, total
+        cost, k = self._rice_cost(residual)
+
+        if cost + 16 * order >= 16 * n:
+            # VERBATIM: noise-like block that Rice coding would only grow
+            raw = np.unpackbits(x.astype(">i2").view(np.uint8))
+            return np.concatenate([_bits(0b00000010, 8), raw])
+
+        warmup = np.unpackbits(x[:order].astype(">i2").view(np.uint8)) if order else np.zeros(0, np.uint8)
+        parts = [
+            _bits(0b00010000 | (order << 1), 8),  # FIXED, no wasted bits
+            warmup,
+            _bits(0b00, 2),  # Rice, 4-bit parameters
+            _bits(0, 4),     # partition order 0
+            _bits(k, 4),
+            self._rice_bits(residual, k),
+        ]
+        return np.concatenate(parts)
+
+    @staticmethod
+    def _fold(residual: "np.ndarray") -> "np.ndarray":
+        r = residual.astype(np.int64)
+        return np.where(r >= 0, r << 1, ((-r) << 1) - 1)
+
+    def _rice_cost(self, residual: "np.ndarray") -> Tuple[int, int]:
+        u = self._fold(residual)
+        if len(u) == 0:
+            return 0, 0
+        mean = float(u.mean())
+        guess = max(0, min(MAX_RICE_PARAM, int(math.log2(mean)) if mean >= 1 else 0))
+        best = None
+        for k in range(max(0, guess - 1), min(MAX_RICE_PARAM, guess + 1) + 1):
+            cost = int((u >> k).sum()) + len(u) * (k + 1)
+            if best is None or cost < best[0]:
+                best = (cost, k)
+        return best
+
+    def _rice_bits(self, residual: "np.ndarray", k: int) -> "np.ndarray":
+        u = self._fold(residual)
+        q = u >> k
+        lengths = q + 1 + k
+        offsets = np.cumsum(lengths) - lengths
+        bits = np.zeros(int(lengths.sum()), dtype=np.uint8)
+        stop = offsets + q
+        bits[stop] = 1  # unary quotient: q zeros, then a one
+        if k:
+            shifts = np.arange(k - 1, -1, -1)
+            bits[(stop + 1)[:, None] + np.arange(k)] = (u[:, None] >> shifts) & 1
+        return bits
+
+
+_encoder: Optional[FlacEncoder] = None
+
+
+def get_encoder() -> FlacEncoder:
+    global _encoder
+    if _encoder is None:
+        _encoder = FlacEncoder()
+    return _encoder
+
+
+def encode_for_stt(audio: sr.AudioData, sample_rate: int = STT_SAMPLE_RATE) -> bytes:
+    """AudioData → 16 kHz mono FLAC bytes, entirely in-process."""
+    return get_encoder().encode(to_stt_samples(audio, sample_rate), sample_rate)
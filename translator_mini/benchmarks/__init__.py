@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for Chatbot Translator Mini.
+Run each module directly, e.g. `python -m translator_mini.benchmarks.bench_openrouter_pool`.
+"""
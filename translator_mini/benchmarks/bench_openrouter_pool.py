@@ -0,0 +1,86 @@
+"""
+Turn latency: one-off requests.post (old behaviour) vs pooled OpenRouterClient.
+
+Runs against a local mock endpoint that charges a simulated TLS handshake on
+every new connection, so the difference is the connection setup we save.
+
+    python -m translator_mini.benchmarks.bench_openrouter_pool --turns 30 --handshake-ms 120
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+import requests
+
+from translator_mini import resilience
+from translator_mini.benchmarks.mock_server import MockOpenRouterServer
+from translator_mini.openrouter_client import OpenRouterClient, chat_completion
+
+MESSAGES = [{"role": "user", "content": "Xin chào"}]
+
+
+def _time_turns(turns: int, fn: Callable[[], object]) -> List[float]:
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def _report(label: str, samples: List[float], connections: int) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:28} mean {statistics.mean(samples):7.1f} ms | "
+          f"p50 {statistics.median(samples):7.1f} ms | p95 {p95:7.1f} ms | "
+          f"connections {connections}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--handshake-ms", type=float, default=120.0,
+                        help="Simulated DNS+TCP+TLS cost per new connection")
+    parser.add_argument("--ttft-ms", type=float, default=40.0,
+                        help="Simulated model time before the reply")
+    args = parser.parse_args()
+
+    # Measure connection cost, not the client-side rate limit
+    resilience.configure("openrouter", rate=1000.0, burst=1000)
+
+    print(f"[Bench] {args.turns} turns, handshake {args.handshake_ms:.0f} ms, "
+          f"model {args.ttft_ms:.0f} ms")
+
+    # Before: fresh requests.post per turn (what chat_completion used to do)
+    with MockOpenRouterServer(handshake_ms=args.handshake_ms, ttft_ms=args.ttft_ms) as srv:
+        payload = {"model": "mock", "messages": MESSAGES}
+        headers = {"Authorization": "Bearer test", "Content-Type": "application/json"}
+        before = _time_turns(
+            args.turns,
+            lambda: requests.post(srv.url, headers=headers, json=payload, timeout=60).json(),
+        )
+        _report("before (requests.post)", before, srv.connections)
+
+    # After: shared pooled client, warmed up before the first turn
+    with MockOpenRouterServer(handshake_ms=args.handshake_ms, ttft_ms=args.ttft_ms) as srv:
+        client = OpenRouterClient(base_url=srv.url)
+        warm_start = time.perf_counter()
+        client.warm_up(background=False)
+        warm_ms = (time.perf_counter() - warm_start) * 1000.0
+        after = _time_turns(
+            args.turns,
+            lambda: chat_completion(MESSAGES, model="mock", api_key="test", client=client),
+        )
+        _report("after (pooled + warm-up)", after, srv.connections)
+        print(f"  warm-up (off the critical path): {warm_ms:.1f} ms")
+        client.close()
+
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"[Bench] Mean turn latency saved: {saved:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
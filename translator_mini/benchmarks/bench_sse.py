@@ -0,0 +1,83 @@
+"""
+Per-token delivery delay: response.iter_lines() (old stream parser) vs the
+incremental SSE decoder (sse.iter_sse).
+
+The mock server stamps every event with its send time (`sent_at`, same
+perf_counter clock since it runs in-process), so delay = receive - send.
+
+    python -m translator_mini.benchmarks.bench_sse --tokens 60 --token-ms 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Iterator, List
+
+import requests
+
+from translator_mini.benchmarks.mock_server import MockOpenRouterServer
+from translator_mini.sse import iter_sse
+
+PAYLOAD = {"model": "mock", "messages": [{"role": "user", "content": "Xin chào"}], "stream": True}
+
+
+def _iter_lines_data(response) -> Iterator[str]:
+    """What chat_completion_stream used to do."""
+    for line in response.iter_lines():
+        if line and line.startswith(b"data: "):
+            yield line[6:].decode("utf-8")
+
+
+def _sse_data(response) -> Iterator[str]:
+    for event in iter_sse(response):
+        yield event.data
+
+
+def _measure(url: str, turns: int, reader: Callable[[object], Iterator[str]]) -> List[float]:
+    delays = []
+    with requests.Session() as session:
+        for _ in range(turns):
+            with session.post(url, json=PAYLOAD, stream=True, timeout=30) as response:
+                for data in reader(response):
+                    received = time.perf_counter()
+                    if data == "[DONE]":
+                        break
+                    delays.append((received - json.loads(data)["sent_at"]) * 1000.0)
+    return delays
+
+
+def _report(label: str, delays: List[float]) -> None:
+    ordered = sorted(delays)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:24} mean {statistics.mean(delays):7.2f} ms | "
+          f"p50 {statistics.median(delays):7.2f} ms | p95 {p95:7.2f} ms | max {ordered[-1]:7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens per streamed reply")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Interval between tokens")
+    args = parser.parse_args()
+
+    tokens = [f"tok{i} " for i in range(args.tokens)]
+    print(f"[Bench] {args.turns} turns x {args.tokens} tokens @ {args.token_ms:.0f} ms")
+    # One HTTP chunk per event, and a close-delimited body (no chunk framing,
+    # as some proxies send it) where fixed-size reads have to fill up first
+    for framing, chunked in (("chunked", True), ("close-delimited", False)):
+        with MockOpenRouterServer(token_interval_ms=args.token_ms, tokens=tokens,
+                                  chunked=chunked) as srv:
+            before = _measure(srv.url, args.turns, _iter_lines_data)
+            after = _measure(srv.url, args.turns, _sse_data)
+
+        print(f" {framing}:")
+        _report("before (iter_lines)", before)
+        _report("after (SSE decoder)", after)
+        print(f"  mean per-token delay saved: "
+              f"{statistics.mean(before) - statistics.mean(after):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
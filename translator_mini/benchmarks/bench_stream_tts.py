@@ -0,0 +1,90 @@
+"""
+Time-to-first-audio: blocking turn (chat → speak full reply) vs streaming
+turn (speak each sentence while the model is still generating).
+
+The LLM is the local mock endpoint streaming tokens at a fixed rate; TTS is
+simulated with a synthesis delay that grows with text length followed by
+playback, so no audio device or network is needed.
+
+    python -m translator_mini.benchmarks.bench_stream_tts --token-ms 30 --ttft-ms 300
+"""
+
+import argparse
+import time
+from typing import Callable, Optional
+
+from translator_mini.benchmarks.mock_server import MockOpenRouterServer
+from translator_mini.openrouter_client import OpenRouterChatbot, OpenRouterClient
+from translator_mini.text_to_speech import speak_stream
+
+REPLY = (
+    "Chào bạn! Hôm nay trời Hà Nội khá đẹp, nhiệt độ khoảng hai mươi lăm độ. "
+    "Buổi chiều có thể có mưa rào nhẹ, bạn nhớ mang theo ô nhé. "
+    "Nếu bạn định đi dạo, khoảng năm giờ chiều là thời điểm lý tưởng. "
+    "Chúc bạn một ngày vui vẻ!"
+)
+
+
+def _tokens(text: str):
+    """Split into word-ish tokens the way an LLM stream would deliver them."""
+    words = text.split(" ")
+    return [w + " " for w in words[:-1]] + [words[-1]]
+
+
+def make_fake_tts(synth_base_ms: float, synth_per_char_ms: float, play_per_char_ms: float):
+    def fake_speak(text: str, lang: str = "vi",
+                   on_start: Optional[Callable[[], None]] = None, **_) -> bool:
+        time.sleep((synth_base_ms + synth_per_char_ms * len(text)) / 1000.0)
+        if on_start:
+            on_start()
+        time.sleep(play_per_char_ms * len(text) / 1000.0)
+        return True
+    return fake_speak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Model time to first token")
+    parser.add_argument("--token-ms", type=float, default=30.0, help="Interval between tokens")
+    parser.add_argument("--synth-base-ms", type=float, default=150.0, help="TTS request overhead")
+    parser.add_argument("--synth-per-char-ms", type=float, default=2.0, help="TTS cost per character")
+    parser.add_argument("--play-per-char-ms", type=float, default=5.0,
+                        help="Playback duration per character (use small values to run faster)")
+    args = parser.parse_args()
+
+    fake_speak = make_fake_tts(args.synth_base_ms, args.synth_per_char_ms, args.play_per_char_ms)
+    tokens = _tokens(REPLY)
+    print(f"[Bench] {len(tokens)} tokens @ {args.token_ms:.0f} ms, TTFT {args.ttft_ms:.0f} ms, "
+          f"reply {len(REPLY)} chars")
+
+    with MockOpenRouterServer(ttft_ms=args.ttft_ms, token_interval_ms=args.token_ms,
+                              tokens=tokens) as srv:
+        client = OpenRouterClient(base_url=srv.url)
+        client.warm_up(background=False)
+
+        # Blocking turn: wait for the full reply, then synthesize it all
+        bot = OpenRouterChatbot(model="mock", api_key="test", client=client)
+        start = time.perf_counter()
+        first_audio = []
+        reply = bot.chat("Thời tiết hôm nay thế nào?")
+        fake_speak(reply, on_start=lambda: first_audio.append(time.perf_counter() - start))
+        blocking_ttfa = first_audio[0]
+        blocking_total = time.perf_counter() - start
+
+        # Streaming turn: speak sentence by sentence
+        bot = OpenRouterChatbot(model="mock", api_key="test", client=client)
+        _, timings = speak_stream(bot.chat_stream("Thời tiết hôm nay thế nào?"),
+                                  speak_fn=fake_speak)
+        client.close()
+
+    print(f"  blocking   time-to-first-audio {blocking_ttfa * 1000:7.0f} ms | "
+          f"turn done {blocking_total * 1000:7.0f} ms")
+    print(f"  streaming  time-to-first-audio {timings['first_audio'] * 1000:7.0f} ms | "
+          f"turn done {timings['total'] * 1000:7.0f} ms "
+          f"(first token {timings['first_token'] * 1000:.0f} ms, "
+          f"first sentence {timings['first_sentence'] * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Real-time factor of the STT backends on recorded WAV fixtures.
+
+RTF = recognition time / audio duration (below 1.0 = faster than real time).
+Each fixture is a WAV file; `name.vi.wav` is recognized as vi-VN, anything
+else as --language. If `name.txt` (or `name.vi.txt`) sits next to it, the
+word error rate against that reference is reported too.
+
+    python -m translator_mini.benchmarks.bench_stt fixtures/ --backends google,vosk
+    python -m translator_mini.benchmarks.bench_stt hello.wav xin_chao.vi.wav
+
+Backends that are not installed (or have no model for a fixture's language)
+are skipped.
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+import speech_recognition as sr
+
+from translator_mini.stt_backends import BACKENDS, STTBackend, get_backend
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _fixtures(paths: List[str]) -> List[str]:
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.wav"))))
+        else:
+            files.append(path)
+    return files
+
+
+def _language(path: str, default: str) -> str:
+    return "vi-VN" if path.lower().endswith(".vi.wav") else default
+
+
+def _reference(path: str) -> Optional[str]:
+    ref = os.path.splitext(path)[0] + ".txt"
+    if not os.path.exists(ref):
+        return None
+    with open(ref, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance / reference length (case-insensitive)."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / max(1, len(ref))
+
+
+def _load(path: str) -> Tuple[sr.AudioData, float]:
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    return audio, duration
+
+
+def _run_backend(backend: STTBackend, fixtures: List[str], default_language: str) -> None:
+    rtfs, errors = [], []
+    for path in fixtures:
+        language = _language(path, default_language)
+        if not backend.supports(language):
+            print(f"  {os.path.basename(path):28} skipped (no {language} model)")
+            continue
+        audio, duration = _load(path)
+        try:
+            backend.warm_up(language)  # model loading is not part of the RTF
+        except sr.RequestError as e:
+            print(f"  {os.path.basename(path):28} error: {e}")
+            continue
+        start = time.perf_counter()
+        try:
+            candidate = backend.recognize(audio, language)
+        except (sr.RequestError, sr.UnknownValueError) as e:
+            # A failed request says nothing about the engine's speed
+            print(f"  {os.path.basename(path):28} error: {e}")
+            continue
+        elapsed = time.perf_counter() - start
+        rtf = elapsed / duration if duration else 0.0
+        rtfs.append(rtf)
+        text = candidate[0] if candidate else ""
+        line = (f"  {os.path.basename(path):28} {duration:5.1f} s audio | "
+                f"{elapsed * 1000:7.0f} ms | RTF {rtf:5.2f}")
+        reference = _reference(path)
+        if reference is not None:
+            wer = word_error_rate(reference, text)
+            errors.append(wer)
+            line += f" | WER {wer:4.0%}"
+        print(f"{line} | {text!r}")
+    if rtfs:
+        summary = f"  → mean RTF {statistics.mean(rtfs):.2f}, max {max(rtfs):.2f}"
+        if errors:
+            summary += f", mean WER {statistics.mean(errors):.0%}"
+        print(summary)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_FIXTURES],
+                        help="WAV files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="Comma-separated backends to compare")
+    parser.add_argument("--language", default="en-US",
+                        help="Language for fixtures without a .vi.wav suffix")
+    args = parser.parse_args()
+
+    fixtures = _fixtures(args.paths)
+    if not fixtures:
+        parser.error(f"no WAV fixtures found in {', '.join(args.paths)}")
+
+    print(f"[Bench] {len(fixtures)} fixtures")
+    for name in args.backends.split(","):
+        backend = get_backend(name.strip())
+        print(f" {backend.name}{' (offline)' if backend.offline else ''}:")
+        if not backend.available():
+            print("  not installed / no model, skipped")
+            continue
+        _run_backend(backend, fixtures, args.language)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Local stand-in for the OpenRouter chat completions endpoint.
+
+Serves OpenAI-style JSON replies and SSE streams over plain HTTP/1.1 with
+keep-alive, so benchmarks can measure client-side overhead without network
+noise or API costs. A per-connection delay emulates the TLS handshake that
+a fresh connection to openrouter.ai pays.
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without NODELAY the
+        # client's delayed ACK adds ~40 ms per reply on a reused connection.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # New TCP connection → pay the simulated handshake once
+        if self.server.handshake_s:
+            time.sleep(self.server.handshake_s)
+        self.server.connections += 1
+
+    def log_message(self, format, *args):  # silence default stderr logging
+        pass
+
+    def do_HEAD(self):
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            payload = {}
+        self.server.requests += 1
+
+        if self.server.ttft_s:
+            time.sleep(self.server.ttft_s)
+
+        try:
+            if payload.get("stream"):
+                self._send_stream()
+            else:
+                self._send_json(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading (cancelled stream)
+            self.close_connection = True
+
+    def _send_json(self, payload):
+        # A non-streamed reply still waits for the whole generation
+        if self.server.token_interval_s:
+            time.sleep(self.server.token_interval_s * max(0, len(self.server.tokens) - 1))
+        text = "".join(self.server.tokens)
+        data = json.dumps({
+            "id": "mock-1",
+            "model": payload.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": len(self.server.tokens),
+                      "total_tokens": 10 + len(self.server.tokens)},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes):
+        if self.server.chunked:
+            data = b"%x\r\n%s\r\n" % (len(data), data)
+        self.wfile.write(data)
+        self.wfile.flush()
+
+    def _send_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        if self.server.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            # Body delimited by connection close (HTTP/1.0-style proxies)
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        for i, token in enumerate(self.server.tokens):
+            if i and self.server.token_interval_s:
+                time.sleep(self.server.token_interval_s)
+            event = {"choices": [{"index": 0, "delta": {"content": token}}]}
+            # Server-side send time lets the client compute delivery delay
+            event["sent_at"] = time.perf_counter()
+            self._write_chunk(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+        self._write_chunk(b"data: [DONE]\n\n")
+        if self.server.chunked:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    handshake_s = 0.0
+    ttft_s = 0.0
+    token_interval_s = 0.0
+    tokens: List[str] = []
+    chunked = True
+    connections = 0
+    requests = 0
+
+
+class MockOpenRouterServer:
+    """
+    Threaded mock server. Use as a context manager:
+
+        with MockOpenRouterServer(handshake_ms=80) as srv:
+            requests.post(srv.url, json={...})
+    """
+
+    def __init__(
+        self,
+        handshake_ms: float = 0.0,
+        ttft_ms: float = 0.0,
+        token_interval_ms: float = 0.0,
+        tokens: Optional[List[str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        chunked: bool = True,
+    ):
+        self._server = _Server((host, port), _Handler)
+        self._server.handshake_s = handshake_ms / 1000.0
+        self._server.ttft_s = ttft_ms / 1000.0
+        self._server.token_interval_s = token_interval_ms / 1000.0
+        self._server.tokens = tokens or ["Xin ", "chào", "!"]
+        # False: stream without Transfer-Encoding, body ends at connection close
+        self._server.chunked = chunked
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/chat/completions"
+
+    @property
+    def connections(self) -> int:
+        """Number of TCP connections accepted so far."""
+        return self._server.connections
+
+    @property
+    def requests(self) -> int:
+        """Number of POST requests served so far."""
+        return self._server.requests
+
+    def start(self) -> "MockOpenRouterServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOpenRouterServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -1,8 +1,16 @@
-from typing import Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
+from translator_mini.sentences import SentenceSplitter
 from translator_mini.translator import translate_en_to_vi
 from translator_mini.text_to_speech import speak
 
+# Speculative segments: sentence ends, or a clause cut once this long
+SEGMENT_MAX_CHARS = 80
+
+_segment_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="translate-ahead")
+
 
 class ChatbotTranslatorMini:
     """
@@ -10,15 +18,62 @@ class ChatbotTranslatorMini:
     - Input: English text
     - Translate: English -> Vietnamese
     - Output: text and optional voice
+
+    With streaming STT, speculate() is fed the stable prefix of the partial
+    transcripts: every finished segment of it is translated while the user
+    is still talking, and respond_text() only translates what came after.
     """
 
     def __init__(self, voice_output: bool = False, tts_rate: int = 140, use_gtts: bool = True):
         self.voice_output = voice_output
         self.tts_rate = tts_rate
         self.use_gtts = use_gtts
+        self._lock = threading.Lock()
+        self._reset_speculation()
+
+    def _reset_speculation(self) -> None:
+        self._spec_text = ""
+        self._spec_splitter = SentenceSplitter(max_chars=SEGMENT_MAX_CHARS)
+        self._spec_segments: List[Tuple[str, "Future[Optional[str]]"]] = []
+
+    def speculate(self, stable_text: str) -> None:
+        """Translate the finished segments of a stable partial transcript ahead of time."""
+        with self._lock:
+            if not stable_text.startswith(self._spec_text):
+                # The recognizer revised text we had already segmented
+                self._reset_speculation()
+            new_words = stable_text[len(self._spec_text):].split()
+            self._spec_text = stable_text
+            # Trailing space: a word is only complete once the next one started
+            for segment in self._spec_splitter.feed(" ".join(new_words) + " " if new_words else ""):
+                self._spec_segments.append((segment, _segment_pool.submit(translate_en_to_vi, segment)))
+
+    def _take_speculation(self, input_en: str) -> Tuple[List[Tuple[str, "Future[Optional[str]]"]], str]:
+        """
+        (speculated segments, rest of the final text) if the segments are a
+        prefix of the final text word by word, else ([], input_en).
+        """
+        with self._lock:
+            segments = self._spec_segments
+            self._reset_speculation()
+        words = " ".join(segment for segment, _ in segments).split()
+        final_words = input_en.split()
+        if not segments or [w.lower() for w in final_words[:len(words)]] != [w.lower() for w in words]:
+            return [], input_en
+        return segments, " ".join(final_words[len(words):])
 
     def respond_text(self, input_en: str) -> Optional[str]:
-        vi = translate_en_to_vi(input_en)
+        segments, rest = self._take_speculation(input_en)
+        vi = None
+        if segments:
+            parts = [future.result() for _, future in segments]
+            if rest:
+                parts.append(translate_en_to_vi(rest))
+            if all(parts):
+                vi = " ".join(parts)
+                print(f"[Translate] {len(segments)} segment(s) translated while listening")
+        if vi is None:
+            vi = translate_en_to_vi(input_en)
         if vi and self.voice_output:
             speak(vi, rate=self.tts_rate, prefer_vi=True, use_gtts=self.use_gtts)
         return vi
@@ -0,0 +1,68 @@
+"""
+Per-provider concurrency limits for the asyncio APIs.
+
+Each provider (openrouter, gemini, ...) gets its own asyncio.Semaphore per
+event loop, so many coroutines can be in flight from one loop while the
+number of simultaneous requests to a given provider stays bounded.
+"""
+
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+DEFAULT_LIMITS: Dict[str, int] = {
+    "openrouter": 8,
+    "gemini": 4,
+}
+DEFAULT_LIMIT = 4
+
+
+class ProviderLimiter:
+    """Hands out per-provider semaphores, one set per running event loop."""
+
+    def __init__(self, limits: Dict[str, int] = None, default: int = DEFAULT_LIMIT):
+        self._limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._default = default
+        self._lock = threading.Lock()
+        # Semaphores bind to the loop they are first used on
+        self._per_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get_limit(self, provider: str) -> int:
+        return self._limits.get(provider, self._default)
+
+    def set_limit(self, provider: str, limit: int) -> None:
+        """Change a provider's limit. Applies to semaphores created afterwards."""
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        with self._lock:
+            self._limits[provider] = limit
+            for sems in self._per_loop.values():
+                sems.pop(provider, None)
+
+    def semaphore(self, provider: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sems = self._per_loop.setdefault(loop, {})
+            sem = sems.get(provider)
+            if sem is None:
+                sem = asyncio.Semaphore(self.get_limit(provider))
+                sems[provider] = sem
+            return sem
+
+    @asynccontextmanager
+    async def slot(self, provider: str) -> AsyncIterator[None]:
+        """Hold one of the provider's slots for the duration of the block."""
+        async with self.semaphore(provider):
+            yield
+
+
+limiter = ProviderLimiter()
+
+
+def set_concurrency_limit(provider: str, limit: int) -> None:
+    """Set the max number of in-flight async requests for a provider."""
+    limiter.set_limit(provider, limit)
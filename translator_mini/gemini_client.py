@@ -3,11 +3,32 @@ Google Gemini API Client (direct, no OpenRouter)
 Provides a Chatbot class compatible with OpenRouterChatbot interface.
 """
 
+import asyncio
+import datetime
+import hashlib
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, Iterator, List, Dict, Optional, Tuple
+
+from translator_mini import metrics, resilience
+from translator_mini.concurrency import limiter
+from translator_mini.hedging import HEDGE_AFTER_S, as_stream, hedged_stream
+from translator_mini.history import (
+    DEFAULT_MAX_CONTEXT_TOKENS,
+    ConversationHistory,
+    estimate_tokens,
+    summary_messages,
+)
+from translator_mini.resilience import CircuitOpenError, RateLimitedError, TransientError
+from translator_mini.router import AUTO_MODEL, PROBE_MESSAGES, ModelRouter, get_router
+from translator_mini.translation_cache import LRUCache
 
 try:
     import google.generativeai as genai
+    from google.generativeai import caching as genai_caching
+    from google.api_core import exceptions as google_exceptions
 except ImportError as exc:  # pragma: no cover
     raise ImportError("google-generativeai is required for Gemini client. Install with `pip install google-generativeai`." ) from exc
 
@@ -23,6 +44,20 @@ MODELS = {
     "gemini-2.5-pro": "gemini-2.5-pro",
 }
 
+# Ordered fallback chain for hedged requests (see hedging.py)
+FALLBACK_MODELS = ["gemini-flash", "gemini-2-flash", "gemini-2-flash-lite"]
+
+# Small/cheap model that folds old turns into the history summary
+SUMMARY_MODEL = "gemini-2-flash-lite"
+
+# Explicit context caching only pays off (and is only accepted by the API)
+# above a minimum prompt size; smaller system prompts rely on the API's
+# implicit prefix caching, which a stable system instruction already helps.
+CONTEXT_CACHE_MIN_TOKENS = 1024
+CONTEXT_CACHE_TTL = datetime.timedelta(hours=1)
+CONTEXT_CACHE_RETRY_S = 60.0   # after a 429 / 5xx / network error creating one
+MODEL_CACHE_SIZE = 16
+
 
 def get_api_key(key_file: str = "gemini_api_key.txt") -> Optional[str]:
     """Get Gemini API key from file or env (GEMINI_API_KEY)."""
@@ -42,9 +77,230 @@ def get_api_key(key_file: str = "gemini_api_key.txt") -> Optional[str]:
     return None
 
 
+_configure_lock = threading.Lock()
+_configured_key: Optional[str] = None
+
+
 def _configure_client(api_key: str) -> None:
-    """Configure global Gemini client."""
-    genai.configure(api_key=api_key)
+    """Configure the global Gemini client (only when the key changes)."""
+    global _configured_key
+    with _configure_lock:
+        if api_key != _configured_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+
+
+# (key hash, model id, system instruction) -> (GenerativeModel, expires_at)
+_models = LRUCache(MODEL_CACHE_SIZE)
+# Models the API refused a context cache for (never retried)
+_context_cache_unsupported = set()
+# model id -> monotonic time before which no new context cache is tried
+_context_cache_retry_at: Dict[str, float] = {}
+
+
+def _key_hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def _context_cached_model(model_id: str, system_instruction: str) -> Tuple[Optional[Any], float]:
+    """
+    (GenerativeModel backed by a server-side context cache, or None;
+    monotonic time until which that answer holds).
+
+    Refusals (unsupported model, content too small: 4xx) disable caching
+    for the model; quota, server and network errors only pause it for
+    CONTEXT_CACHE_RETRY_S.
+    """
+    never = float("inf")
+    if estimate_tokens(system_instruction) < CONTEXT_CACHE_MIN_TOKENS:
+        return None, never
+    if model_id in _context_cache_unsupported:
+        return None, never
+    retry_at = _context_cache_retry_at.get(model_id, 0.0)
+    if retry_at > time.monotonic():
+        return None, retry_at
+    try:
+        cached = genai_caching.CachedContent.create(
+            model=model_id if model_id.startswith("models/") else f"models/{model_id}",
+            system_instruction=system_instruction,
+            ttl=CONTEXT_CACHE_TTL,
+            display_name="translator_mini",
+        )
+    except google_exceptions.ClientError as e:
+        if not isinstance(e, google_exceptions.ResourceExhausted):
+            print(f"[Gemini] Context caching unavailable for {model_id}: {e}")
+            _context_cache_unsupported.add(model_id)
+            return None, never
+        error: Exception = e
+    except Exception as e:
+        error = e
+    else:
+        _context_cache_retry_at.pop(model_id, None)
+        # Recreate a bit before the server drops the cache
+        expires_at = time.monotonic() + CONTEXT_CACHE_TTL.total_seconds() * 0.9
+        return genai.GenerativeModel.from_cached_content(cached), expires_at
+
+    retry_at = time.monotonic() + CONTEXT_CACHE_RETRY_S
+    _context_cache_retry_at[model_id] = retry_at
+    print(f"[Gemini] Context cache for {model_id} failed ({error}); "
+          f"retrying in {CONTEXT_CACHE_RETRY_S:.0f}s")
+    return None, retry_at
+
+
+def _get_model(api_key: str, model_id: str, system_instruction: Optional[str] = None):
+    """
+    Configured GenerativeModel for (key, model, system instruction), reused
+    across calls. Long system instructions go into a context cache.
+    """
+    _configure_client(api_key)
+    cache_key = "\x1f".join((_key_hash(api_key), model_id, system_instruction or ""))
+    entry = _models.get(cache_key)
+    if entry is not None and entry[1] > time.monotonic():
+        return entry[0]
+
+    model_obj, expires_at = None, float("inf")
+    if system_instruction:
+        # A plain model built after a transient failure expires at the retry time
+        model_obj, expires_at = _context_cached_model(model_id, system_instruction)
+    if model_obj is None:
+        model_obj = genai.GenerativeModel(model_id, system_instruction=system_instruction or None)
+    _models.put(cache_key, (model_obj, expires_at))
+    return model_obj
+
+
+def _to_contents(messages: List[Dict[str, str]]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Split OpenAI-style messages into (system instruction, Gemini contents).
+
+    Only the first system message becomes the system instruction; later
+    ones (the rolling history summary) go in as a leading user turn, so the
+    instruction, and the context cache and model keyed on it, stay the same
+    when the summary changes. Assistant turns become role "model";
+    consecutive messages of the same role are merged, since Gemini expects
+    user/model turns to alternate.
+    """
+    system_parts: List[str] = []
+    contents: List[Dict[str, Any]] = []
+    for msg in messages:
+        role = msg.get("role", "user")
+        text = msg.get("content", "")
+        if role == "system" and not system_parts:
+            system_parts.append(text)
+            continue
+        role = "model" if role == "assistant" else "user"
+        if contents and contents[-1]["role"] == role:
+            contents[-1]["parts"].append(text)
+        else:
+            contents.append({"role": role, "parts": [text]})
+    return ("\n\n".join(system_parts) or None), contents
+
+
+def _append_turn(turns: Tuple, user_message: str, reply: str) -> Tuple:
+    """Session signature after a user/model exchange (same merging as _to_contents)."""
+    turns = list(turns)
+    if turns and turns[-1][0] == "user":
+        turns[-1] = ("user", turns[-1][1] + (user_message,))
+    else:
+        turns.append(("user", (user_message,)))
+    turns.append(("model", (reply,)))
+    return tuple(turns)
+
+
+@contextmanager
+def _gemini_errors() -> Iterator[None]:
+    """Map Gemini quota / server errors raised inside to resilience errors."""
+    try:
+        yield
+    except google_exceptions.ResourceExhausted as e:
+        raise RateLimitedError(f"Gemini quota exceeded: {e}") from e
+    except (google_exceptions.ServiceUnavailable,
+            google_exceptions.InternalServerError,
+            google_exceptions.DeadlineExceeded) as e:
+        raise TransientError(f"Gemini unavailable: {e}") from e
+
+
+def _classify_errors(fn, *args, **kwargs):
+    """Call fn, mapping Gemini quota / server errors to resilience errors."""
+    with _gemini_errors():
+        return fn(*args, **kwargs)
+
+
+async def _aclassify_errors(fn, *args, **kwargs):
+    """Await fn(...), mapping Gemini quota / server errors to resilience errors."""
+    with _gemini_errors():
+        return await fn(*args, **kwargs)
+
+
+def _outcome(exc: BaseException) -> str:
+    """Metrics outcome for an exception raised by a Gemini request."""
+    if isinstance(exc, CircuitOpenError):
+        return metrics.CIRCUIT_OPEN
+    if isinstance(exc, (RateLimitedError, google_exceptions.ResourceExhausted)):
+        return metrics.RATE_LIMITED
+    if isinstance(exc, (google_exceptions.DeadlineExceeded, TimeoutError)) or isinstance(
+            exc.__cause__, google_exceptions.DeadlineExceeded):
+        return metrics.TIMEOUT
+    return metrics.ERROR
+
+
+def _finish_metrics(timer: metrics.RequestTimer, resp, outcome: str,
+                    error: Optional[str] = None) -> None:
+    """Record a request with token counts from the response's usage_metadata."""
+    usage = getattr(resp, "usage_metadata", None)
+    timer.finish(
+        outcome,
+        prompt_tokens=getattr(usage, "prompt_token_count", None),
+        completion_tokens=getattr(usage, "candidates_token_count", None),
+        error=error,
+    )
+
+
+def _chunk_text(chunk) -> str:
+    """Text of one streamed chunk ("" for chunks without text parts)."""
+    try:
+        return chunk.text
+    except ValueError:  # e.g. the last chunk only carries finish_reason/usage
+        return ""
+
+
+def _iter_stream(open_stream: Callable[[], Any], model_id: str, key: str,
+                 parts: Optional[List[str]] = None) -> Generator[str, None, str]:
+    """
+    Open a streaming generate_content call and yield its text as it arrives.
+
+    Only opening the stream is retried (the SDK reads the first chunk
+    there); once text flows it is not replayed. Yielded text is also
+    appended to `parts`. Returns the metrics outcome, which stays CANCELLED
+    if the consumer stops iterating early.
+    """
+    timer = metrics.RequestTimer("gemini", model_id, stream=True)
+    parts = parts if parts is not None else []
+    last = None
+    response = None
+    outcome, error = metrics.CANCELLED, None
+    try:
+        response = resilience.call("gemini", lambda: _classify_errors(open_stream), key=key,
+                                   scope=model_id)
+        timer.first_byte()
+        for chunk in response:
+            last = chunk
+            text = _chunk_text(chunk)
+            if text:
+                timer.first_token()
+                parts.append(text)
+                yield text
+        outcome = metrics.OK if parts else metrics.ERROR
+    except Exception as e:
+        print(f"[Gemini] Stream error: {e}")
+        outcome, error = _outcome(e), str(e)
+    finally:
+        if outcome == metrics.CANCELLED and response is not None:
+            # Stop the server-side stream of a hedge loser / abandoned turn
+            cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+            if callable(cancel):
+                cancel()
+        _finish_metrics(timer, last, outcome, error)
+    return outcome
 
 
 def chat_completion(
@@ -67,36 +323,166 @@ def chat_completion(
         print("[Gemini] ERROR: No GEMINI_API_KEY or gemini_api_key.txt found")
         return None
 
-    _configure_client(key)
-
     model_id = MODELS.get(model, model)
-
-    # Flatten OpenAI-style messages to a single prompt for Gemini
-    prompt_lines = []
-    for msg in messages:
-        role = msg.get("role", "user")
-        content = msg.get("content", "")
-        role_tag = "User" if role == "user" else ("Assistant" if role == "assistant" else "System")
-        prompt_lines.append(f"{role_tag}: {content}")
-    prompt_lines.append("Assistant:")
-    prompt = "\n".join(prompt_lines)
+    system_instruction, contents = _to_contents(messages)
+    timer = metrics.RequestTimer("gemini", model_id)
 
     try:
-        model_obj = genai.GenerativeModel(model_id)
-        resp = model_obj.generate_content(
-            prompt,
-            generation_config={
-                "temperature": temperature,
-                "max_output_tokens": max_tokens,
-            },
+        model_obj = _get_model(key, model_id, system_instruction)
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
+        # Rate limit + retry on 429/5xx + circuit breaker (see resilience.py)
+        resp = resilience.call(
+            "gemini",
+            lambda: _classify_errors(model_obj.generate_content, contents,
+                                     generation_config=generation_config),
+            key=key,
+            scope=model_id,
         )
         text = resp.text if resp and hasattr(resp, "text") else None
+        _finish_metrics(timer, resp, metrics.OK if text else metrics.ERROR)
         return text.strip() if text else None
     except Exception as e:  # broad to keep simple for runtime issues
         print(f"[Gemini] Request error: {e}")
+        _finish_metrics(timer, None, _outcome(e), str(e))
         return None
 
 
+async def achat_completion(
+    messages: List[Dict[str, str]],
+    model: str = "gemini-flash-latest",
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+) -> Optional[str]:
+    """Coroutine version of chat_completion() using the SDK's async transport.
+
+    Concurrent calls are capped by the "gemini" slot in concurrency.limiter.
+    """
+    key = api_key or get_api_key()
+    if not key:
+        print("[Gemini] ERROR: No GEMINI_API_KEY or gemini_api_key.txt found")
+        return None
+
+    model_id = MODELS.get(model, model)
+    system_instruction, contents = _to_contents(messages)
+
+    async with limiter.slot("gemini"):
+        timer = metrics.RequestTimer("gemini", model_id)
+        try:
+            # May create a context cache (blocking) on first use
+            model_obj = await asyncio.to_thread(_get_model, key, model_id, system_instruction)
+            # Same rate limit, retry and circuit breaker as chat_completion()
+            resp = await resilience.acall(
+                "gemini",
+                lambda: _aclassify_errors(model_obj.generate_content_async, contents,
+                                          generation_config={
+                                              "temperature": temperature,
+                                              "max_output_tokens": max_tokens,
+                                          }),
+                key=key,
+                scope=model_id,
+            )
+            text = resp.text if resp and hasattr(resp, "text") else None
+            _finish_metrics(timer, resp, metrics.OK if text else metrics.ERROR)
+            return text.strip() if text else None
+        except asyncio.CancelledError:
+            _finish_metrics(timer, None, metrics.CANCELLED)
+            raise
+        except Exception as e:  # CancelledError is not an Exception, so it propagates
+            print(f"[Gemini] Request error: {e}")
+            _finish_metrics(timer, None, _outcome(e), str(e))
+            return None
+
+
+def chat_completion_stream(
+    messages: List[Dict[str, str]],
+    model: str = "gemini-flash-latest",
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+) -> Generator[str, None, None]:
+    """
+    Stream a chat completion from Gemini (streaming generate_content).
+
+    Yields:
+        Text chunks as they arrive
+    """
+    key = api_key or get_api_key()
+    if not key:
+        print("[Gemini] ERROR: No GEMINI_API_KEY or gemini_api_key.txt found")
+        return
+
+    model_id = MODELS.get(model, model)
+    system_instruction, contents = _to_contents(messages)
+    generation_config = {
+        "temperature": temperature,
+        "max_output_tokens": max_tokens,
+    }
+    yield from _iter_stream(
+        lambda: _get_model(key, model_id, system_instruction).generate_content(
+            contents, generation_config=generation_config, stream=True),
+        model_id,
+        key,
+    )
+
+
+def chat_completion_stream_hedged(
+    messages: List[Dict[str, str]],
+    models: List[str],
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    hedge_after_s: float = HEDGE_AFTER_S,
+) -> Generator[str, None, None]:
+    """
+    Stream from the first model in `models` that starts answering.
+
+    The next model is tried as a hedge if the current one has no first token
+    after hedge_after_s, or immediately if it errors; losers are cancelled.
+    """
+    attempts = [
+        (lambda m=m: chat_completion_stream(
+            messages, model=m, api_key=api_key,
+            temperature=temperature, max_tokens=max_tokens))
+        for m in models
+    ]
+    yield from hedged_stream(attempts, hedge_after_s, labels=[MODELS.get(m, m) for m in models])
+
+
+def chat_completion_hedged(
+    messages: List[Dict[str, str]],
+    models: List[str],
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    hedge_after_s: float = HEDGE_AFTER_S,
+) -> Optional[str]:
+    """
+    chat_completion() across `models`: hedge with the next model if the
+    current one is slower than hedge_after_s, fail over at once on error.
+    """
+    attempts = [
+        as_stream(lambda m=m: chat_completion(
+            messages, model=m, api_key=api_key,
+            temperature=temperature, max_tokens=max_tokens))
+        for m in models
+    ]
+    text = "".join(hedged_stream(attempts, hedge_after_s, labels=[MODELS.get(m, m) for m in models]))
+    return text or None
+
+
+def _probe(alias: str) -> Optional[str]:
+    return chat_completion(PROBE_MESSAGES, model=alias, max_tokens=1)
+
+
+def get_model_router() -> ModelRouter:
+    """Shared latency-aware router over MODELS (used by model="auto")."""
+    return get_router("gemini", lambda: ModelRouter("gemini", MODELS, probe_fn=_probe))
+
+
 class GeminiChatbot:
     """Stateful chatbot compatible with OpenRouterChatbot interface."""
 
@@ -106,38 +492,196 @@ class GeminiChatbot:
         api_key: Optional[str] = None,
         system_prompt: Optional[str] = None,
         max_history: int = 20,
+        fallback_models: Optional[List[str]] = None,
+        hedge_after_s: float = HEDGE_AFTER_S,
+        max_context_tokens: int = DEFAULT_MAX_CONTEXT_TOKENS,
+        summary_model: Optional[str] = SUMMARY_MODEL,
+        quality: str = "basic",
     ):
         self.model = model
         self.api_key = api_key or get_api_key()
         self.max_history = max_history
+        self.summary_model = summary_model
+        # Primary model first, then fallbacks (hedged when more than one)
+        self.models = [model] + [m for m in (fallback_models or []) if m != model]
+        self.hedge_after_s = hedge_after_s
+        # model="auto": pick the fastest healthy model of this tier per turn
+        self.quality = quality
+        self.router = get_model_router() if model == AUTO_MODEL else None
+        if self.router is not None:
+            self.router.watch(quality)
         self.system_prompt = system_prompt or (
             "Bạn là trợ lý AI thông minh, có thể nói tiếng Việt và tiếng Anh. "
             "Trả lời ngắn gọn, rõ ràng và hữu ích."
         )
-        self.messages: List[Dict[str, str]] = [
-            {"role": "system", "content": self.system_prompt}
-        ]
-
-    def chat(self, user_message: str) -> Optional[str]:
-        temp_messages = self.messages + [{"role": "user", "content": user_message}]
-        response = chat_completion(
-            messages=temp_messages,
-            model=self.model,
+        self.history = ConversationHistory(
+            self.system_prompt,
+            max_tokens=max_context_tokens,
+            max_messages=max_history,
+            summarizer=self._summarize if summary_model else None,
+        )
+        # Native multi-turn session for single-model turns, reused while it
+        # still matches what history.build() would send
+        self._session = None
+        self._session_key: Optional[Tuple] = None
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        return self.history.messages
+
+    def _summarize(self, previous: str, turns: List[Dict[str, str]]) -> Optional[str]:
+        return chat_completion(
+            messages=summary_messages(previous, turns),
+            model=self.summary_model,
             api_key=self.api_key,
+            temperature=0.3,
+            max_tokens=256,
         )
-        if response:
-            self.messages.append({"role": "user", "content": user_message})
-            self.messages.append({"role": "assistant", "content": response})
-            if len(self.messages) > self.max_history + 1:
-                self.messages = [self.messages[0]] + self.messages[-self.max_history:]
+
+    def _turn_models(self) -> List[str]:
+        """Models for this turn: primary (routed if auto) followed by fallbacks."""
+        if self.router is None:
+            return self.models
+        primary = self.router.choose(self.quality) or FALLBACK_MODELS[0]
+        return [primary] + [m for m in self.models[1:] if m != primary]
+
+    def _chat_session(self, model_id: str, messages: List[Dict[str, str]]):
+        """
+        ChatSession holding messages[:-1]. The live session is reused when
+        the model, system instruction and earlier turns are unchanged;
+        otherwise (trimmed history, new summary, routed model) it is rebuilt.
+        """
+        system_instruction, contents = _to_contents(messages[:-1])
+        key = (model_id, system_instruction,
+               tuple((c["role"], tuple(c["parts"])) for c in contents))
+        if self._session is None or key != self._session_key:
+            model_obj = _get_model(self.api_key, model_id, system_instruction)
+            self._session = model_obj.start_chat(history=contents)
+            self._session_key = key
+        return self._session
+
+    def _send(self, model: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        """One turn through the native chat session (single model)."""
+        if not self.api_key:
+            print("[Gemini] ERROR: No GEMINI_API_KEY or gemini_api_key.txt found")
+            return None
+        model_id = MODELS.get(model, model)
+        user_message = messages[-1]["content"]
+        timer = metrics.RequestTimer("gemini", model_id)
+        try:
+            session = self._chat_session(model_id, messages)
+            generation_config = {"temperature": 0.7, "max_output_tokens": 1024}
+            resp = resilience.call(
+                "gemini",
+                lambda: _classify_errors(session.send_message, user_message,
+                                         generation_config=generation_config),
+                key=self.api_key,
+                scope=model_id,
+            )
+            text = resp.text if resp and hasattr(resp, "text") else None
+            _finish_metrics(timer, resp, metrics.OK if text else metrics.ERROR)
+        except Exception as e:
+            print(f"[Gemini] Request error: {e}")
+            _finish_metrics(timer, None, _outcome(e), str(e))
+            text = None
+        if not text:
+            # Don't carry a failed/blocked exchange into the next turn
+            self._session = None
+            return None
+        text = text.strip()
+        # The session now also holds this exchange (as history will, after add_turn)
+        model_id, system_instruction, turns = self._session_key
+        self._session_key = (model_id, system_instruction,
+                             _append_turn(turns, user_message, text))
+        return text
+
+    def _send_stream(self, model: str, messages: List[Dict[str, str]]) -> Generator[str, None, None]:
+        """Streaming version of _send()."""
+        if not self.api_key:
+            print("[Gemini] ERROR: No GEMINI_API_KEY or gemini_api_key.txt found")
+            return
+        model_id = MODELS.get(model, model)
+        user_message = messages[-1]["content"]
+        generation_config = {"temperature": 0.7, "max_output_tokens": 1024}
+        parts: List[str] = []
+        outcome = metrics.CANCELLED
+        try:
+            outcome = yield from _iter_stream(
+                lambda: self._chat_session(model_id, messages).send_message(
+                    user_message, generation_config=generation_config, stream=True),
+                model_id,
+                self.api_key,
+                parts,
+            )
+        finally:
+            if outcome == metrics.OK:
+                turns = self._session_key[2]
+                self._session_key = (model_id, self._session_key[1],
+                                     _append_turn(turns, user_message, "".join(parts)))
+            else:
+                # Broken or abandoned stream: the session's last exchange is unusable
+                self._session = None
+
+    def chat(self, user_message: str, commit: bool = True) -> Optional[str]:
+        """
+        commit=False: speculative turn that leaves history and the live
+        chat session untouched (stateless request); see commit_turn().
+        """
+        temp_messages = self.history.build(user_message)
+        models = self._turn_models()
+        if len(models) > 1:
+            response = chat_completion_hedged(
+                messages=temp_messages,
+                models=models,
+                api_key=self.api_key,
+                hedge_after_s=self.hedge_after_s,
+            )
+        elif not commit:
+            response = chat_completion(messages=temp_messages, model=models[0], api_key=self.api_key)
+        else:
+            response = self._send(models[0], temp_messages)
+        if response and commit:
+            self.history.add_turn(user_message, response)
         return response
 
+    def commit_turn(self, user_message: str, reply: str) -> None:
+        """Record a turn answered by a speculative chat(commit=False)."""
+        self.history.add_turn(user_message, reply)
+
+    def chat_stream(self, user_message: str) -> Generator[str, None, None]:
+        """
+        Send a message and stream the response (same contract as
+        OpenRouterChatbot.chat_stream: history is updated only once the
+        stream produced a reply).
+        """
+        temp_messages = self.history.build(user_message)
+        models = self._turn_models()
+        if len(models) > 1:
+            stream = chat_completion_stream_hedged(
+                messages=temp_messages,
+                models=models,
+                api_key=self.api_key,
+                hedge_after_s=self.hedge_after_s,
+            )
+        else:
+            stream = self._send_stream(models[0], temp_messages)
+
+        full_response = []
+        for chunk in stream:
+            full_response.append(chunk)
+            yield chunk
+
+        if full_response:
+            self.history.add_turn(user_message, "".join(full_response))
+
     def reset(self) -> None:
-        self.messages = [{"role": "system", "content": self.system_prompt}]
+        self.history.reset()
+        self._session = None
 
     def set_system_prompt(self, prompt: str) -> None:
         self.system_prompt = prompt
-        self.reset()
+        self.history.reset(prompt)
+        self._session = None
 
 
 def interactive_chat(model: str = "gemini-flash-latest"):
@@ -161,10 +705,13 @@ def interactive_chat(model: str = "gemini-flash-latest"):
                 print("🔄 History cleared.")
                 continue
 
-            resp = bot.chat(user_input)
-            if resp:
-                print(f"🤖 AI: {resp}")
-            else:
+            print("🤖 AI: ", end="", flush=True)
+            got_reply = False
+            for chunk in bot.chat_stream(user_input):
+                got_reply = True
+                print(chunk, end="", flush=True)
+            print()
+            if not got_reply:
                 print("⚠️ No response.")
         except KeyboardInterrupt:
             print("\n👋 Bye!")
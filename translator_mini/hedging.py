@@ -0,0 +1,189 @@
+"""
+Hedged requests with model fallback.
+
+Given an ordered list of attempts (one per model), start the first one. If
+it has not produced its first chunk within hedge_after_s, start the next one
+as a hedge; if an attempt fails (ends without producing anything), start the
+next one right away. The first attempt to produce a chunk wins and is
+streamed to the caller; the others are told to stop. An attempt can
+register a closer with on_cancel() (e.g. its HTTP response's close), so a
+loser still waiting for its first byte drops its connection right away
+instead of when that byte finally arrives.
+
+Attempts are plain callables returning an iterator of text chunks, so the
+same logic works for streaming (OpenRouter) and one-shot (Gemini) calls.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Generator, Iterator, List, Optional, Sequence, Tuple
+
+Attempt = Callable[[], Iterator[str]]
+
+# Default time to wait for the primary model's first token before hedging
+HEDGE_AFTER_S = 2.5
+
+# The _Runner whose attempt is running on this thread (see on_cancel)
+_current = threading.local()
+
+
+def on_cancel(callback: Callable[[], None]) -> None:
+    """
+    From inside an attempt: run callback (e.g. response.close) on another
+    thread if this attempt loses the race or the caller stops reading.
+    Outside hedged_stream() this does nothing.
+    """
+    runner = getattr(_current, "runner", None)
+    if runner is not None:
+        runner.add_closer(callback)
+
+
+def as_stream(fn: Callable[[], Optional[str]]) -> Attempt:
+    """Wrap a one-shot call (returns text or None) as a single-chunk attempt."""
+    def attempt() -> Iterator[str]:
+        result = fn()
+        if result:
+            yield result
+    return attempt
+
+
+class _Runner:
+    """Drives one attempt on a daemon thread, reporting into a shared queue."""
+
+    def __init__(self, index: int, attempt: Attempt, events: "queue.Queue[Tuple[int, str, Optional[str]]]"):
+        self.index = index
+        self.cancelled = threading.Event()
+        self._attempt = attempt
+        self._events = events
+        self._closers: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"hedge-{index}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def add_closer(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._closers.append(callback)
+                return
+        self._close(callback)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled.set()
+            closers, self._closers = self._closers, []
+        for callback in closers:
+            self._close(callback)
+
+    @staticmethod
+    def _close(callback: Callable[[], None]) -> None:
+        # Unblocks the attempt's thread (it sees an error and finishes quietly)
+        try:
+            callback()
+        except Exception:
+            pass
+
+    def _run(self) -> None:
+        _current.runner = self
+        produced = False
+        try:
+            chunks = self._attempt()
+            try:
+                for chunk in chunks:
+                    if self.cancelled.is_set():
+                        break
+                    produced = True
+                    self._events.put((self.index, "chunk", chunk))
+            finally:
+                # Closing the generator closes its HTTP response
+                close = getattr(chunks, "close", None)
+                if close:
+                    close()
+        except Exception as e:
+            self._events.put((self.index, "error", str(e)))
+            return
+        self._events.put((self.index, "done" if produced else "error", None))
+
+
+def hedged_stream(
+    attempts: Sequence[Attempt],
+    hedge_after_s: float = HEDGE_AFTER_S,
+    labels: Optional[Sequence[str]] = None,
+) -> Generator[str, None, None]:
+    """
+    Yield chunks from whichever attempt produces its first chunk first.
+
+    Args:
+        attempts: Ordered attempts (primary first)
+        hedge_after_s: Start the next attempt if no first chunk by then
+        labels: Names for logging (e.g. model ids)
+
+    A loser that is still waiting for its first byte stops as soon as that
+    byte arrives; its thread never blocks the caller.
+    """
+    if not attempts:
+        return
+    labels = list(labels) if labels else [str(i) for i in range(len(attempts))]
+
+    events: "queue.Queue[Tuple[int, str, Optional[str]]]" = queue.Queue()
+    runners: List[_Runner] = []
+    failed = set()
+    start = time.perf_counter()
+    next_deadline = start + hedge_after_s
+
+    def launch_next() -> bool:
+        if len(runners) >= len(attempts):
+            return False
+        runner = _Runner(len(runners), attempts[len(runners)], events)
+        runners.append(runner)
+        runner.start()
+        return True
+
+    launch_next()
+    winner: Optional[int] = None
+    try:
+        # Phase 1: race for the first chunk
+        while winner is None:
+            timeout = max(0.0, next_deadline - time.perf_counter())
+            try:
+                index, kind, value = events.get(timeout=timeout)
+            except queue.Empty:
+                if launch_next():
+                    print(f"[Hedge] {labels[len(runners) - 2]} slow "
+                          f"(>{hedge_after_s:.1f}s), hedging with {labels[len(runners) - 1]}")
+                next_deadline = time.perf_counter() + hedge_after_s
+                continue
+
+            if kind == "chunk":
+                winner = index
+                if len(runners) > 1 or index > 0:
+                    print(f"[Hedge] {labels[index]} won after "
+                          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+                for runner in runners:
+                    if runner.index != index:
+                        runner.cancel()
+                yield value
+                break
+
+            # error / empty reply: fail over immediately
+            failed.add(index)
+            if launch_next():
+                print(f"[Hedge] {labels[index]} failed, falling back to {labels[len(runners) - 1]}")
+                next_deadline = time.perf_counter() + hedge_after_s
+            elif len(failed) == len(runners):
+                print("[Hedge] All models failed")
+                return
+
+        # Phase 2: stream the winner, ignore everyone else
+        while True:
+            index, kind, value = events.get()
+            if index != winner:
+                continue
+            if kind != "chunk":
+                return
+            yield value
+    finally:
+        for runner in runners:
+            runner.cancel()
@@ -0,0 +1,195 @@
+"""
+Token-budget conversation history shared by the chatbots.
+
+Keeps the system prompt and the most recent turns inside a prompt budget.
+Turns that no longer fit are folded into a rolling summary by a cheap model
+on a background thread, so the user's turn never waits for it; until the
+summary is ready those turns are simply left out of the prompt.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+Message = Dict[str, str]
+
+# (previous summary, turns to fold in) -> new summary, or None on failure
+Summarizer = Callable[[str, List[Message]], Optional[str]]
+
+DEFAULT_MAX_CONTEXT_TOKENS = 3000
+# Per-message framing (role tags etc.) on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~3 chars/token; Vietnamese diacritics split more)."""
+    return len(text) // 3 + 1
+
+
+def message_tokens(message: Message) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def summary_messages(previous: str, turns: List[Message]) -> List[Message]:
+    """Prompt asking a model to merge `turns` into the running summary."""
+    transcript = "\n".join(
+        f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in turns
+    )
+    return [
+        {
+            "role": "system",
+            "content": (
+                "Summarize the conversation so far in at most 5 short bullet points, "
+                "in the language the user speaks. Keep names, facts, numbers and open "
+                "requests; drop greetings and filler. Reply with the summary only."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (f"Earlier summary:\n{previous}\n\n" if previous else "")
+            + f"New messages:\n{transcript}",
+        },
+    ]
+
+
+class ConversationHistory:
+    """
+    System prompt + rolling summary + recent turns, within max_tokens.
+
+    - max_tokens: prompt budget (system prompt, summary, history, new message)
+    - max_messages: hard cap on kept messages, like the old max_history
+    - keep_recent: messages never folded into the summary
+    - summarizer: called off-thread with (summary, old turns); None = just drop
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_tokens: int = DEFAULT_MAX_CONTEXT_TOKENS,
+        max_messages: int = 20,
+        keep_recent: int = 4,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer
+        self.summary = ""
+        self._turns: List[Message] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Bumped on reset so a summary of a cleared conversation is discarded
+        self._generation = 0
+
+    # ------------------------------------------------------------------
+    # Prompt building
+    # ------------------------------------------------------------------
+
+    def _prefix(self) -> List[Message]:
+        """
+        System prompt, then the summary as a second system message: the
+        prompt itself stays byte-identical while the summary changes, so
+        providers can keep caching it (Gemini sends the summary as a
+        leading turn, see gemini_client._to_contents).
+        """
+        prefix = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            prefix.append({
+                "role": "system",
+                "content": "Tóm tắt cuộc hội thoại trước (summary of earlier conversation):\n" + self.summary,
+            })
+        return prefix
+
+    def build(self, user_message: str) -> List[Message]:
+        """Messages to send for a new user turn, trimmed to the token budget."""
+        with self._lock:
+            prefix = self._prefix()
+            new = {"role": "user", "content": user_message}
+            budget = self.max_tokens - sum(message_tokens(m) for m in prefix) - message_tokens(new)
+            recent: List[Message] = []
+            for message in reversed(self._turns):
+                cost = message_tokens(message)
+                if cost > budget:
+                    break
+                budget -= cost
+                recent.append(message)
+            recent.reverse()
+            # Don't open the history with a dangling assistant reply
+            if recent and recent[0]["role"] == "assistant":
+                recent = recent[1:]
+            return prefix + recent + [new]
+
+    @property
+    def messages(self) -> List[Message]:
+        """Full kept history (system messages first)."""
+        with self._lock:
+            return self._prefix() + list(self._turns)
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+
+    def add_turn(self, user_message: str, reply: str) -> None:
+        """Record a finished turn and fold old turns away if over budget."""
+        with self._lock:
+            self._turns.append({"role": "user", "content": user_message})
+            self._turns.append({"role": "assistant", "content": reply})
+            folded = self._take_overflow()
+            generation = self._generation
+        if folded:
+            self._fold(folded, generation)
+
+    def _take_overflow(self) -> List[Message]:
+        """Remove (and return) the oldest turns beyond the budget or message cap."""
+        used = sum(message_tokens(m) for m in self._prefix() + self._turns)
+        if used <= self.max_tokens and len(self._turns) <= self.max_messages:
+            return []
+        # Trim well below the limit so we summarize every few turns, not every turn
+        target = self.max_tokens * 0.6
+        cut = 0
+        limit = len(self._turns) - self.keep_recent
+        while cut < limit and (used > target or len(self._turns) - cut > self.max_messages):
+            used -= message_tokens(self._turns[cut])
+            cut += 1
+        # Fold whole user/assistant pairs
+        if cut % 2:
+            cut = min(cut + 1, max(limit, 0))
+        folded, self._turns = self._turns[:cut], self._turns[cut:]
+        return folded
+
+    def _fold(self, turns: List[Message], generation: int) -> None:
+        if self.summarizer is None:
+            return
+        if self._executor is None:
+            # One worker: summaries are applied in order
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary")
+        self._executor.submit(self._summarize, turns, generation)
+
+    def _summarize(self, turns: List[Message], generation: int) -> None:
+        with self._lock:
+            previous = self.summary
+        try:
+            summary = self.summarizer(previous, turns)
+        except Exception as e:
+            print(f"[History] Summary failed: {e}")
+            return
+        if not summary:
+            print("[History] Summary failed; older turns dropped")
+            return
+        with self._lock:
+            if generation == self._generation:
+                self.summary = summary.strip()
+
+    def wait(self) -> None:
+        """Block until queued summaries are applied (tests / shutdown)."""
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def reset(self, system_prompt: Optional[str] = None) -> None:
+        with self._lock:
+            if system_prompt is not None:
+                self.system_prompt = system_prompt
+            self._turns = []
+            self.summary = ""
+            self._generation += 1
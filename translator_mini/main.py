@@ -6,13 +6,17 @@ Modes:
   - text: Text input → Translation → Text/Voice output
   - assistant: AI Voice Assistant (OpenRouter) - bilingual chat
   - assistant-text: AI Text Assistant (OpenRouter) - bilingual chat
+  - transcribe: Recorded audio (WAV/FLAC files or folders) → timestamped transcripts
 """
 
 import argparse
-from typing import Optional
+from typing import List, Optional
 
 from translator_mini.chatbot import ChatbotTranslatorMini
 from translator_mini import speech_to_text as stt
+from translator_mini.mic_session import MicSession
+from translator_mini.stt_backends import BACKENDS as STT_BACKENDS, set_default_backend
+from translator_mini.hedging import HEDGE_AFTER_S
 
 
 # ==============================================================================
@@ -20,14 +24,34 @@ from translator_mini import speech_to_text as stt
 # ==============================================================================
 
 def run_voice(mic_index: Optional[int], voice_output: bool, tts_rate: int, loop: bool,
-              language_in: str = "en-US"):
-    """Voice input translation mode."""
-    # Dùng gTTS mặc định để tránh lỗi pyttsx3 không phát ở lượt thứ 2
+              language_in: str = "en-US", speculative: bool = False):
+    """
+    Voice input translation mode.
+
+    speculative: recognize while the speaker is still talking and translate
+    the stable part of the transcript segment by segment before the endpoint.
+    """
+    # gTTS mặc định (giọng hay hơn); pyttsx3 chạy trên worker riêng (offline_tts.py) làm dự phòng offline
     bot = ChatbotTranslatorMini(voice_output=voice_output, tts_rate=tts_rate, use_gtts=True)
+    # Keep the mic open across turns (no reopen / recalibration per turn)
+    mic = None
+    if loop:
+        try:
+            mic = MicSession(mic_index).start()
+        except Exception as e:
+            print(f"[Main] Persistent mic unavailable ({e}); reopening per turn")
+
+    def on_partial(partial: stt.PartialTranscript) -> None:
+        if not partial.final:
+            bot.speculate(partial.stable)
 
     def one_turn() -> None:
         try:
-            text = stt.listen_and_recognize(mic_index=mic_index, language=language_in)
+            if speculative:
+                text, _ = stt.listen_streaming(mic_index=mic_index, languages=[language_in],
+                                               session=mic, on_partial=on_partial)
+            else:
+                text = stt.listen_and_recognize(mic_index=mic_index, language=language_in, session=mic)
             if not text:
                 print("[Main] No recognized text. Try again...")
                 return
@@ -57,6 +81,9 @@ def run_voice(mic_index: Optional[int], voice_output: bool, tts_rate: int, loop:
                 print("[Main] 👂 Listening again...\n")
         except KeyboardInterrupt:
             print("\n[Main] 🛑 Stopped after {turn_count} turns.")
+        finally:
+            if mic is not None:
+                mic.close()
     else:
         print("[Main] Voice mode (single turn).")
         one_turn()
@@ -101,6 +128,11 @@ def run_assistant_voice(
     use_gtts: bool = True,
     input_language: str = "auto",
     provider: str = "gemini",
+    stream_output: bool = False,
+    fallback_models: Optional[List[str]] = None,
+    hedge_after_s: float = HEDGE_AFTER_S,
+    quality: str = "basic",
+    speculative: bool = False,
 ):
     """
     AI Voice Assistant mode using OpenRouter.
@@ -114,6 +146,11 @@ def run_assistant_voice(
             use_gtts=use_gtts,
             input_language=input_language,
             provider=provider,
+            stream_output=stream_output,
+            fallback_models=fallback_models,
+            hedge_after_s=hedge_after_s,
+            quality=quality,
+            speculative=speculative,
         )
     except ImportError as e:
         print(f"[Main] Error importing voice_assistant: {e}")
@@ -125,6 +162,9 @@ def run_assistant_text(
     use_gtts: bool = True,
     speak_output: bool = True,
     provider: str = "gemini",
+    fallback_models: Optional[List[str]] = None,
+    hedge_after_s: float = HEDGE_AFTER_S,
+    quality: str = "basic",
 ):
     """
     AI Text Assistant mode using OpenRouter.
@@ -137,6 +177,9 @@ def run_assistant_text(
             use_gtts=use_gtts,
             speak_output=speak_output,
             provider=provider,
+            fallback_models=fallback_models,
+            hedge_after_s=hedge_after_s,
+            quality=quality,
         )
     except ImportError as e:
         print(f"[Main] Error importing voice_assistant: {e}")
@@ -158,6 +201,16 @@ def run_openrouter_chat(model: str = "gemini-flash", provider: str = "gemini"):
         print(f"[Main] Error importing openrouter_client: {e}")
 
 
+def run_transcribe(paths: List[str], language: str = "en-US", workers: Optional[int] = None,
+                   translate: bool = False, output_dir: Optional[str] = None):
+    """Batch transcription of recordings (see transcribe.py)."""
+    from translator_mini.transcribe import transcribe
+    try:
+        transcribe(paths, language=language, workers=workers, translate=translate, output_dir=output_dir)
+    except KeyboardInterrupt:
+        print("\n[Main] Transcription stopped.")
+
+
 # ==============================================================================
 # UTILITIES
 # ==============================================================================
@@ -217,6 +270,11 @@ Examples:
   python -m translator_mini.main --mode assistant
   python -m translator_mini.main --mode assistant-text --model gpt-4o-mini
   python -m translator_mini.main --mode chat --model claude-sonnet
+  python -m translator_mini.main --mode assistant-text --fallback-models default
+  python -m translator_mini.main --mode assistant-text --model auto --quality standard
+
+  # Transcribe recordings (files or folders), optionally with Vietnamese
+  python -m translator_mini.main --mode transcribe --audio meetings/ --workers 8 --translate
 
   # Utilities
   python -m translator_mini.main --list-mics
@@ -227,9 +285,10 @@ Examples:
     # Mode selection
     parser.add_argument(
         "--mode", 
-        choices=["voice", "text", "assistant", "assistant-text", "chat"],
+        choices=["voice", "text", "assistant", "assistant-text", "chat", "transcribe"],
         default="voice",
-        help="Mode: voice/text (translator), assistant/assistant-text (AI chat), chat (API test)"
+        help="Mode: voice/text (translator), assistant/assistant-text (AI chat), chat (API test), "
+             "transcribe (recorded audio)"
     )
     
     # Translator options
@@ -246,7 +305,10 @@ Examples:
     
     # AI Assistant options
     parser.add_argument("--model", type=str, default="gemini-flash",
-                        help="AI model for assistant modes (e.g., gemini-flash, gemini-pro, gpt-4o-mini)")
+                        help="AI model for assistant modes (e.g., gemini-flash, gemini-pro, gpt-4o-mini; "
+                             "auto = fastest healthy model of --quality)")
+    parser.add_argument("--quality", choices=["basic", "standard", "premium"], default="basic",
+                        help="Quality tier for --model auto (basic = free/lite models)")
     parser.add_argument("--provider", choices=["openrouter", "gemini"], default="gemini",
                         help="AI provider: gemini (direct Google API, default) or openrouter")
     parser.add_argument("--gtts", dest="gtts", action="store_true",
@@ -258,6 +320,28 @@ Examples:
                         help="Disable voice output in assistant-text mode")
     parser.add_argument("--lang", choices=["auto", "en", "vi"], default="auto",
                         help="Voice input language for assistant mode")
+    parser.add_argument("--stream", action="store_true",
+                        help="Assistant mode: speak each sentence while the AI is still answering")
+    parser.add_argument("--fallback-models", type=str, default=None,
+                        help="Comma-separated models to hedge/fail over to, or 'default' for the built-in chain")
+    parser.add_argument("--hedge-after", type=float, default=HEDGE_AFTER_S,
+                        help="Seconds to wait for the first token before also trying the next model")
+    
+    parser.add_argument("--speculative", action="store_true",
+                        help="Voice/assistant modes: recognize while you speak and start translating / "
+                             "answering on the stable part of the transcript")
+    # Transcribe options
+    parser.add_argument("--audio", nargs="+", default=None,
+                        help="Transcribe mode: WAV/FLAC files or directories (language from --language-in)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Transcribe mode: worker processes (default: CPU count, at least 4)")
+    parser.add_argument("--translate", action="store_true",
+                        help="Transcribe mode: add a Vietnamese translation under each segment")
+    parser.add_argument("--output-dir", type=str, default=None,
+                        help="Transcribe mode: also write <recording>.txt transcripts here")
+    
+    parser.add_argument("--stt-backend", choices=list(STT_BACKENDS), default=None,
+                        help="Speech recognition engine: google (online, default), sphinx or vosk (offline)")
     
     # Microphone options
     parser.add_argument("--mic-index", type=int, default=None, 
@@ -278,6 +362,9 @@ Examples:
 
 if __name__ == "__main__":
     args = parse_args()
+    fallback_models = args.fallback_models.split(",") if args.fallback_models else None
+    if args.stt_backend:
+        set_default_backend(args.stt_backend)
 
     # Utility commands
     if args.list_mics:
@@ -293,6 +380,7 @@ if __name__ == "__main__":
             tts_rate=args.tts_rate,
             loop=args.loop,
             language_in=args.language_in,
+            speculative=args.speculative,
         )
     
     elif args.mode == "text":
@@ -309,6 +397,11 @@ if __name__ == "__main__":
             use_gtts=args.gtts,
             input_language=args.lang,
             provider=args.provider,
+            stream_output=args.stream,
+            fallback_models=fallback_models,
+            hedge_after_s=args.hedge_after,
+            quality=args.quality,
+            speculative=args.speculative,
         )
     
     elif args.mode == "assistant-text":
@@ -317,7 +410,22 @@ if __name__ == "__main__":
             use_gtts=args.gtts,
             speak_output=not args.no_speak,
             provider=args.provider,
+            fallback_models=fallback_models,
+            hedge_after_s=args.hedge_after,
+            quality=args.quality,
         )
     
     elif args.mode == "chat":
         run_openrouter_chat(model=args.model, provider=args.provider)
+    
+    elif args.mode == "transcribe":
+        if not args.audio:
+            print("[Main] --mode transcribe needs --audio FILE_OR_DIR ...")
+        else:
+            run_transcribe(
+                paths=args.audio,
+                language=args.language_in,
+                workers=args.workers,
+                translate=args.translate,
+                output_dir=args.output_dir,
+            )
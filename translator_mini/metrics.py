@@ -0,0 +1,353 @@
+"""
+Per-request usage and latency accounting for the LLM clients.
+
+Every chat request (OpenRouter, Gemini; sync, async, streaming) produces one
+RequestRecord: connect time, time-to-first-byte, time-to-first-token,
+total time, prompt/completion tokens, cost (when the provider reports it),
+model id and outcome. Records go into an in-process registry with latency
+histograms per (provider, model), and optionally to a JSONL file.
+
+    from translator_mini.metrics import get_registry
+    get_registry().summary(provider="openrouter")
+
+Set TRANSLATOR_MINI_METRICS_FILE=/path/metrics.jsonl to log every request,
+then compare models offline:
+
+    python -m translator_mini.metrics /path/metrics.jsonl
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Outcomes
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+RATE_LIMITED = "rate_limited"
+CIRCUIT_OPEN = "circuit_open"
+CANCELLED = "cancelled"
+
+LATENCY_METRICS = ("connect_ms", "ttfb_ms", "ttft_ms", "total_ms")
+
+# Histogram upper bounds in ms (last bucket is open-ended)
+DEFAULT_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 750, 1000, 1500, 2500,
+                     4000, 6000, 10000, 20000, 60000)
+
+
+@dataclass
+class RequestRecord:
+    provider: str
+    model: str
+    outcome: str = OK
+    stream: bool = False
+    started_at: float = field(default_factory=time.time)  # wall clock, for logs
+    connect_ms: Optional[float] = None  # 0.0 = reused pooled connection
+    ttfb_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    tokens_estimated: bool = False
+    cost: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (ms) with percentile estimates."""
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        for v in (other.min, other.max):
+            if v is not None:
+                self.min = v if self.min is None else min(self.min, v)
+                self.max = v if self.max is None else max(self.max, v)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimate the q-th percentile (0-100), interpolating inside a bucket."""
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lo = self.bounds[i - 1] if i > 0 else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.max
+                lo, hi = max(lo, self.min), min(hi, self.max)
+                return lo + (hi - lo) * ((rank - seen) / c)
+            seen += c
+        return self.max
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class _ModelStats:
+    def __init__(self):
+        self.histograms = {name: Histogram() for name in LATENCY_METRICS}
+        self.outcomes: Dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+    def add(self, rec: RequestRecord) -> None:
+        self.outcomes[rec.outcome] = self.outcomes.get(rec.outcome, 0) + 1
+        if rec.outcome == OK:
+            for name in LATENCY_METRICS:
+                value = getattr(rec, name)
+                if value is not None:
+                    self.histograms[name].add(value)
+        self.prompt_tokens += rec.prompt_tokens or 0
+        self.completion_tokens += rec.completion_tokens or 0
+        self.cost += rec.cost or 0.0
+
+
+class MetricsRegistry:
+    """Thread-safe store of request records, aggregated per (provider, model)."""
+
+    def __init__(self, keep_recent: int = 500):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _ModelStats] = {}
+        self._recent: Deque[RequestRecord] = deque(maxlen=keep_recent)
+        self._sinks: List[Callable[[RequestRecord], None]] = []
+
+    def add_sink(self, sink: Callable[[RequestRecord], None]) -> None:
+        """Call sink(record) for every new record (JSONL writer, router, ...)."""
+        with self._lock:
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink: Callable[[RequestRecord], None]) -> None:
+        with self._lock:
+            if sink in self._sinks:
+                self._sinks.remove(sink)
+
+    def record(self, rec: RequestRecord) -> None:
+        with self._lock:
+            key = (rec.provider, rec.model)
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _ModelStats()
+            stats.add(rec)
+            self._recent.append(rec)
+            sinks = list(self._sinks)
+        for sink in sinks:
+            try:
+                sink(rec)
+            except Exception as e:
+                print(f"[Metrics] Sink error: {e}")
+
+    def models(self, provider: Optional[str] = None) -> List[Tuple[str, str]]:
+        with self._lock:
+            return [k for k in self._stats if provider is None or k[0] == provider]
+
+    def recent(self, n: int = 50) -> List[RequestRecord]:
+        with self._lock:
+            return list(self._recent)[-n:]
+
+    def histogram(self, metric: str = "total_ms", provider: Optional[str] = None,
+                  model: Optional[str] = None) -> Histogram:
+        """Merged histogram of successful requests matching the filters."""
+        merged = Histogram()
+        with self._lock:
+            for (p, m), stats in self._stats.items():
+                if (provider is None or p == provider) and (model is None or m == model):
+                    merged.merge(stats.histograms[metric])
+        return merged
+
+    def summary(self, provider: Optional[str] = None,
+                model: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Per "provider/model": latency stats, outcome counts, tokens, cost."""
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (p, m), stats in self._stats.items():
+                if (provider is not None and p != provider) or (model is not None and m != model):
+                    continue
+                requests = sum(stats.outcomes.values())
+                # Requests we abandoned ourselves (hedge losers) are not failures
+                finished = requests - stats.outcomes.get(CANCELLED, 0)
+                out[f"{p}/{m}"] = {
+                    "requests": requests,
+                    "error_rate": 1.0 - stats.outcomes.get(OK, 0) / finished if finished else 0.0,
+                    "outcomes": dict(stats.outcomes),
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost": stats.cost,
+                    **{name: stats.histograms[name].stats() for name in LATENCY_METRICS},
+                }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._recent.clear()
+
+
+class JsonlSink:
+    """Append each record as one JSON line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def __call__(self, rec: RequestRecord) -> None:
+        line = json.dumps(rec.to_dict(), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_jsonl(path: str) -> Iterable[RequestRecord]:
+    """Read records written by JsonlSink."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield RequestRecord(**json.loads(line))
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    """Process-wide registry (adds a JsonlSink if TRANSLATOR_MINI_METRICS_FILE is set)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = MetricsRegistry()
+                path = os.getenv("TRANSLATOR_MINI_METRICS_FILE")
+                if path:
+                    try:
+                        registry.add_sink(JsonlSink(path))
+                    except OSError as e:
+                        print(f"[Metrics] Cannot write {path}: {e}")
+                _registry = registry
+    return _registry
+
+
+# ==============================================================================
+# REQUEST TIMER (used by the clients)
+# ==============================================================================
+
+class RequestTimer:
+    """
+    Times one logical request (retries included) and records it once.
+
+        timer = RequestTimer("openrouter", model_id, stream=True)
+        ... timer.first_byte() ... timer.first_token() ...
+        timer.finish(OK, prompt_tokens=..., completion_tokens=...)
+    """
+
+    def __init__(self, provider: str, model: str, stream: bool = False,
+                 registry: Optional[MetricsRegistry] = None):
+        self.record = RequestRecord(provider=provider, model=model, stream=stream)
+        self._registry = registry
+        self._start = time.perf_counter()
+        self._done = False
+
+    def _elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000.0
+
+    def first_byte(self) -> None:
+        if self.record.ttfb_ms is None:
+            self.record.ttfb_ms = self._elapsed_ms()
+
+    def first_token(self) -> None:
+        if self.record.ttft_ms is None:
+            self.record.ttft_ms = self._elapsed_ms()
+
+    def finish(self, outcome: str = OK, prompt_tokens: Optional[int] = None,
+               completion_tokens: Optional[int] = None, cost: Optional[float] = None,
+               error: Optional[str] = None, connect_ms: Optional[float] = None,
+               tokens_estimated: bool = False) -> Optional[RequestRecord]:
+        """Record the request (only the first call counts)."""
+        if self._done:
+            return None
+        self._done = True
+        rec = self.record
+        rec.total_ms = self._elapsed_ms()
+        rec.outcome = outcome
+        rec.prompt_tokens = prompt_tokens
+        rec.completion_tokens = completion_tokens
+        rec.tokens_estimated = tokens_estimated
+        rec.cost = cost
+        rec.error = error
+        if connect_ms is not None:
+            rec.connect_ms = connect_ms
+        (self._registry or get_registry()).record(rec)
+        return rec
+
+
+# ==============================================================================
+# CLI: summarize a JSONL file
+# ==============================================================================
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:8.0f}" if value is not None else "       -"
+
+
+def print_summary(registry: MetricsRegistry) -> None:
+    summary = registry.summary()
+    if not summary:
+        print("[Metrics] No requests recorded.")
+        return
+    print(f"{'provider/model':48} {'reqs':>5} {'err%':>5} "
+          f"{'ttft p50':>8} {'ttft p90':>8} {'total p50':>9} {'total p90':>9} {'tokens':>8} {'cost':>8}")
+    for name, s in sorted(summary.items(), key=lambda kv: kv[1]["total_ms"]["p50"] or float("inf")):
+        ttft = s["ttft_ms"] if s["ttft_ms"]["count"] else s["ttfb_ms"]
+        print(f"{name[:48]:48} {s['requests']:5d} {s['error_rate'] * 100:5.1f} "
+              f"{_fmt(ttft['p50'])} {_fmt(ttft['p90'])} "
+              f"{_fmt(s['total_ms']['p50'])} {_fmt(s['total_ms']['p90'])} "
+              f" {s['prompt_tokens'] + s['completion_tokens']:8d} {s['cost']:8.4f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize a metrics JSONL file per model")
+    parser.add_argument("path", help="File written via TRANSLATOR_MINI_METRICS_FILE")
+    args = parser.parse_args()
+
+    offline = MetricsRegistry()
+    for record in load_jsonl(args.path):
+        offline.record(record)
+    print_summary(offline)
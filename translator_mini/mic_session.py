@@ -0,0 +1,379 @@
+"""
+Long-lived microphone capture session for the voice loops.
+
+speech_to_text.listen_and_recognize() used to open the PyAudio stream and
+spend 0.6 s on ambient-noise calibration every turn. A MicSession keeps the
+input stream open for the whole conversation:
+
+- A reader thread drains the stream continuously, so nothing overflows
+  while the assistant is thinking or speaking.
+- The energy threshold keeps adapting in the background on non-speech
+  audio (same asymmetric average as SpeechRecognition's dynamic threshold).
+- The calibration is saved per device in the cache dir, so the next run
+  starts with a good threshold instead of calibrating again.
+- A pre-roll ring buffer keeps the last moments before speech is detected,
+  so the first syllable is not clipped. It only holds audio heard since
+  listen() was called, never the tail of the assistant's own reply.
+- With NumPy, the end of a phrase is found by the VAD in vad.py (~300 ms
+  after the last speech frame, and noise that only looked loud is dropped)
+  instead of waiting for 0.8 s below the energy threshold.
+"""
+
+import collections
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import speech_recognition as sr
+
+from translator_mini import audio_codec, vad
+from translator_mini.translation_cache import default_cache_dir
+
+CALIBRATION_FILE = "mic_calibration.json"
+
+DEFAULT_ENERGY_THRESHOLD = 300.0
+CALIBRATION_S = 0.5          # first run on a device only
+PRE_ROLL_S = 0.5             # audio kept from before the speech onset
+PAUSE_THRESHOLD_S = 0.8      # silence that ends a phrase
+PHRASE_THRESHOLD_S = 0.3     # shorter bursts are clicks/pops, not speech
+TRAILING_SILENCE_S = 0.5     # silence kept after the phrase
+ADJUSTMENT_DAMPING = 0.15
+ENERGY_RATIO = 1.5
+
+# (audio chunk, RMS energy)
+Chunk = Tuple[bytes, int]
+
+
+def _calibration_path() -> str:
+    return os.path.join(default_cache_dir(), CALIBRATION_FILE)
+
+
+def load_calibrations(path: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    try:
+        with open(path or _calibration_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_calibration(device_key: str, energy_threshold: float, path: Optional[str] = None) -> None:
+    """Store one device's threshold (best effort; a read-only cache dir is fine)."""
+    path = path or _calibration_path()
+    data = load_calibrations(path)
+    data[device_key] = {"energy_threshold": round(energy_threshold, 1), "updated_at": time.time()}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[STT] Could not save mic calibration: {e}")
+
+
+def _device_key(mic_index: Optional[int], sample_rate: int) -> str:
+    name = "default"
+    if mic_index is not None:
+        try:
+            name = sr.Microphone.list_microphone_names()[mic_index]
+        except Exception:
+            name = f"device-{mic_index}"
+    return f"{name}@{sample_rate}"
+
+
+class MicSession:
+    """
+    Open microphone + background reader; listen() returns one phrase.
+
+        with MicSession(mic_index) as mic:
+            while True:
+                audio = mic.listen(timeout=8, phrase_time_limit=15)
+                ...
+
+    `source` may be any open-able sr.AudioSource (e.g. sr.AudioFile for
+    tests); by default an sr.Microphone for mic_index is used.
+    """
+
+    def __init__(
+        self,
+        mic_index: Optional[int] = None,
+        energy_threshold: Optional[float] = None,
+        dynamic_energy: bool = True,
+        pre_roll_s: float = PRE_ROLL_S,
+        pause_threshold_s: float = PAUSE_THRESHOLD_S,
+        calibration_file: Optional[str] = None,
+        source: Optional[sr.AudioSource] = None,
+        use_vad: bool = True,
+    ):
+        self.mic_index = mic_index
+        self.dynamic_energy = dynamic_energy
+        self.pre_roll_s = pre_roll_s
+        self.pause_threshold_s = pause_threshold_s
+        self.calibration_file = calibration_file
+        self.use_vad = use_vad and vad.NUMPY_AVAILABLE
+        self.energy_threshold = energy_threshold or DEFAULT_ENERGY_THRESHOLD
+        self._fixed_threshold = energy_threshold is not None
+        self._source = source
+        self._device_key: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._pre_roll_chunks = 1
+        self._queue: Optional["queue.Queue[Optional[Chunk]]"] = None
+        self._calibrated = threading.Event()
+        self._calibration_left = 0.0
+        self._reader: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._eof = False
+        self.seconds_per_buffer = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._reader is not None and self._reader.is_alive()
+
+    @property
+    def sample_rate(self) -> Optional[int]:
+        """Rate of the captured audio (None until the source is opened)."""
+        return self._source.SAMPLE_RATE if self.seconds_per_buffer else None
+
+    @property
+    def sample_width(self) -> Optional[int]:
+        return self._source.SAMPLE_WIDTH if self.seconds_per_buffer else None
+
+    def start(self) -> "MicSession":
+        """Open the stream and start the reader thread (raises if the mic can't open)."""
+        if self.running:
+            return self
+        if self._source is None:
+            mic_kwargs = {"device_index": self.mic_index} if self.mic_index is not None else {}
+            self._source = sr.Microphone(**mic_kwargs)
+        self._source.__enter__()
+        source = self._source
+        self.seconds_per_buffer = float(source.CHUNK) / source.SAMPLE_RATE
+        self._pre_roll_chunks = max(1, int(self.pre_roll_s / self.seconds_per_buffer))
+
+        if self._fixed_threshold:
+            self._calibrated.set()
+        else:
+            self._device_key = _device_key(self.mic_index, source.SAMPLE_RATE)
+            saved = load_calibrations(self.calibration_file).get(self._device_key)
+            if saved:
+                self.energy_threshold = float(saved["energy_threshold"])
+                self._calibrated.set()
+                print(f"[STT] Mic calibration loaded ({self.energy_threshold:.0f})")
+            else:
+                # First run on this device: calibrate from the reader's first chunks
+                self._calibration_left = CALIBRATION_S
+                print("[STT] Calibrating for ambient noise (first run on this mic)…")
+
+        self._stop.clear()
+        self._eof = False
+        self._reader = threading.Thread(target=self._read_loop, name="mic-reader", daemon=True)
+        self._reader.start()
+        return self
+
+    def close(self) -> None:
+        """Stop the reader, close the stream and save the current calibration."""
+        if self._reader is None:
+            return
+        self._stop.set()
+        self._reader.join(timeout=1.0)
+        self._reader = None
+        try:
+            self._source.__exit__(None, None, None)
+        except Exception:
+            pass
+        if self._device_key and self._calibrated.is_set():
+            save_calibration(self._device_key, self.energy_threshold, self.calibration_file)
+
+    def __enter__(self) -> "MicSession":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Reader thread
+    # ------------------------------------------------------------------
+
+    def _adapt(self, energy: int) -> None:
+        damping = ADJUSTMENT_DAMPING ** self.seconds_per_buffer
+        self.energy_threshold = self.energy_threshold * damping + energy * ENERGY_RATIO * (1 - damping)
+
+    def _read_loop(self) -> None:
+        source = self._source
+        while not self._stop.is_set():
+            try:
+                data = source.stream.read(source.CHUNK)
+            except Exception as e:
+                print(f"[STT] Microphone read error: {e}")
+                data = b""
+            if not data:
+                break
+            energy = audio_codec.rms(data, source.SAMPLE_WIDTH)
+            with self._lock:
+                if self._calibration_left > 0:
+                    self._adapt(energy)
+                    self._calibration_left -= self.seconds_per_buffer
+                    if self._calibration_left <= 0:
+                        self._calibrated.set()
+                        save_calibration(self._device_key, self.energy_threshold, self.calibration_file)
+                elif self.dynamic_energy and not self._fixed_threshold and energy <= self.energy_threshold:
+                    # Learn from background noise only, never from speech/playback
+                    self._adapt(energy)
+                if self._queue is not None:
+                    self._queue.put((data, energy))
+        with self._lock:
+            self._eof = True
+            self._calibrated.set()
+            if self._queue is not None:
+                self._queue.put(None)
+
+    def _raise_threshold(self, frames: List[Chunk]) -> None:
+        """
+        After loud audio turned out not to be speech: lift a dynamic
+        threshold above it, so steady noise (fan, AC) stops starting phrases.
+        """
+        if not self.dynamic_energy or self._fixed_threshold or not frames:
+            return
+        energies = sorted(energy for _, energy in frames)
+        noise = energies[len(energies) // 2]
+        with self._lock:
+            if noise * ENERGY_RATIO > self.energy_threshold:
+                self.energy_threshold = noise * ENERGY_RATIO
+                print(f"[STT] Noise is not speech, energy threshold raised to {self.energy_threshold:.0f}")
+
+    # ------------------------------------------------------------------
+    # Phrase capture
+    # ------------------------------------------------------------------
+
+    def listen(self, timeout: Optional[float] = None,
+               phrase_time_limit: Optional[float] = None,
+               on_chunk: Optional[Callable[[bytes, bool], None]] = None) -> sr.AudioData:
+        """
+        Wait for a phrase and return it as AudioData.
+
+        on_chunk(data, start) sees the phrase while it is being recorded:
+        start=True with the pre-roll when speech begins (again if that turns
+        out to be a click and a new phrase starts), then every new chunk.
+
+        Raises sr.WaitTimeoutError if nothing is said within `timeout`
+        seconds (loud noise the VAD rejects doesn't count as speech) and at
+        the end of a file source.
+        """
+        if not self.running and not self._eof:
+            self.start()
+        self._calibrated.wait()
+        spb = self.seconds_per_buffer
+        pause_buffers = int(self.pause_threshold_s / spb)
+        phrase_buffers = int(PHRASE_THRESHOLD_S / spb)
+        trailing_buffers = int(TRAILING_SILENCE_S / spb)
+
+        chunks: "queue.Queue[Optional[Chunk]]" = queue.Queue()
+        # Pre-roll starts empty: audio from before this call may be our own TTS
+        pre_roll: "collections.deque[Chunk]" = collections.deque(maxlen=self._pre_roll_chunks)
+        with self._lock:
+            self._queue = chunks
+            if self._eof:
+                chunks.put(None)
+        # One deadline for the whole wait, rejected noise bursts included
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            while True:
+                # Wait for speech; keep a rolling pre-roll of the quiet before it
+                while True:
+                    remaining = deadline - time.monotonic() if deadline else None
+                    if remaining is not None and remaining <= 0:
+                        raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                    try:
+                        chunk = chunks.get(timeout=remaining)
+                    except queue.Empty:
+                        continue
+                    if chunk is None:
+                        raise sr.WaitTimeoutError("audio source ended")
+                    pre_roll.append(chunk)
+                    if chunk[1] > self.energy_threshold:
+                        break
+
+                # Record until a long enough pause or the phrase limit
+                frames: List[Chunk] = list(pre_roll)
+                if on_chunk is not None:
+                    on_chunk(b"".join(data for data, _ in frames), True)
+                endpointer = None
+                if self.use_vad:
+                    endpointer = vad.Endpointer(self._source.SAMPLE_RATE, self._source.SAMPLE_WIDTH)
+                    for data, _ in frames:
+                        endpointer.feed(data)
+                phrase_count = pause_count = 0
+                phrase_time = 0.0
+                while True:
+                    phrase_time += spb
+                    if phrase_time_limit and phrase_time > phrase_time_limit:
+                        break
+                    if chunk[1] > self.energy_threshold:
+                        pause_count = 0
+                        phrase_count += 1
+                    else:
+                        pause_count += 1
+                    if endpointer is not None and endpointer.ended:
+                        break
+                    if pause_count > pause_buffers:
+                        break
+                    chunk = chunks.get()
+                    if chunk is None:
+                        break
+                    frames.append(chunk)
+                    if endpointer is not None:
+                        endpointer.feed(chunk[0])
+                    if on_chunk is not None:
+                        on_chunk(chunk[0], False)
+
+                if endpointer is not None:
+                    # The VAD decides whether that was speech, not the energy count
+                    is_phrase = endpointer.speech_ms >= PHRASE_THRESHOLD_S * 1000
+                else:
+                    is_phrase = phrase_count >= phrase_buffers
+                if is_phrase or chunk is None or (
+                        phrase_time_limit and phrase_time > phrase_time_limit):
+                    break
+                # Just a click or steady noise: keep waiting (its audio stays in the pre-roll)
+                self._raise_threshold(frames)
+                pre_roll.extend(frames[-pre_roll.maxlen:])
+        finally:
+            with self._lock:
+                self._queue = None
+
+        # Drop silence beyond what we keep after the phrase
+        drop = max(0, pause_count - trailing_buffers)
+        if drop:
+            frames = frames[:-drop]
+        return sr.AudioData(b"".join(data for data, _ in frames),
+                            self._source.SAMPLE_RATE, self._source.SAMPLE_WIDTH)
+
+
+_sessions: Dict[Optional[int], MicSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_mic_session(mic_index: Optional[int] = None) -> MicSession:
+    """Shared, started session per microphone (raises if it can't be opened)."""
+    with _sessions_lock:
+        session = _sessions.get(mic_index)
+        if session is None or not session.running:
+            session = MicSession(mic_index).start()
+            _sessions[mic_index] = session
+        return session
+
+
+def close_mic_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,256 @@
+"""
+Offline TTS (pyttsx3) on one long-lived worker thread.
+
+speak_pyttsx3() used to set every property, scan all installed voices for
+a Vietnamese one and block in runAndWait() on whatever thread called it;
+driving one engine from different threads is what made it go silent on
+the second turn. An OfflineSpeaker instead:
+
+- creates the engine on its own thread and makes every pyttsx3 call
+  there, so the engine lives for the whole session
+- looks up the voice once per engine and only sets rate / volume / voice
+  when they change
+- takes requests from a queue and returns a Future per request, so
+  callers can queue speech without blocking (or wait on the Future)
+- supports cancellation: Future.cancel() for a request still queued,
+  stop() to cut off the current one and drop everything queued before it
+  (stop() only bumps a generation counter; the worker stops the engine
+  from its own word callback)
+- re-creates the engine after an error instead of leaving it broken, and
+  retries the request on it unless it had already started speaking
+
+    future = get_speaker().say("Xin chào", rate=140)
+    future.result()
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+import pyttsx3
+
+ENGINE_ATTEMPTS = 2          # a request is retried once on a fresh engine
+
+
+def choose_vi_voice(engine) -> Optional[str]:
+    """
+    Try to find a Vietnamese voice id from available voices.
+    Returns voice id or None if not found.
+    """
+    for v in engine.getProperty("voices"):
+        name = (v.name or "").lower()
+        vid = (v.id or "").lower()
+        langs = [str(x).lower() for x in getattr(v, "languages", [])]
+        if "vi" in vid or "vietnam" in name:
+            return v.id
+        if any("vi" in l for l in langs):
+            return v.id
+    return None
+
+
+class SpeechRequest:
+    """One queued utterance; `future` resolves to True when it was spoken."""
+
+    def __init__(self, text: str, rate: int, volume: float, prefer_vi: bool,
+                 on_start: Optional[Callable[[], None]], generation: int):
+        self.text = text
+        self.rate = rate
+        self.volume = max(0.0, min(1.0, volume))
+        self.prefer_vi = prefer_vi
+        self.on_start = on_start
+        self.generation = generation
+        self.future: "Future[bool]" = Future()
+
+
+class OfflineSpeaker:
+    """Speaks queued requests one after another with a single pyttsx3 engine."""
+
+    def __init__(self, driver_name: Optional[str] = None):
+        self.driver_name = driver_name
+        self._queue: "queue.Queue[Optional[SpeechRequest]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current: Optional[SpeechRequest] = None
+        # started-utterance fired for the current request (no retry after that)
+        self._started = False
+        self._engine = None
+        self._properties: Dict[str, object] = {}
+        self._vi_voice: Optional[str] = None
+        self._default_voice: Optional[str] = None
+        self._worker: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self) -> "OfflineSpeaker":
+        with self._lock:
+            if not self.running:
+                self._worker = threading.Thread(target=self._run, name="pyttsx3", daemon=True)
+                self._worker.start()
+        return self
+
+    def close(self) -> None:
+        """Stop speaking and end the worker (the engine goes with it)."""
+        if self._worker is None:
+            return
+        self.stop()
+        self._queue.put(None)
+        self._worker.join(timeout=2.0)
+        self._worker = None
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def say(self, text: str, rate: int = 140, volume: float = 1.0, prefer_vi: bool = True,
+            on_start: Optional[Callable[[], None]] = None) -> "Future[bool]":
+        """
+        Queue text and return immediately. The Future resolves to True once
+        it was spoken, False on an engine error or stop(); cancel() it to
+        skip it while it is still queued. on_start runs on the worker when
+        the engine starts speaking it.
+        """
+        with self._lock:
+            request = SpeechRequest(text, rate, volume, prefer_vi, on_start, self._generation)
+        if not text:
+            request.future.set_result(True)
+            return request.future
+        self.start()
+        self._queue.put(request)
+        return request.future
+
+    def stop(self) -> None:
+        """
+        Cut off the current utterance and drop everything queued so far.
+
+        Never touches the engine from this thread: the worker sees the new
+        generation at the next word boundary and calls engine.stop() from
+        inside runAndWait(), where pyttsx3 supports it.
+        """
+        with self._lock:
+            self._generation += 1
+
+    @property
+    def generation(self) -> int:
+        """Incremented by every stop(); requests queued before it are dropped."""
+        return self._generation
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None or not self._queue.empty()
+
+    # ------------------------------------------------------------------
+    # Worker thread (the only place pyttsx3 is touched)
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            request = self._queue.get()
+            if request is None:
+                self._drop_engine()
+                return
+            if request.generation < self._generation or not request.future.set_running_or_notify_cancel():
+                if not request.future.done():
+                    request.future.set_result(False)
+                continue
+            with self._lock:
+                self._current = request
+            try:
+                ok = self._speak(request)
+            finally:
+                with self._lock:
+                    self._current = None
+            request.future.set_result(ok and request.generation == self._generation)
+
+    def _speak(self, request: SpeechRequest) -> bool:
+        self._started = False
+        for _ in range(ENGINE_ATTEMPTS):
+            try:
+                engine = self._get_engine()
+                self._configure(engine, request)
+                engine.say(request.text)
+                engine.runAndWait()
+                return True
+            except Exception as e:
+                print(f"[TTS] pyttsx3 error: {e}")
+                # Start over with a fresh engine (and a fresh voice lookup)
+                self._drop_engine()
+                # Retrying would repeat what the listener already heard
+                if self._started or request.generation < self._generation:
+                    return False
+        return False
+
+    def _get_engine(self):
+        if self._engine is None:
+            started = time.perf_counter()
+            engine = pyttsx3.init(self.driver_name)
+            engine.connect("started-utterance", self._on_started)
+            engine.connect("started-word", self._on_word)
+            self._engine = engine
+            self._properties = {}
+            self._default_voice = engine.getProperty("voice")
+            self._vi_voice = choose_vi_voice(engine)
+            print(f"[TTS] pyttsx3 ready in {(time.perf_counter() - started) * 1000:.0f} ms "
+                  f"(Vietnamese voice: {self._vi_voice or 'none'})")
+        return self._engine
+
+    def _drop_engine(self) -> None:
+        engine, self._engine = self._engine, None
+        if engine is None:
+            return
+        try:
+            engine.stop()
+        except Exception:
+            pass
+
+    def _configure(self, engine, request: SpeechRequest) -> None:
+        """Set only the properties that differ from the last request."""
+        voice = self._vi_voice if request.prefer_vi and self._vi_voice else self._default_voice
+        for name, value in (("rate", request.rate), ("volume", request.volume), ("voice", voice)):
+            if value is not None and self._properties.get(name) != value:
+                engine.setProperty(name, value)
+                self._properties[name] = value
+
+    def _on_started(self, name=None) -> None:
+        self._started = True
+        request = self._current
+        if request is not None and request.on_start:
+            try:
+                request.on_start()
+            except Exception as e:
+                # The caller's bug; the utterance itself goes on
+                print(f"[TTS] on_start callback failed: {e!r}")
+
+    def _on_word(self, name=None, location=None, length=None) -> None:
+        """Runs on the worker inside runAndWait(): honour stop() here."""
+        request = self._current
+        if request is not None and request.generation < self._generation and self._engine is not None:
+            self._engine.stop()
+
+
+_speaker: Optional[OfflineSpeaker] = None
+_speaker_lock = threading.Lock()
+
+
+def get_speaker() -> OfflineSpeaker:
+    """Shared speaker (the engine is created with the first request)."""
+    global _speaker
+    with _speaker_lock:
+        if _speaker is None:
+            _speaker = OfflineSpeaker()
+        return _speaker
+
+
+def close_speaker() -> None:
+    global _speaker
+    with _speaker_lock:
+        if _speaker is not None:
+            _speaker.close()
+            _speaker = None
@@ -4,9 +4,39 @@ Supports multiple AI models (GPT-4, Claude, Llama, Gemini, etc.)
 """
 
 import os
+import re
 import json
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from typing import Optional, Generator, Dict, Any, List
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from typing import Optional, Generator, AsyncGenerator, Callable, Dict, Any, List, Tuple
+
+from translator_mini import metrics, resilience
+from translator_mini.concurrency import limiter
+from translator_mini.hedging import HEDGE_AFTER_S, hedged_stream, on_cancel
+from translator_mini.history import (
+    DEFAULT_MAX_CONTEXT_TOKENS,
+    ConversationHistory,
+    estimate_tokens,
+    summary_messages,
+)
+from translator_mini.resilience import CircuitOpenError, RateLimitedError, TransientError
+from translator_mini.router import AUTO_MODEL, PROBE_MESSAGES, ModelRouter, get_router
+from translator_mini.sse import aiter_sse, iter_sse
+from translator_mini.translation_cache import get_cache
+
+# aiohttp is optional: without it the async API falls back to worker threads
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
 
 # ==============================================================================
 # AVAILABLE MODELS (OpenRouter.ai)
@@ -32,6 +62,15 @@ MODELS = {
 
 API_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
 
+# Ordered fallback chain for hedged requests (see hedging.py)
+FALLBACK_MODELS = ["free", "gemma-free", "qwen-free"]
+
+# Small/cheap model that folds old turns into the history summary
+SUMMARY_MODEL = "free"
+
+DEFAULT_SITE_URL = "http://localhost:3000"
+DEFAULT_SITE_NAME = "Chatbot Translator Mini"
+
 # ==============================================================================
 # API KEY MANAGEMENT
 # ==============================================================================
@@ -69,18 +108,359 @@ def set_api_key(api_key: str, key_file: str = "api_key.txt") -> None:
     print(f"[OpenRouter] API key saved to {key_path}")
 
 
+# ==============================================================================
+# SHARED HTTP CLIENT (keep-alive pool + cached credentials)
+# ==============================================================================
+
+# Time spent opening new connections (DNS + TCP + TLS) on this thread since
+# the last reset; stays 0 when the request reuses a pooled connection.
+_connect_timing = threading.local()
+
+
+def _reset_connect_ms() -> None:
+    _connect_timing.ms = 0.0
+
+
+def _connect_ms() -> float:
+    return getattr(_connect_timing, "ms", 0.0)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.ms = _connect_ms() + (time.perf_counter() - start) * 1000.0
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.ms = _connect_ms() + (time.perf_counter() - start) * 1000.0
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report their connect time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class OpenRouterClient:
+    """
+    Long-lived OpenRouter client.
+
+    - One requests.Session with a keep-alive connection pool, so DNS, TCP
+      and TLS setup are paid once instead of on every turn.
+    - API key is cached and only re-read when api_key.txt changes on disk.
+    - warm_up() opens the pooled connection ahead of the first real request.
+    - Separate connect/read timeouts: an unreachable host fails in seconds,
+      not after the full read timeout.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        key_file: str = "api_key.txt",
+        pool_maxsize: int = 4,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        site_url: str = DEFAULT_SITE_URL,
+        site_name: str = DEFAULT_SITE_NAME,
+    ):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.key_path = os.path.join(script_dir, key_file)
+
+        self.session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "HTTP-Referer": site_url,
+            "X-Title": site_name,
+        })
+
+        self._key_lock = threading.Lock()
+        self._key_stamp: Optional[Tuple[int, int]] = None
+        self._file_key: Optional[str] = None
+        self._warm_thread: Optional[threading.Thread] = None
+
+    def get_api_key(self) -> Optional[str]:
+        """
+        Same priority as get_api_key() (api_key.txt > OPENROUTER_API_KEY),
+        but the file is only read again when its mtime/size changes.
+        """
+        try:
+            st = os.stat(self.key_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+
+        with self._key_lock:
+            if stamp != self._key_stamp:
+                self._file_key = None
+                if stamp is not None:
+                    try:
+                        with open(self.key_path, "r", encoding="utf-8") as f:
+                            key = f.read().strip()
+                        if key and not key.startswith("#"):
+                            self._file_key = key
+                    except OSError:
+                        pass
+                self._key_stamp = stamp
+            if self._file_key:
+                return self._file_key
+
+        return os.getenv("OPENROUTER_API_KEY") or None
+
+    def post(
+        self,
+        payload: Dict[str, Any],
+        api_key: str,
+        stream: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+        on_headers: Optional[Callable[[], None]] = None,
+    ) -> requests.Response:
+        """
+        POST a chat completion payload over the pooled session.
+
+        on_headers() is called as soon as the response headers arrive,
+        before the body is read (used for time-to-first-byte).
+        """
+        req_headers = {"Authorization": f"Bearer {api_key}"}
+        if headers:
+            req_headers.update(headers)
+        hooks = {"response": lambda r, *args, **kwargs: on_headers()} if on_headers else None
+        return self.session.post(
+            self.base_url,
+            headers=req_headers,
+            json=payload,
+            stream=stream,
+            timeout=self.timeout,
+            hooks=hooks,
+        )
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Open (and keep) a connection to the API host before the first turn.
+
+        A HEAD request is enough to finish DNS + TCP + TLS; the status code
+        does not matter, only that the connection goes back into the pool.
+        With background=True this returns immediately with the worker thread.
+        """
+        if background:
+            if self._warm_thread is not None and self._warm_thread.is_alive():
+                return self._warm_thread
+            self._warm_thread = threading.Thread(
+                target=self._warm_up, name="openrouter-warmup", daemon=True
+            )
+            self._warm_thread.start()
+            return self._warm_thread
+
+        self._warm_up()
+        return None
+
+    def _warm_up(self) -> None:
+        try:
+            self.session.head(self.base_url, timeout=(self.timeout[0], 10.0))
+        except requests.exceptions.RequestException as e:
+            print(f"[OpenRouter] Warm-up failed: {e}")
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+
+_default_client: Optional[OpenRouterClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> OpenRouterClient:
+    """Return the process-wide shared OpenRouterClient (created on first use)."""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = OpenRouterClient()
+    return _default_client
+
+
+def warm_up(background: bool = True) -> Optional[threading.Thread]:
+    """Pre-open the shared client's connection (see OpenRouterClient.warm_up)."""
+    return get_client().warm_up(background=background)
+
+
 # ==============================================================================
 # CORE API FUNCTIONS
 # ==============================================================================
 
+def _build_payload(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    """Build the chat completions request body (resolves model aliases)."""
+    payload = {
+        "model": MODELS.get(model, model),
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        # Ask for token counts + cost in the response (last event when streaming)
+        "usage": {"include": True},
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def _parse_completion(data: Dict[str, Any]) -> Optional[str]:
+    """Extract the reply text from a chat completions response body."""
+    if "error" in data:
+        print(f"[OpenRouter] API Error: {data['error']}")
+        return None
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    return content.strip()
+
+
+def _check_response(response: requests.Response) -> None:
+    """Map HTTP status to resilience errors (429 → rate limited, 5xx → transient)."""
+    if response.status_code == 429:
+        retry_after = resilience.parse_retry_after(response.headers.get("Retry-After"))
+        response.close()
+        raise RateLimitedError("429 Too Many Requests from OpenRouter", retry_after=retry_after)
+    if response.status_code >= 500:
+        response.close()
+        raise TransientError(f"{response.status_code} from OpenRouter")
+    response.raise_for_status()
+
+
+def _send(client: "OpenRouterClient", payload: Dict[str, Any], key: str,
+          stream: bool = False, headers: Optional[Dict[str, str]] = None,
+          on_headers: Optional[Callable[[], None]] = None) -> requests.Response:
+    """POST through the resilience layer (rate limit, retry, circuit breaker)."""
+    def attempt() -> requests.Response:
+        try:
+            response = client.post(payload, api_key=key, stream=stream, headers=headers,
+                                   on_headers=on_headers)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            raise TransientError(str(e)) from e
+        _check_response(response)
+        if not stream:
+            try:
+                _check_body(response.json())
+            except ValueError:
+                pass
+        return response
+
+    return resilience.call("openrouter", attempt, key=key, scope=payload["model"])
+
+
+def _check_body(data: Any) -> None:
+    """Free models sometimes report throttling / outages inside a 200 body."""
+    error = data.get("error") if isinstance(data, dict) else None
+    if isinstance(error, dict):
+        code = error.get("code")
+        if code == 429:
+            raise RateLimitedError(f"OpenRouter: {error.get('message', 'rate limited')}")
+        if isinstance(code, int) and code >= 500:
+            raise TransientError(f"OpenRouter: {error.get('message', code)}")
+
+
+def _parse_stream_data(data: str) -> Optional[str]:
+    """Extract delta text from one SSE `data:` payload (None if nothing usable)."""
+    try:
+        chunk = json.loads(data)
+    except json.JSONDecodeError:
+        return None
+    delta = chunk.get("choices", [{}])[0].get("delta", {})
+    return delta.get("content", "") or None
+
+
+def _stream_usage(data: str) -> Optional[Dict[str, Any]]:
+    """`usage` block of an SSE payload, if it has one (normally only the last)."""
+    if '"usage"' not in data:
+        return None
+    try:
+        usage = json.loads(data).get("usage")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    return usage if isinstance(usage, dict) else None
+
+
+def _outcome(exc: BaseException) -> str:
+    """Metrics outcome for an exception raised by a request."""
+    if isinstance(exc, CircuitOpenError):
+        return metrics.CIRCUIT_OPEN
+    if isinstance(exc, RateLimitedError):
+        return metrics.RATE_LIMITED
+    timeouts = (requests.exceptions.Timeout, asyncio.TimeoutError)
+    if isinstance(exc, timeouts) or isinstance(exc.__cause__, timeouts):
+        return metrics.TIMEOUT
+    return metrics.ERROR
+
+
+def _async_outcome(exc: BaseException) -> str:
+    """Metrics outcome for an aiohttp error (429 counts as rate limited)."""
+    if AIOHTTP_AVAILABLE and isinstance(exc, aiohttp.ClientResponseError) and exc.status == 429:
+        return metrics.RATE_LIMITED
+    return _outcome(exc)
+
+
+def _finish_metrics(
+    timer: metrics.RequestTimer,
+    messages: List[Dict[str, str]],
+    text: Optional[str],
+    usage: Optional[Dict[str, Any]],
+    outcome: str = metrics.OK,
+    error: Optional[str] = None,
+    connect_ms: Optional[float] = None,
+) -> None:
+    """Record a finished request; token counts are estimated if the API sent none."""
+    if usage:
+        timer.finish(outcome, usage.get("prompt_tokens"), usage.get("completion_tokens"),
+                     cost=usage.get("cost"), error=error, connect_ms=connect_ms)
+        return
+    timer.finish(
+        outcome,
+        prompt_tokens=sum(estimate_tokens(m.get("content", "")) for m in messages),
+        completion_tokens=estimate_tokens(text) if text else 0,
+        error=error,
+        connect_ms=connect_ms,
+        tokens_estimated=True,
+    )
+
+
 def chat_completion(
     messages: List[Dict[str, str]],
     model: str = "openai/gpt-oss-120b:free",
     api_key: Optional[str] = None,
     temperature: float = 0.7,
     max_tokens: int = 1024,
-    site_url: str = "http://localhost:3000",
-    site_name: str = "Chatbot Translator Mini"
+    site_url: str = DEFAULT_SITE_URL,
+    site_name: str = DEFAULT_SITE_NAME,
+    client: Optional[OpenRouterClient] = None,
 ) -> Optional[str]:
     """
     Send chat completion request to OpenRouter API.
@@ -88,62 +468,62 @@ def chat_completion(
     Args:
         messages: List of message dicts with 'role' and 'content'
         model: Model name or alias from MODELS dict
-        api_key: API key (will use get_api_key() if not provided)
+        api_key: API key (will use the client's cached key if not provided)
         temperature: Creativity (0.0-2.0)
         max_tokens: Max response length
         site_url: Your app URL (for OpenRouter tracking)
         site_name: Your app name
+        client: OpenRouterClient to send through (default: shared get_client())
     
     Returns:
         Response text or None on error
     """
+    client = client or get_client()
+
     # Get API key
-    key = api_key or get_api_key()
+    key = api_key or client.get_api_key()
     if not key:
         print("[OpenRouter] ERROR: No API key found!")
         print("  → Create api_key.txt with your key, or set OPENROUTER_API_KEY env var")
         return None
     
-    # Resolve model alias
-    model_id = MODELS.get(model, model)
-    
     headers = {
-        "Authorization": f"Bearer {key}",
-        "Content-Type": "application/json",
         "HTTP-Referer": site_url,
         "X-Title": site_name,
     }
     
-    payload = {
-        "model": model_id,
-        "messages": messages,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-    }
+    payload = _build_payload(messages, model, temperature, max_tokens)
+    timer = metrics.RequestTimer("openrouter", payload["model"])
+    _reset_connect_ms()
     
     try:
-        response = requests.post(API_BASE_URL, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        
+        response = _send(client, payload, key, headers=headers, on_headers=timer.first_byte)
         data = response.json()
+        text = _parse_completion(data)
+        _finish_metrics(timer, messages, text, data.get("usage"),
+                        metrics.OK if text is not None else metrics.ERROR,
+                        error=None if text is not None else str(data.get("error")),
+                        connect_ms=_connect_ms())
+        return text
         
-        if "error" in data:
-            print(f"[OpenRouter] API Error: {data['error']}")
-            return None
-        
-        # Extract response text
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        return content.strip()
-        
-    except requests.exceptions.Timeout:
-        print("[OpenRouter] Request timed out")
-        return None
+    except CircuitOpenError as e:
+        print(f"[OpenRouter] {e}")
+        error: Exception = e
+    except RateLimitedError as e:
+        print(f"[OpenRouter] Rate limited, giving up: {e}")
+        error = e
+    except TransientError as e:
+        print(f"[OpenRouter] Request failed after retries: {e}")
+        error = e
     except requests.exceptions.RequestException as e:
         print(f"[OpenRouter] Request error: {e}")
-        return None
-    except json.JSONDecodeError:
+        error = e
+    except json.JSONDecodeError as e:
         print("[OpenRouter] Invalid JSON response")
-        return None
+        error = e
+    _finish_metrics(timer, messages, None, None, _outcome(error), error=str(error),
+                    connect_ms=_connect_ms())
+    return None
 
 
 def chat_completion_stream(
@@ -152,6 +532,7 @@ def chat_completion_stream(
     api_key: Optional[str] = None,
     temperature: float = 0.7,
     max_tokens: int = 1024,
+    client: Optional[OpenRouterClient] = None,
 ) -> Generator[str, None, None]:
     """
     Stream chat completion response (for real-time output).
@@ -159,49 +540,96 @@ def chat_completion_stream(
     Yields:
         Text chunks as they arrive
     """
-    key = api_key or get_api_key()
+    client = client or get_client()
+
+    key = api_key or client.get_api_key()
     if not key:
         print("[OpenRouter] ERROR: No API key found!")
         return
     
-    model_id = MODELS.get(model, model)
-    
-    headers = {
-        "Authorization": f"Bearer {key}",
-        "Content-Type": "application/json",
-    }
-    
-    payload = {
-        "model": model_id,
-        "messages": messages,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-        "stream": True,
-    }
+    payload = _build_payload(messages, model, temperature, max_tokens, stream=True)
+    timer = metrics.RequestTimer("openrouter", payload["model"], stream=True)
+    _reset_connect_ms()
+    parts: List[str] = []
+    usage: Optional[Dict[str, Any]] = None
+    # Stays CANCELLED if the consumer stops iterating early (e.g. hedging)
+    outcome, error = metrics.CANCELLED, None
+    connect_ms: Optional[float] = None
     
     try:
-        with requests.post(API_BASE_URL, headers=headers, json=payload, 
-                          stream=True, timeout=60) as response:
-            response.raise_for_status()
-            
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        if data == "[DONE]":
-                            break
-                        try:
-                            chunk = json.loads(data)
-                            delta = chunk.get("choices", [{}])[0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                yield content
-                        except json.JSONDecodeError:
-                            continue
+        # Only opening the stream is retried; once tokens flow we don't replay
+        with _send(client, payload, key, stream=True, on_headers=timer.first_byte) as response:
+            connect_ms = _connect_ms()
+            # A hedge loser drops its connection now, not when its first token comes
+            on_cancel(response.close)
+            # Each event is yielded as soon as its blank line arrives
+            # (iter_lines() would hold small events back in its buffer)
+            for event in iter_sse(response):
+                if event.data == "[DONE]":
+                    # Read the stream terminator so the connection
+                    # goes back to the pool instead of being dropped
+                    response.raw.drain_conn()
+                    break
+                usage = _stream_usage(event.data) or usage
+                content = _parse_stream_data(event.data)
+                if content:
+                    timer.first_token()
+                    parts.append(content)
+                    yield content
+            outcome = metrics.OK if parts else metrics.ERROR
                             
+    except (CircuitOpenError, TransientError) as e:
+        print(f"[OpenRouter] Stream error: {e}")
+        outcome, error = _outcome(e), str(e)
     except requests.exceptions.RequestException as e:
         print(f"[OpenRouter] Stream error: {e}")
+        outcome, error = _outcome(e), str(e)
+    finally:
+        # The generator may be closed from another thread; use the value
+        # captured on the request thread when we have it
+        _finish_metrics(timer, messages, "".join(parts), usage, outcome, error,
+                        connect_ms=connect_ms if connect_ms is not None else _connect_ms())
+
+
+def chat_completion_stream_hedged(
+    messages: List[Dict[str, str]],
+    models: List[str],
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    hedge_after_s: float = HEDGE_AFTER_S,
+    client: Optional[OpenRouterClient] = None,
+) -> Generator[str, None, None]:
+    """
+    Stream from the first model in `models` that starts answering.
+
+    The next model is tried as a hedge if the current one has no first token
+    after hedge_after_s, or immediately if it errors; losers are cancelled.
+    """
+    attempts = [
+        (lambda m=m: chat_completion_stream(
+            messages, model=m, api_key=api_key, temperature=temperature,
+            max_tokens=max_tokens, client=client))
+        for m in models
+    ]
+    yield from hedged_stream(attempts, hedge_after_s, labels=[MODELS.get(m, m) for m in models])
+
+
+def chat_completion_hedged(
+    messages: List[Dict[str, str]],
+    models: List[str],
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    hedge_after_s: float = HEDGE_AFTER_S,
+    client: Optional[OpenRouterClient] = None,
+) -> Optional[str]:
+    """Blocking version of chat_completion_stream_hedged(); returns full text or None."""
+    text = "".join(chat_completion_stream_hedged(
+        messages, models, api_key=api_key, temperature=temperature,
+        max_tokens=max_tokens, hedge_after_s=hedge_after_s, client=client,
+    ))
+    return text.strip() or None
 
 
 # ==============================================================================
@@ -230,7 +658,10 @@ def translate_en_to_vi(
         }
     ]
     
-    return chat_completion(messages, model=model, api_key=api_key, temperature=0.3)
+    return _cached_translation(
+        "en-vi", text, model,
+        lambda: chat_completion(messages, model=model, api_key=api_key, temperature=0.3),
+    )
 
 
 def translate_vi_to_en(
@@ -255,7 +686,10 @@ def translate_vi_to_en(
         }
     ]
     
-    return chat_completion(messages, model=model, api_key=api_key, temperature=0.3)
+    return _cached_translation(
+        "vi-en", text, model,
+        lambda: chat_completion(messages, model=model, api_key=api_key, temperature=0.3),
+    )
 
 
 def translate_auto(
@@ -268,7 +702,21 @@ def translate_auto(
     - English → Vietnamese
     - Vietnamese → English
     """
-    messages = [
+    messages = _auto_translate_messages(text)
+    
+    return _cached_translation(
+        "auto", text, model,
+        lambda: chat_completion(messages, model=model, api_key=api_key, temperature=0.3),
+    )
+
+
+def _cached_translation(direction: str, text: str, model: str, compute) -> Optional[str]:
+    """Serve from the translation cache; concurrent misses share one request."""
+    return get_cache().get_or_compute("openrouter", MODELS.get(model, model), direction, text, compute)
+
+
+def _auto_translate_messages(text: str) -> List[Dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": (
@@ -283,14 +731,517 @@ def translate_auto(
             "content": text
         }
     ]
-    
-    return chat_completion(messages, model=model, api_key=api_key, temperature=0.3)
+
+
+# ==============================================================================
+# BATCH TRANSLATION (many segments per request)
+# ==============================================================================
+
+BATCH_DIRECTIONS = {
+    "en-vi": "Translate every English segment into Vietnamese.",
+    "vi-en": "Translate every Vietnamese segment into English.",
+    "auto": (
+        "For every segment: if it is English, translate it into Vietnamese; "
+        "if it is Vietnamese, translate it into English."
+    ),
+}
+
+# Rough output cost per segment: translation (Vietnamese runs longer than
+# English) plus the JSON key/quotes around it.
+_BATCH_EXPANSION = 2.0
+_BATCH_ENTRY_OVERHEAD = 8
+
+
+def _batch_messages(segments: List[str], direction: str) -> List[Dict[str, str]]:
+    numbered = {str(i + 1): seg for i, seg in enumerate(segments)}
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a professional English-Vietnamese translator. "
+                f"{BATCH_DIRECTIONS[direction]} "
+                "The input is a JSON object mapping segment numbers to text. "
+                "Reply with ONLY a JSON object mapping the same numbers to the "
+                "translations. Translate each segment independently, keep "
+                "placeholders, punctuation and line breaks, no explanations."
+            )
+        },
+        {
+            "role": "user",
+            "content": json.dumps(numbered, ensure_ascii=False)
+        }
+    ]
+
+
+def _parse_batch_reply(reply: Optional[str], count: int) -> Dict[int, str]:
+    """
+    Map segment index (0-based) → translation for every segment that could be
+    recovered from the reply. Accepts a JSON object (optionally wrapped in a
+    code fence / prose) and falls back to "[n] text" or "n. text" lines.
+    """
+    if not reply:
+        return {}
+
+    parsed: Dict[int, str] = {}
+
+    start, end = reply.find("{"), reply.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(reply[start:end + 1])
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if str(key).strip().isdigit() and isinstance(value, str) and value.strip():
+                    idx = int(str(key).strip()) - 1
+                    if 0 <= idx < count:
+                        parsed[idx] = value.strip()
+            return parsed
+
+    for match in re.finditer(r"^\s*\[?(\d+)[\].:)]\s*(.+?)\s*$", reply, re.MULTILINE):
+        idx = int(match.group(1)) - 1
+        if 0 <= idx < count and idx not in parsed:
+            parsed[idx] = match.group(2)
+    return parsed
+
+
+def _pack_batches(segments: List[str], max_tokens: int) -> List[List[int]]:
+    """
+    Greedily group segment indices so each group's estimated reply fits in
+    max_tokens (with 20% headroom). Oversized segments get a group of their own.
+    """
+    budget = int(max_tokens * 0.8)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, seg in enumerate(segments):
+        cost = int(estimate_tokens(seg) * _BATCH_EXPANSION) + _BATCH_ENTRY_OVERHEAD
+        if current and used + cost > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _translate_single(text: str, direction: str, model: str, api_key: Optional[str]) -> Optional[str]:
+    if direction == "en-vi":
+        return translate_en_to_vi(text, model=model, api_key=api_key)
+    if direction == "vi-en":
+        return translate_vi_to_en(text, model=model, api_key=api_key)
+    return translate_auto(text, model=model, api_key=api_key)
+
+
+def translate_batch(
+    texts: List[str],
+    direction: str = "en-vi",
+    model: str = "free",
+    api_key: Optional[str] = None,
+    max_tokens: int = 1024,
+    max_retries: int = 2,
+) -> List[Optional[str]]:
+    """
+    Translate many segments with few requests.
+
+    Segments are de-duplicated and looked up in the translation cache; the
+    rest are packed into JSON batches sized to max_tokens, and the reply is
+    split back per segment. Batches are sent concurrently under the
+    provider's AIMD limit (see resilience.get_aimd). Segments missing from a
+    reply are re-batched (up to max_retries times), then tried one by one.
+
+    Args:
+        texts: Segments to translate
+        direction: "en-vi", "vi-en" or "auto"
+        model: Model name or alias from MODELS dict
+        api_key: API key (shared client's cached key if not provided)
+        max_tokens: Reply budget per request; drives the batch size
+        max_retries: Re-batch attempts for segments that failed to parse
+
+    Returns:
+        Translations in input order (None where translation failed)
+    """
+    if direction not in BATCH_DIRECTIONS:
+        raise ValueError(f"direction must be one of {list(BATCH_DIRECTIONS)}")
+
+    results: List[Optional[str]] = [None] * len(texts)
+
+    # Translate each distinct non-empty segment once
+    unique: List[str] = []
+    positions: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            results[i] = text
+            continue
+        if text not in positions:
+            positions[text] = []
+            unique.append(text)
+        positions[text].append(i)
+
+    cache = get_cache()
+    aimd = resilience.get_aimd("openrouter")
+    model_id = MODELS.get(model, model)
+    translated: Dict[str, str] = {}
+    for text in unique:
+        hit = cache.lookup("openrouter", model_id, direction, text)
+        if hit is not None:
+            translated[text] = hit
+    pending = [text for text in unique if text not in translated]
+
+    def run(segments: List[str]) -> Tuple[List[str], Dict[int, str]]:
+        # AIMD slot: concurrency grows on success and halves on 429
+        with aimd.slot():
+            reply = chat_completion(
+                _batch_messages(segments, direction),
+                model=model,
+                api_key=api_key,
+                temperature=0.3,
+                max_tokens=max_tokens,
+            )
+        return segments, _parse_batch_reply(reply, len(segments))
+
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        failed: List[str] = []
+        groups = [[pending[i] for i in group] for group in _pack_batches(pending, max_tokens)]
+        with ThreadPoolExecutor(max_workers=min(len(groups), aimd.max_limit)) as pool:
+            outcomes = list(pool.map(run, groups))
+        for segments, parsed in outcomes:
+            for j, seg in enumerate(segments):
+                if j in parsed:
+                    translated[seg] = parsed[j]
+                    cache.store("openrouter", model_id, direction, seg, parsed[j])
+                else:
+                    failed.append(seg)
+        if failed and attempt < max_retries:
+            print(f"[OpenRouter] Batch: retrying {len(failed)} unparsed segment(s)")
+        pending = failed
+
+    for seg in pending:
+        single = _translate_single(seg, direction, model, api_key)
+        if single:
+            translated[seg] = single
+
+    for seg, idxs in positions.items():
+        for i in idxs:
+            results[i] = translated.get(seg)
+    return results
+
+
+# ==============================================================================
+# ASYNC API (asyncio-native, many requests in flight from one event loop)
+# ==============================================================================
+
+def _connect_trace_config() -> "aiohttp.TraceConfig":
+    """aiohttp trace hooks that add connection setup time to the request's timing dict."""
+    async def on_start(session, ctx, params):
+        ctx.connect_start = time.perf_counter()
+
+    async def on_end(session, ctx, params):
+        timing = ctx.trace_request_ctx
+        if isinstance(timing, dict):
+            timing["connect_ms"] = timing.get("connect_ms", 0.0) + (
+                time.perf_counter() - ctx.connect_start) * 1000.0
+
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_start.append(on_start)
+    trace.on_connection_create_end.append(on_end)
+    return trace
+
+
+class AsyncOpenRouterClient:
+    """
+    aiohttp counterpart of OpenRouterClient, bound to one event loop.
+
+    Credentials come from the shared sync client so the key cache is shared.
+    Concurrency per provider is capped by concurrency.limiter; cancelling the
+    awaiting task aborts the HTTP request.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        pool_limit: int = 32,
+        site_url: str = DEFAULT_SITE_URL,
+        site_name: str = DEFAULT_SITE_NAME,
+        key_source: Optional[OpenRouterClient] = None,
+    ):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("aiohttp is required for AsyncOpenRouterClient. Install with: pip install aiohttp")
+        self.base_url = base_url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_limit = pool_limit
+        self._headers = {
+            "Content-Type": "application/json",
+            "HTTP-Referer": site_url,
+            "X-Title": site_name,
+        }
+        self._key_source = key_source
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    def get_api_key(self) -> Optional[str]:
+        return (self._key_source or get_client()).get_api_key()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_limit),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout),
+                trace_configs=[_connect_trace_config()],
+            )
+        return self._session
+
+    def post(self, payload: Dict[str, Any], api_key: str, timing: Optional[Dict[str, float]] = None):
+        """
+        Return an aiohttp request context manager for the payload.
+
+        If given, timing["connect_ms"] is increased by the time spent opening
+        a new connection (it stays 0 when a pooled one is reused).
+        """
+        return self._get_session().post(
+            self.base_url,
+            json=payload,
+            headers={"Authorization": f"Bearer {api_key}"},
+            trace_request_ctx=timing,
+        )
+
+    async def aclose(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenRouterClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> AsyncOpenRouterClient:
+    """Return the AsyncOpenRouterClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOpenRouterClient()
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """Close the running loop's shared async client (call before loop shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _acheck_response(response: "aiohttp.ClientResponse") -> None:
+    """_check_response() for an aiohttp response (released on error)."""
+    if response.status == 429:
+        retry_after = resilience.parse_retry_after(response.headers.get("Retry-After"))
+        response.release()
+        raise RateLimitedError("429 Too Many Requests from OpenRouter", retry_after=retry_after)
+    if response.status >= 500:
+        response.release()
+        raise TransientError(f"{response.status} from OpenRouter")
+    response.raise_for_status()
+
+
+async def _aopen(client: AsyncOpenRouterClient, payload: Dict[str, Any], key: str,
+                 timing: Dict[str, float],
+                 on_headers: Optional[Callable[[], None]] = None) -> "aiohttp.ClientResponse":
+    """One request attempt, aiohttp errors mapped to resilience errors."""
+    try:
+        response = await client.post(payload, api_key=key, timing=timing)
+    except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+        raise TransientError(str(e) or type(e).__name__) from e
+    if on_headers is not None:
+        on_headers()
+    _acheck_response(response)
+    return response
+
+
+async def _asend(client: AsyncOpenRouterClient, payload: Dict[str, Any], key: str,
+                 timing: Dict[str, float],
+                 on_headers: Optional[Callable[[], None]] = None) -> "aiohttp.ClientResponse":
+    """
+    Async _send(): open the request through resilience.acall (same rate
+    limit, retry and circuit breaker as the sync path). The caller owns
+    the returned response (`async with response:`).
+    """
+    return await resilience.acall(
+        "openrouter", lambda: _aopen(client, payload, key, timing, on_headers), key=key,
+        scope=payload["model"])
+
+
+async def achat_completion(
+    messages: List[Dict[str, str]],
+    model: str = "free",
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    client: Optional[AsyncOpenRouterClient] = None,
+) -> Optional[str]:
+    """
+    Coroutine version of chat_completion().
+
+    Waits for a free "openrouter" slot (see concurrency.set_concurrency_limit),
+    so callers can simply asyncio.gather() dozens of these.
+    """
+    if not AIOHTTP_AVAILABLE:
+        async with limiter.slot("openrouter"):
+            return await asyncio.to_thread(
+                chat_completion, messages, model, api_key, temperature, max_tokens
+            )
+
+    client = client or get_async_client()
+    key = api_key or client.get_api_key()
+    if not key:
+        print("[OpenRouter] ERROR: No API key found!")
+        return None
+
+    payload = _build_payload(messages, model, temperature, max_tokens)
+
+    async with limiter.slot("openrouter"):
+        timer = metrics.RequestTimer("openrouter", payload["model"])
+        timing = {"connect_ms": 0.0}
+        text, data = None, {}
+        outcome, error = metrics.CANCELLED, None
+
+        async def attempt() -> Dict[str, Any]:
+            async with await _aopen(client, payload, key, timing, timer.first_byte) as response:
+                try:
+                    body = await response.json(content_type=None)
+                except (asyncio.TimeoutError, aiohttp.ClientPayloadError) as e:
+                    raise TransientError(str(e) or type(e).__name__) from e
+            _check_body(body)
+            return body
+
+        try:
+            # Retries re-send the whole request (nothing reached the caller yet)
+            data = await resilience.acall("openrouter", attempt, key=key, scope=payload["model"])
+            text = _parse_completion(data)
+            outcome = metrics.OK if text is not None else metrics.ERROR
+        except CircuitOpenError as e:
+            print(f"[OpenRouter] {e}")
+            outcome, error = _outcome(e), str(e)
+        except RateLimitedError as e:
+            print(f"[OpenRouter] Rate limited, giving up: {e}")
+            outcome, error = _outcome(e), str(e)
+        except TransientError as e:
+            print(f"[OpenRouter] Request failed after retries: {e}")
+            outcome, error = _outcome(e), str(e)
+        except aiohttp.ClientError as e:
+            print(f"[OpenRouter] Request error: {e}")
+            outcome, error = _async_outcome(e), str(e)
+        except json.JSONDecodeError as e:
+            print("[OpenRouter] Invalid JSON response")
+            outcome, error = metrics.ERROR, str(e)
+        finally:
+            _finish_metrics(timer, messages, text, data.get("usage") if isinstance(data, dict) else None,
+                            outcome, error, connect_ms=timing["connect_ms"])
+
+    return text
+
+
+async def achat_completion_stream(
+    messages: List[Dict[str, str]],
+    model: str = "free",
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    client: Optional[AsyncOpenRouterClient] = None,
+) -> AsyncGenerator[str, None]:
+    """
+    Async-generator version of chat_completion_stream().
+
+    The provider slot is held until the stream ends or the consumer stops
+    iterating (aclose / task cancellation closes the response).
+    """
+    if not AIOHTTP_AVAILABLE:
+        async with limiter.slot("openrouter"):
+            gen = chat_completion_stream(messages, model, api_key, temperature, max_tokens)
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(next, gen, None)
+                    if chunk is None:
+                        break
+                    yield chunk
+            finally:
+                gen.close()
+        return
+
+    client = client or get_async_client()
+    key = api_key or client.get_api_key()
+    if not key:
+        print("[OpenRouter] ERROR: No API key found!")
+        return
+
+    payload = _build_payload(messages, model, temperature, max_tokens, stream=True)
+
+    async with limiter.slot("openrouter"):
+        timer = metrics.RequestTimer("openrouter", payload["model"], stream=True)
+        timing = {"connect_ms": 0.0}
+        parts: List[str] = []
+        usage: Optional[Dict[str, Any]] = None
+        outcome, error = metrics.CANCELLED, None
+        try:
+            # Only opening the stream is retried; once tokens flow we don't replay
+            async with await _asend(client, payload, key, timing, timer.first_byte) as response:
+                async for event in aiter_sse(response):
+                    if event.data == "[DONE]":
+                        break
+                    usage = _stream_usage(event.data) or usage
+                    content = _parse_stream_data(event.data)
+                    if content:
+                        timer.first_token()
+                        parts.append(content)
+                        yield content
+            outcome = metrics.OK if parts else metrics.ERROR
+        except (CircuitOpenError, TransientError) as e:
+            print(f"[OpenRouter] Stream error: {e}")
+            outcome, error = _outcome(e), str(e)
+        except asyncio.TimeoutError:
+            print("[OpenRouter] Stream timed out")
+            outcome, error = metrics.TIMEOUT, "timeout"
+        except aiohttp.ClientError as e:
+            print(f"[OpenRouter] Stream error: {e}")
+            outcome, error = _async_outcome(e), str(e)
+        finally:
+            _finish_metrics(timer, messages, "".join(parts), usage, outcome, error,
+                            connect_ms=timing["connect_ms"])
+
+
+async def atranslate_auto(
+    text: str,
+    model: str = "free",
+    api_key: Optional[str] = None
+) -> Optional[str]:
+    """Coroutine version of translate_auto()."""
+    async def compute() -> Optional[str]:
+        messages = _auto_translate_messages(text)
+        return await achat_completion(messages, model=model, api_key=api_key, temperature=0.3)
+
+    # Concurrent tasks translating the same text share one request
+    return await get_cache().aget_or_compute("openrouter", MODELS.get(model, model), "auto", text, compute)
 
 
 # ==============================================================================
 # CHATBOT CLASS
 # ==============================================================================
 
+def _probe(alias: str) -> Optional[str]:
+    return chat_completion(PROBE_MESSAGES, model=alias, max_tokens=1)
+
+
+def get_model_router() -> ModelRouter:
+    """Shared latency-aware router over MODELS (used by model="auto")."""
+    return get_router("openrouter", lambda: ModelRouter("openrouter", MODELS, probe_fn=_probe))
+
+
 class OpenRouterChatbot:
     """
     A conversational chatbot using OpenRouter API with conversation history.
@@ -301,11 +1252,29 @@ class OpenRouterChatbot:
         model: str = "free",
         api_key: Optional[str] = None,
         system_prompt: Optional[str] = None,
-        max_history: int = 20
+        max_history: int = 20,
+        client: Optional[OpenRouterClient] = None,
+        fallback_models: Optional[List[str]] = None,
+        hedge_after_s: float = HEDGE_AFTER_S,
+        max_context_tokens: int = DEFAULT_MAX_CONTEXT_TOKENS,
+        summary_model: Optional[str] = SUMMARY_MODEL,
+        quality: str = "basic",
     ):
         self.model = model
-        self.api_key = api_key or get_api_key()
+        # Explicit key only; None = resolved per request by the pooled client,
+        # so an edited api_key.txt / rotated key applies from the next turn
+        self.api_key = api_key
         self.max_history = max_history
+        self.client = client
+        self.summary_model = summary_model
+        # Primary model first, then fallbacks (hedged when more than one)
+        self.models = [model] + [m for m in (fallback_models or []) if m != model]
+        self.hedge_after_s = hedge_after_s
+        # model="auto": pick the fastest healthy model of this tier per turn
+        self.quality = quality
+        self.router = get_model_router() if model == AUTO_MODEL else None
+        if self.router is not None:
+            self.router.watch(quality)
         
         # Default system prompt (bilingual assistant)
         self.system_prompt = system_prompt or (
@@ -316,66 +1285,118 @@ class OpenRouterChatbot:
             "Trả lời ngắn gọn, rõ ràng và hữu ích."
         )
         
-        self.messages: List[Dict[str, str]] = [
-            {"role": "system", "content": self.system_prompt}
-        ]
+        # Recent turns within max_context_tokens; older ones are summarized
+        # in the background by summary_model (None = just drop them)
+        self.history = ConversationHistory(
+            self.system_prompt,
+            max_tokens=max_context_tokens,
+            max_messages=max_history,
+            summarizer=self._summarize if summary_model else None,
+        )
+    
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """Conversation history (system message first)."""
+        return self.history.messages
+    
+    def _summarize(self, previous: str, turns: List[Dict[str, str]]) -> Optional[str]:
+        return chat_completion(
+            messages=summary_messages(previous, turns),
+            model=self.summary_model,
+            api_key=self.api_key,
+            temperature=0.3,
+            max_tokens=256,
+            client=self.client,
+        )
     
-    def chat(self, user_message: str) -> Optional[str]:
+    def _turn_models(self) -> List[str]:
+        """Models for this turn: primary (routed if auto) followed by fallbacks."""
+        if self.router is None:
+            return self.models
+        primary = self.router.choose(self.quality) or FALLBACK_MODELS[0]
+        return [primary] + [m for m in self.models[1:] if m != primary]
+
+    def chat(self, user_message: str, commit: bool = True) -> Optional[str]:
         """
         Send a message and get a response.
         Maintains conversation history.
         Only saves to history if request succeeds.
+
+        commit=False leaves the history untouched (speculative turn, e.g.
+        on a partial transcript); keep the reply with commit_turn().
         """
         # Temporarily add user message for the request
-        temp_messages = self.messages + [{"role": "user", "content": user_message}]
+        temp_messages = self.history.build(user_message)
         
         # Get response
-        response = chat_completion(
-            messages=temp_messages,
-            model=self.model,
-            api_key=self.api_key
-        )
+        models = self._turn_models()
+        if len(models) > 1:
+            response = chat_completion_hedged(
+                messages=temp_messages,
+                models=models,
+                api_key=self.api_key,
+                hedge_after_s=self.hedge_after_s,
+                client=self.client,
+            )
+        else:
+            response = chat_completion(
+                messages=temp_messages,
+                model=models[0],
+                api_key=self.api_key,
+                client=self.client,
+            )
         
-        if response:
+        if response and commit:
             # Only save to history if successful
-            self.messages.append({"role": "user", "content": user_message})
-            self.messages.append({"role": "assistant", "content": response})
-            
-            # Trim history if too long (keep system + recent messages)
-            if len(self.messages) > self.max_history + 1:
-                self.messages = [self.messages[0]] + self.messages[-(self.max_history):]
+            self.history.add_turn(user_message, response)
         
         return response
     
+    def commit_turn(self, user_message: str, reply: str) -> None:
+        """Record a turn answered by a speculative chat(commit=False)."""
+        self.history.add_turn(user_message, reply)
+    
     def chat_stream(self, user_message: str) -> Generator[str, None, None]:
         """
         Send a message and stream the response.
         """
         # Temporarily add for streaming
-        temp_messages = self.messages + [{"role": "user", "content": user_message}]
+        temp_messages = self.history.build(user_message)
+        
+        models = self._turn_models()
+        if len(models) > 1:
+            stream = chat_completion_stream_hedged(
+                messages=temp_messages,
+                models=models,
+                api_key=self.api_key,
+                hedge_after_s=self.hedge_after_s,
+                client=self.client,
+            )
+        else:
+            stream = chat_completion_stream(
+                messages=temp_messages,
+                model=models[0],
+                api_key=self.api_key,
+                client=self.client,
+            )
         
         full_response = []
-        for chunk in chat_completion_stream(
-            messages=temp_messages,
-            model=self.model,
-            api_key=self.api_key
-        ):
+        for chunk in stream:
             full_response.append(chunk)
             yield chunk
         
         # Only add to history if we got a response
         if full_response:
-            self.messages.append({"role": "user", "content": user_message})
-            self.messages.append({"role": "assistant", "content": "".join(full_response)})
+            self.history.add_turn(user_message, "".join(full_response))
     
     def reset(self) -> None:
         """Reset conversation history."""
-        self.messages = [{"role": "system", "content": self.system_prompt}]
+        self.history.reset()
     
     def set_system_prompt(self, prompt: str) -> None:
         """Change system prompt and reset conversation."""
         self.system_prompt = prompt
-        self.reset()
+        self.history.reset(prompt)
 
 
 # ==============================================================================
@@ -0,0 +1,387 @@
+"""
+Long-lived audio playback engine (pygame mixer on one worker thread).
+
+text_to_speech used to stop, quit and re-init pygame around every
+utterance (plus fixed sleeps) to get out of a "stuck" mixer, which cost
+about half a second of dead air per reply. An AudioPlayer instead:
+
+- owns the audio device on a single worker thread: the mixer is opened
+  once and every pygame call happens on that thread (mixing threads was
+  what left the mixer stuck)
+- plays a queue of in-memory MP3 or PCM buffers in order, no temp files;
+  each is decoded to a Sound on a reserved channel, and the next one is
+  decoded and lined up (Channel.queue) while the current one plays, so
+  consecutive clips play back to back without a gap
+- reports through threading.Events: `started` / `done` per Playback, so
+  callers block on an event instead of polling get_busy() themselves
+- supports cancellation: Playback.cancel() for one item, stop() for the
+  current item and everything queued before the call
+- recovers by re-opening the mixer only when a playback actually fails
+  or overruns, not on every turn
+
+    player = get_player()
+    playback = player.play_mp3(mp3_bytes, on_start=...)
+    playback.wait()
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+import wave
+from typing import Callable, Optional, Tuple
+
+# Hide pygame's import banner (it would land in the middle of the CLI output)
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+    print("[TTS] pygame not available. Install with: pip install pygame")
+
+MIXER_FREQUENCY = 22050
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 512
+# pygame's end event needs the video subsystem (absent on headless boards),
+# so the worker checks get_busy() this often; callers wait on Events.
+POLL_S = 0.02
+DEFAULT_TIMEOUT_S = 60.0
+STUCK_GRACE_S = 2.0          # past a clip's length before the mixer counts as stuck
+
+
+class Playback:
+    """One queued buffer; `started` and `done` are set by the player."""
+
+    def __init__(self, player: "AudioPlayer", data: bytes, hint: str, timeout_s: float,
+                 on_start: Optional[Callable[[], None]], generation: int):
+        self._player = player
+        self.data = data
+        self.hint = hint
+        self.timeout_s = timeout_s
+        self.on_start = on_start
+        self.generation = generation
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.ok = False
+        self._cancelled = threading.Event()
+        self._started_at = 0.0
+        self._deadline = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """True once cancelled, also by a player.stop() while still queued."""
+        return self._cancelled.is_set() or self.generation < self._player.generation
+
+    def cancel(self) -> None:
+        """Skip it if still queued, stop it if playing."""
+        self._cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until finished; True if it played to the end."""
+        self.done.wait(timeout)
+        return self.ok
+
+    def _finish(self, ok: bool) -> None:
+        self.ok = ok
+        self.data = b""
+        self.done.set()
+
+
+# (queued item, decoded sound)
+Clip = Tuple[Playback, "pygame.mixer.Sound"]
+
+
+def pcm_to_wav(data: bytes, sample_rate: int, sample_width: int = 2, channels: int = 1) -> bytes:
+    """Raw PCM → in-memory WAV (the mixer resamples it to the device rate)."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sample_width)
+        w.setframerate(sample_rate)
+        w.writeframes(data)
+    return buffer.getvalue()
+
+
+class AudioPlayer:
+    """Plays queued audio buffers one after another on a worker thread."""
+
+    def __init__(self, frequency: int = MIXER_FREQUENCY, channels: int = MIXER_CHANNELS,
+                 buffer: int = MIXER_BUFFER):
+        self.frequency = frequency
+        self.channels = channels
+        self.buffer = buffer
+        self._queue: "queue.Queue[Optional[Playback]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current: Optional[Playback] = None
+        self._mixer_open = False
+        self._channel = None
+        self._worker: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def available(self) -> bool:
+        return PYGAME_AVAILABLE
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self) -> "AudioPlayer":
+        if not self.running:
+            self._worker = threading.Thread(target=self._run, name="audio-player", daemon=True)
+            self._worker.start()
+        return self
+
+    def close(self) -> None:
+        """Stop playback, finish the worker and release the audio device."""
+        if self._worker is None:
+            return
+        self.stop()
+        self._queue.put(None)
+        self._worker.join(timeout=2.0)
+        self._worker = None
+
+    # ------------------------------------------------------------------
+    # Queueing
+    # ------------------------------------------------------------------
+
+    def play(self, data: bytes, hint: str = "mp3", timeout_s: float = DEFAULT_TIMEOUT_S,
+             on_start: Optional[Callable[[], None]] = None) -> Playback:
+        """
+        Queue an encoded buffer (anything pygame.mixer.Sound loads: mp3,
+        wav, ogg; `hint` is the format). on_start runs on the worker as
+        soon as it starts playing; playback is cut after timeout_s.
+        """
+        with self._lock:
+            item = Playback(self, data, hint, timeout_s, on_start, self._generation)
+        if not PYGAME_AVAILABLE:
+            item._finish(False)
+            return item
+        self.start()
+        self._queue.put(item)
+        return item
+
+    def play_mp3(self, data: bytes, **kwargs) -> Playback:
+        return self.play(data, "mp3", **kwargs)
+
+    def play_pcm(self, data: bytes, sample_rate: int, sample_width: int = 2,
+                 channels: int = 1, **kwargs) -> Playback:
+        return self.play(pcm_to_wav(data, sample_rate, sample_width, channels), "wav", **kwargs)
+
+    def play_file(self, path: str, **kwargs) -> Playback:
+        with open(path, "rb") as f:
+            data = f.read()
+        hint = os.path.splitext(path)[1].lstrip(".").lower() or "mp3"
+        return self.play(data, hint, **kwargs)
+
+    def stop(self) -> None:
+        """Cancel the current playback and everything queued so far."""
+        with self._lock:
+            self._generation += 1
+            current = self._current
+        if current is not None:
+            current.cancel()
+
+    @property
+    def generation(self) -> int:
+        """Incremented by every stop(); items queued before it are cancelled."""
+        return self._generation
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None or not self._queue.empty()
+
+    # ------------------------------------------------------------------
+    # Worker thread (the only place pygame is touched)
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        # The clip playing, and the next one already lined up in the mixer
+        playing: Optional[Clip] = None
+        lined_up: Optional[Clip] = None
+        try:
+            while True:
+                item = False
+                try:
+                    if lined_up is None:
+                        try:
+                            item = self._queue.get(timeout=POLL_S if playing else None)
+                        except queue.Empty:
+                            item = False
+                        if item is None:
+                            return
+                        clip = self._decode(item) if item else None
+                        if clip is not None:
+                            if playing is None:
+                                playing = self._start(clip)
+                            else:
+                                # Channel.queue() starts it the moment the current one ends
+                                self._channel.queue(clip[1])
+                                lined_up = clip
+                    else:
+                        playing[0]._cancelled.wait(POLL_S)
+                    playing, lined_up = self._advance(playing, lined_up)
+                except Exception as e:
+                    # Never let one bad clip (or callback) take the worker down
+                    print(f"[TTS] Audio player error: {e!r}")
+                    for failed in (playing and playing[0], lined_up and lined_up[0], item or None):
+                        if failed is not None and not failed.done.is_set():
+                            self._finished(failed, False)
+                    playing = lined_up = None
+                    self._close_mixer()
+        finally:
+            for clip in (playing, lined_up):
+                if clip is not None:
+                    clip[0]._finish(False)
+            self._drain()
+            self._close_mixer()
+
+    def _drain(self) -> None:
+        """Finish whatever is still queued when the worker exits."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item._finish(False)
+
+    def _decode(self, item: Playback) -> Optional[Clip]:
+        """Decoded clip, or None (item finished) if cancelled or undecodable."""
+        if item.cancelled or not self._open_mixer():
+            item._finish(False)
+            return None
+        try:
+            sound = pygame.mixer.Sound(file=io.BytesIO(item.data))
+        except Exception as e:
+            print(f"[TTS] Cannot decode {item.hint} audio: {e}")
+            item._finish(False)
+            return None
+        # item.data is kept until it finishes: a re-opened mixer needs it decoded again
+        return item, sound
+
+    def _start(self, clip: Clip) -> Optional[Clip]:
+        """Play clip now (nothing else is playing)."""
+        for attempt in range(2):
+            if not self._mixer_open:
+                # Sounds don't outlive the mixer that decoded them
+                clip = self._decode(clip[0])
+                if clip is None:
+                    return None
+            try:
+                self._channel.play(clip[1])
+                break
+            except pygame.error as e:
+                if attempt:
+                    clip[0]._finish(False)
+                    return None
+                # A broken device state: re-open the mixer and retry once
+                print(f"[TTS] Playback failed ({e}), reopening the audio device")
+                self._close_mixer()
+        self._started(clip)
+        return clip
+
+    def _started(self, clip: Clip) -> None:
+        item, sound = clip
+        item._started_at = time.monotonic()
+        # Cut at timeout_s; a clip still "playing" well past its length means a stuck mixer
+        item._deadline = item._started_at + min(item.timeout_s, sound.get_length() + STUCK_GRACE_S)
+        with self._lock:
+            self._current = item
+        item.started.set()
+        if item.on_start:
+            try:
+                item.on_start()
+            except Exception as e:
+                print(f"[TTS] on_start callback failed: {e!r}")
+
+    def _advance(self, playing: Optional[Clip],
+                 lined_up: Optional[Clip]) -> Tuple[Optional[Clip], Optional[Clip]]:
+        """Follow the mixer: clip ended, next one took over, cancel or overrun."""
+        if playing is None:
+            return None, None
+        item, sound = playing
+        if item.cancelled or time.monotonic() > item._deadline:
+            if not item.cancelled:
+                print(f"[TTS] Playback cut after {time.monotonic() - item._started_at:.1f}s")
+            self._channel.stop()  # also drops the lined-up clip
+            if not item.cancelled and time.monotonic() - item._started_at > sound.get_length():
+                # Overran: don't trust this mixer state for the next utterance
+                self._close_mixer()
+            self._finished(item, False)
+            if lined_up is None or lined_up[0].cancelled:
+                if lined_up is not None:
+                    lined_up[0]._finish(False)
+                return None, None
+            return self._start(lined_up), None
+
+        now_playing = self._channel.get_sound()
+        if now_playing is sound:
+            return playing, lined_up
+        self._finished(item, True)
+        if lined_up is None:
+            return None, None
+        if now_playing is lined_up[1]:
+            # Took over without a gap
+            self._started(lined_up)
+            return lined_up, None
+        return self._start(lined_up), None
+
+    def _finished(self, item: Playback, ok: bool) -> None:
+        with self._lock:
+            if self._current is item:
+                self._current = None
+        item._finish(ok)
+
+    def _open_mixer(self) -> bool:
+        if self._mixer_open:
+            return True
+        try:
+            pygame.mixer.init(frequency=self.frequency, size=-16,
+                              channels=self.channels, buffer=self.buffer)
+            # Our own channel, never handed out to other Sound.play() calls
+            pygame.mixer.set_reserved(1)
+            self._channel = pygame.mixer.Channel(0)
+            self._mixer_open = True
+        except pygame.error as e:
+            print(f"[TTS] Cannot open audio device: {e}")
+        return self._mixer_open
+
+    def _close_mixer(self) -> None:
+        if not PYGAME_AVAILABLE:
+            return
+        try:
+            pygame.mixer.stop()
+            pygame.mixer.quit()
+        except pygame.error:
+            pass
+        self._channel = None
+        self._mixer_open = False
+
+
+_player: Optional[AudioPlayer] = None
+_player_lock = threading.Lock()
+
+
+def get_player() -> AudioPlayer:
+    """Shared player (the worker starts with the first playback)."""
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = AudioPlayer()
+        return _player
+
+
+def close_player() -> None:
+    global _player
+    with _player_lock:
+        if _player is not None:
+            _player.close()
+            _player = None
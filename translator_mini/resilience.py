@@ -0,0 +1,445 @@
+"""
+Shared resilience layer for outbound calls (OpenRouter, Gemini, Google
+Translate, gTTS).
+
+- TokenBucket: client-side rate limit per (provider, API key[, scope]).
+- RetryPolicy: exponential backoff with full jitter, honours Retry-After.
+- CircuitBreaker: after repeated failures, fail fast for a cool-down period
+  instead of waiting on timeouts.
+- AIMDLimiter: adaptive concurrency for bulk jobs (additive increase on
+  success, multiplicative decrease on 429) so throughput settles just under
+  the provider's limit.
+
+Call sites translate their own errors into RateLimitedError (429) or
+TransientError (5xx, timeouts, connection errors) and wrap the request in
+call(provider, fn, key=...), or `await acall(provider, coro_fn, key=...)`
+from asyncio code (same buckets, breakers and AIMD limiters, but waits with
+asyncio.sleep). Anything else is treated as a hard error and is raised
+immediately without retry.
+
+Chat calls pass scope=<model id>: breakers and Retry-After pauses are then
+kept per model, so one throttled or dead free model doesn't fail fast the
+fallback models that failover and hedging switch to.
+"""
+
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+# ==============================================================================
+# ERRORS
+# ==============================================================================
+
+class TransientError(Exception):
+    """Retryable failure (5xx, timeout, connection reset...)."""
+
+
+class RateLimitedError(TransientError):
+    """Provider said 429 / quota exceeded. retry_after is in seconds, if known."""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Provider's circuit breaker is open; the call was not attempted."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ==============================================================================
+# BUILDING BLOCKS
+# ==============================================================================
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens/second, up to `burst` saved."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self) -> float:
+        """Take a token if one is available (0.0), else seconds until there is one."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, sleeping until one is available (False on timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """acquire() for coroutines: waits with asyncio.sleep, never blocks the loop."""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for `seconds` (used when the server sends Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class CircuitBreaker:
+    """
+    closed → (failure_threshold consecutive failures) → open
+    open → (reset_timeout_s) → half-open: one trial call
+    half-open → success → closed | failure → open
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout_s:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Half-open trial ended without a verdict (e.g. 429 or hard error)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit shared by threads.
+
+    Every success adds `increase / limit` (≈ +1 per full window of
+    successes); every overload signal multiplies the limit by `decrease`,
+    at most once per `cooldown_s` so one burst of 429s counts once.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 increase: float = 1.0, decrease: float = 0.5, cooldown_s: float = 1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_s = cooldown_s
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._limit = min(self.max_limit, self._limit + self.increase / max(self._limit, 1.0))
+            self._cond.notify_all()
+
+    def on_overload(self) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown_s:
+                self._limit = max(self.min_limit, self._limit * self.decrease)
+                self._last_decrease = now
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay_s: float = 0.5
+    max_delay_s: float = 8.0
+    # Don't sit out a Retry-After longer than this inside a live turn
+    max_retry_after_s: float = 15.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to wait before retry number `attempt` (0-based), or None if
+        the server asked us to wait longer than max_retry_after_s.
+        """
+        if retry_after is not None:
+            if retry_after > self.max_retry_after_s:
+                return None
+            # Small jitter so clients released together don't stampede
+            return retry_after + random.uniform(0, 0.1 * retry_after + 0.05)
+        # Full jitter: uniform(0, min(cap, base * 2^attempt))
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * (2 ** attempt)))
+
+
+# ==============================================================================
+# PER-PROVIDER REGISTRY
+# ==============================================================================
+
+# (rate per second, burst). Free tiers are stricter; Retry-After pauses the
+# bucket on top of this when the server pushes back.
+DEFAULT_RATES: Dict[str, Tuple[float, int]] = {
+    "openrouter": (2.0, 5),
+    "gemini": (1.0, 5),
+    "google_translate": (5.0, 10),
+    "gtts": (5.0, 10),
+}
+DEFAULT_RATE: Tuple[float, int] = (5.0, 10)
+
+_lock = threading.Lock()
+_rates: Dict[str, Tuple[float, int]] = dict(DEFAULT_RATES)
+_buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_aimd: Dict[str, AIMDLimiter] = {}
+_policies: Dict[str, RetryPolicy] = {}
+
+
+def _key_id(key: Optional[str]) -> str:
+    # Never keep raw API keys around as dict keys
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12] if key else ""
+
+
+def configure(provider: str, rate: Optional[float] = None, burst: Optional[int] = None,
+              policy: Optional[RetryPolicy] = None) -> None:
+    """Override a provider's rate limit and/or retry policy."""
+    with _lock:
+        old_rate, old_burst = _rates.get(provider, DEFAULT_RATE)
+        _rates[provider] = (rate or old_rate, burst or old_burst)
+        for bucket_key in [k for k in _buckets if k[0] == provider]:
+            del _buckets[bucket_key]
+        if policy is not None:
+            _policies[provider] = policy
+
+
+def get_bucket(provider: str, key: Optional[str] = None, scope: Optional[str] = None) -> TokenBucket:
+    with _lock:
+        bucket_key = (provider, _key_id(key), scope or "")
+        bucket = _buckets.get(bucket_key)
+        if bucket is None:
+            rate, burst = _rates.get(provider, DEFAULT_RATE)
+            bucket = TokenBucket(rate, burst)
+            _buckets[bucket_key] = bucket
+        return bucket
+
+
+def get_breaker(provider: str, scope: Optional[str] = None) -> CircuitBreaker:
+    with _lock:
+        breaker_key = (provider, scope or "")
+        breaker = _breakers.get(breaker_key)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[breaker_key] = breaker
+        return breaker
+
+
+def get_aimd(provider: str) -> AIMDLimiter:
+    """Adaptive concurrency limiter for bulk jobs against a provider."""
+    with _lock:
+        limiter = _aimd.get(provider)
+        if limiter is None:
+            limiter = AIMDLimiter()
+            _aimd[provider] = limiter
+        return limiter
+
+
+def get_policy(provider: str) -> RetryPolicy:
+    with _lock:
+        return _policies.get(provider) or RetryPolicy()
+
+
+def _after_failure(provider: str, error: TransientError, attempt: int, policy: RetryPolicy,
+                   breaker: CircuitBreaker, bucket: TokenBucket, aimd: AIMDLimiter) -> Optional[float]:
+    """
+    Book-keeping for failed attempt number `attempt` (0-based). Returns the
+    seconds to sleep before retrying, or None if the caller should give up.
+    """
+    paused = 0.0
+    if isinstance(error, RateLimitedError):
+        # Throttling means the provider is up; it must not trip the breaker
+        breaker.release_trial()
+        aimd.on_overload()
+        delay = policy.delay(attempt, error.retry_after)
+        if error.retry_after:
+            # Every caller's acquire() sits out Retry-After (+ jitter) on
+            # the bucket, this retry included, so no sleep on top of it.
+            # Never longer than max_retry_after_s: acquire() has no timeout,
+            # so a huge Retry-After would freeze every later call with it.
+            paused = delay if delay is not None else policy.max_retry_after_s
+            bucket.pause(paused)
+    else:
+        breaker.record_failure()
+        delay = policy.delay(attempt)
+
+    if delay is None or attempt + 1 >= policy.max_attempts:
+        return None
+    print(f"[Retry] {provider}: {error or type(error).__name__}; "
+          f"retry {attempt + 1}/{policy.max_attempts - 1} in {delay:.1f}s")
+    return max(0.0, delay - paused)
+
+
+def call(provider: str, fn: Callable[[], T], key: Optional[str] = None,
+         policy: Optional[RetryPolicy] = None, scope: Optional[str] = None) -> T:
+    """
+    Run fn() under the provider's rate limit, retry and circuit breaker
+    (those of `scope`, e.g. the model id, if given).
+
+    Raises CircuitOpenError if the provider is failing fast, the last
+    TransientError / RateLimitedError once retries are exhausted, or any
+    other exception from fn() immediately.
+    """
+    policy = policy or get_policy(provider)
+    breaker = get_breaker(provider, scope)
+    bucket = get_bucket(provider, key, scope)
+    aimd = get_aimd(provider)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"{scope or provider} is unavailable (circuit open), failing fast")
+        bucket.acquire()
+        try:
+            result = fn()
+        except TransientError as e:
+            wait = _after_failure(provider, e, attempt, policy, breaker, bucket, aimd)
+            if wait is None:
+                raise
+        except Exception:
+            breaker.release_trial()
+            raise
+        else:
+            breaker.record_success()
+            aimd.on_success()
+            return result
+        attempt += 1
+        time.sleep(wait)
+
+
+async def acall(provider: str, fn: Callable[[], Awaitable[T]], key: Optional[str] = None,
+                policy: Optional[RetryPolicy] = None, scope: Optional[str] = None) -> T:
+    """
+    Coroutine version of call(): `await fn()` is retried under the same
+    rate limit, circuit breaker and AIMD feedback as the sync callers.
+
+    fn must return a fresh awaitable per attempt (e.g. an async def).
+    Cancelling the awaiting task cancels the attempt or the backoff sleep.
+    """
+    policy = policy or get_policy(provider)
+    breaker = get_breaker(provider, scope)
+    bucket = get_bucket(provider, key, scope)
+    aimd = get_aimd(provider)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"{scope or provider} is unavailable (circuit open), failing fast")
+        await bucket.aacquire()
+        try:
+            result = await fn()
+        except TransientError as e:
+            wait = _after_failure(provider, e, attempt, policy, breaker, bucket, aimd)
+            if wait is None:
+                raise
+        except BaseException:
+            # Hard error or cancellation: no verdict on the provider's health
+            breaker.release_trial()
+            raise
+        else:
+            breaker.record_success()
+            aimd.on_success()
+            return result
+        attempt += 1
+        await asyncio.sleep(wait)
@@ -0,0 +1,267 @@
+"""
+Latency-aware model router (`--model auto`).
+
+Keeps an EWMA of latency and error rate per model, fed by every request
+recorded in metrics.py, and sends each turn to the fastest healthy model of
+the requested quality tier. A background thread probes models that have no
+fresh data (or are marked unhealthy) with a tiny request, so the numbers
+follow free-tier latency as it swings during the day.
+
+The router knows nothing about HTTP: the client module passes in its MODELS
+map and a probe function.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from translator_mini import metrics
+
+AUTO_MODEL = "auto"
+
+TIERS = ("basic", "standard", "premium")
+
+# Quality tier per alias; aliases not listed are never picked by the router
+QUALITY_TIERS: Dict[str, Dict[str, str]] = {
+    "openrouter": {
+        "free": "basic",
+        "gemma-free": "basic",
+        "qwen-free": "basic",
+        "mistral": "basic",
+        "gpt-4o-mini": "standard",
+        "claude-haiku": "standard",
+        "gemini-flash": "standard",
+        "deepseek": "standard",
+        "llama-70b": "standard",
+        "gpt-4o": "premium",
+        "claude-sonnet": "premium",
+        "gemini-pro": "premium",
+    },
+    "gemini": {
+        "gemini-2-flash-lite": "basic",
+        "gemini-flash": "standard",
+        "gemini-2-flash": "standard",
+        "gemini-2.5-flash": "standard",
+        "gemini-pro": "premium",
+        "gemini-2.5-pro": "premium",
+    },
+}
+
+PROBE_MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+class ModelHealth:
+    """EWMA latency / error rate for one model."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.samples = 0
+        self.last_update = 0.0
+
+    def update(self, ok: bool, latency_ms: Optional[float]) -> None:
+        a = self.alpha
+        self.error_rate = (1 - a) * self.error_rate + a * (0.0 if ok else 1.0)
+        if ok and latency_ms is not None:
+            self.latency_ms = latency_ms if self.latency_ms is None else (1 - a) * self.latency_ms + a * latency_ms
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+        self.samples += 1
+        self.last_update = time.monotonic()
+
+
+class ModelRouter:
+    """
+    Pick the fastest healthy model of a quality tier.
+
+    - A model is unhealthy after `max_failures` failures in a row or when
+      its EWMA error rate exceeds `max_error_rate`; a successful probe (or
+      request) brings it back.
+    - Score = EWMA latency × (1 + error_rate); models without data are
+      only used when nothing in the tier has data yet.
+    - If no model of the tier is healthy, the next tier up is tried, then
+      the tiers below.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        models: Dict[str, str],
+        tiers: Optional[Dict[str, str]] = None,
+        probe_fn: Optional[Callable[[str], object]] = None,
+        probe_interval_s: float = 300.0,
+        alpha: float = 0.2,
+        max_error_rate: float = 0.5,
+        max_failures: int = 3,
+        explore: float = 0.05,
+    ):
+        self.provider = provider
+        self.probe_fn = probe_fn
+        self.probe_interval_s = probe_interval_s
+        self.max_error_rate = max_error_rate
+        self.max_failures = max_failures
+        self.explore = explore
+
+        tiers = tiers if tiers is not None else QUALITY_TIERS.get(provider, {})
+        # Several aliases may point at the same model id; keep the first
+        self._tiers: Dict[str, str] = {}
+        self._alias_of: Dict[str, str] = {}
+        for alias, model_id in models.items():
+            if alias in tiers and model_id not in self._alias_of:
+                self._alias_of[model_id] = alias
+                self._tiers[alias] = tiers[alias]
+
+        self._health: Dict[str, ModelHealth] = {alias: ModelHealth(alpha) for alias in self._tiers}
+        self._lock = threading.Lock()
+        self._last_choice: Dict[str, str] = {}
+        # Only tiers someone uses are probed (probing paid models costs money)
+        self._watched: Set[str] = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._probe_thread: Optional[threading.Thread] = None
+        metrics.get_registry().add_sink(self._on_record)
+
+    # ------------------------------------------------------------------
+    # Feedback
+    # ------------------------------------------------------------------
+
+    def _on_record(self, rec: metrics.RequestRecord) -> None:
+        if rec.provider != self.provider or rec.outcome == metrics.CANCELLED:
+            return
+        alias = self._alias_of.get(rec.model)
+        if alias is None:
+            return
+        latency = rec.ttft_ms if rec.ttft_ms is not None else rec.total_ms
+        with self._lock:
+            self._health[alias].update(rec.outcome == metrics.OK, latency)
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+
+    def _healthy(self, health: ModelHealth) -> bool:
+        return (health.consecutive_failures < self.max_failures
+                and health.error_rate <= self.max_error_rate)
+
+    def _rank_tier(self, tier: str) -> List[str]:
+        aliases = [a for a, t in self._tiers.items() if t == tier]
+        healthy = [a for a in aliases if self._healthy(self._health[a])]
+        measured = [a for a in healthy if self._health[a].latency_ms is not None]
+        if not measured:
+            return healthy  # no data yet: keep MODELS order
+        measured.sort(key=lambda a: self._health[a].latency_ms * (1 + self._health[a].error_rate))
+        return measured
+
+    def ranked(self, tier: str = "basic") -> List[str]:
+        """Healthy aliases, best first: the requested tier, then higher, then lower."""
+        if tier not in TIERS:
+            raise ValueError(f"Unknown quality tier: {tier} (expected one of {TIERS})")
+        index = TIERS.index(tier)
+        order = list(TIERS[index:]) + list(reversed(TIERS[:index]))
+        with self._lock:
+            for t in order:
+                ranked = self._rank_tier(t)
+                if ranked:
+                    return ranked
+        return []
+
+    def choose(self, tier: str = "basic") -> Optional[str]:
+        """Alias to use for the next request (None if every model is down)."""
+        ranked = self.ranked(tier)
+        if not ranked:
+            # Everything looks down: fall back to the tier's first model
+            ranked = [a for a, t in self._tiers.items() if t == tier] or list(self._tiers)
+            if not ranked:
+                return None
+        choice = ranked[0]
+        if len(ranked) > 1 and random.random() < self.explore:
+            # Occasionally keep the runner-up's numbers fresh with real traffic
+            choice = ranked[1]
+        if self._last_choice.get(tier) != choice:
+            self._last_choice[tier] = choice
+            latency = self._health[choice].latency_ms
+            detail = f"{latency:.0f} ms EWMA" if latency is not None else "no data yet"
+            print(f"[Router] {self.provider}/{tier} → {choice} ({detail})")
+        return choice
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Current per-model numbers (for logging / debugging)."""
+        with self._lock:
+            return {
+                alias: {
+                    "tier": self._tiers[alias],
+                    "latency_ms": h.latency_ms,
+                    "error_rate": h.error_rate,
+                    "healthy": self._healthy(h),
+                    "samples": h.samples,
+                }
+                for alias, h in self._health.items()
+            }
+
+    # ------------------------------------------------------------------
+    # Health probes
+    # ------------------------------------------------------------------
+
+    def watch(self, tier: str) -> None:
+        """Start probing a tier's models (chatbots call this when created)."""
+        if tier not in TIERS:
+            raise ValueError(f"Unknown quality tier: {tier} (expected one of {TIERS})")
+        with self._lock:
+            if tier in self._watched:
+                return
+            self._watched.add(tier)
+        self._wake.set()
+
+    def start_probes(self) -> None:
+        """Probe watched tiers' models now, then stale/unhealthy ones periodically."""
+        if self.probe_fn is None or (self._probe_thread and self._probe_thread.is_alive()):
+            return
+        self._stop.clear()
+        self._probe_thread = threading.Thread(
+            target=self._probe_loop, name=f"router-probe-{self.provider}", daemon=True
+        )
+        self._probe_thread.start()
+
+    def _probe_loop(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    alias for alias, h in self._health.items()
+                    if self._tiers[alias] in self._watched and (
+                        not self._healthy(h) or h.latency_ms is None
+                        or now - h.last_update >= self.probe_interval_s)
+                ]
+            for alias in due:
+                if self._stop.is_set():
+                    return
+                try:
+                    # The probe's request is recorded in metrics → _on_record
+                    self.probe_fn(alias)
+                except Exception as e:
+                    print(f"[Router] Probe {alias} failed: {e}")
+            # Sleep until the next round, or until a new tier is watched
+            self._wake.wait(self.probe_interval_s)
+            self._wake.clear()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        metrics.get_registry().remove_sink(self._on_record)
+
+
+_routers: Dict[str, ModelRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(provider: str, factory: Callable[[], ModelRouter]) -> ModelRouter:
+    """Shared router per provider (created with factory() and probed on first use)."""
+    with _routers_lock:
+        router = _routers.get(provider)
+        if router is None:
+            router = factory()
+            router.start_probes()
+            _routers[provider] = router
+        return router
@@ -0,0 +1,93 @@
+"""
+Sentence splitting for speech output.
+
+SentenceSplitter works incrementally on streamed LLM text so each finished
+sentence can go to TTS while the rest is still being generated.
+split_sentences() does the same for a complete text.
+"""
+
+import re
+from typing import List, Optional
+
+# End of sentence: . ! ? … (possibly repeated / followed by quotes or
+# brackets) and then whitespace. Blank lines also end a sentence.
+_BOUNDARY = re.compile(r"[.!?…]+[\"'”’)\]]*\s+|\n\s*\n|\n(?=\s*(?:[-*•]|\d+[.)])\s)")
+
+# A list number ("2") alone at the start of a line, right before its "."
+_LIST_NUMBER = re.compile(r"(?:^|\n)[ \t]*\d+\Z")
+
+# Where to cut an over-long sentence, best candidate first
+_CLAUSE_BREAKS = (re.compile(r"[,;:—–]\s"), re.compile(r"\s"))
+
+
+class SentenceSplitter:
+    """
+    Feed text chunks, get back finished sentences.
+
+    - min_chars: a boundary before this many characters is ignored, so tiny
+      fragments like list numbers ("1.") are merged with what follows.
+    - max_chars: a sentence with no boundary yet is cut at the last clause
+      break (or space) once it grows past this, keeping TTS chunks short.
+    """
+
+    def __init__(self, min_chars: int = 8, max_chars: int = 240):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buf = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text; return the sentences it completed (maybe none)."""
+        self._buf += chunk
+        out: List[str] = []
+        while True:
+            sentence = self._next_sentence()
+            if sentence is None:
+                break
+            if sentence:
+                out.append(sentence)
+        return out
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left at the end of the stream."""
+        rest = self._buf.strip()
+        self._buf = ""
+        return rest or None
+
+    def _next_sentence(self) -> Optional[str]:
+        for match in _BOUNDARY.finditer(self._buf):
+            # "2. " opening a numbered list item is not the end of a sentence
+            # (but "năm 1990. " ending one is)
+            if self._buf[match.start()] == "." and _LIST_NUMBER.search(self._buf, 0, match.start()):
+                continue
+            if len(self._buf[:match.end()].strip()) >= self.min_chars:
+                sentence = self._buf[:match.end()].strip()
+                self._buf = self._buf[match.end():]
+                return sentence
+
+        if len(self._buf) > self.max_chars:
+            cut = _clause_cut(self._buf, self.max_chars)
+            sentence = self._buf[:cut].strip()
+            self._buf = self._buf[cut:]
+            return sentence
+        return None
+
+
+def _clause_cut(text: str, max_chars: int) -> int:
+    """Index to cut text at: last clause break within max_chars, else max_chars."""
+    window = text[:max_chars]
+    for pattern in _CLAUSE_BREAKS:
+        matches = list(pattern.finditer(window))
+        # Don't cut so early that we leave a tiny first piece
+        if matches and matches[-1].end() > max_chars // 3:
+            return matches[-1].end()
+    return max_chars
+
+
+def split_sentences(text: str, min_chars: int = 8, max_chars: int = 240) -> List[str]:
+    """Split a complete text into speakable sentences (same rules as SentenceSplitter)."""
+    splitter = SentenceSplitter(min_chars=min_chars, max_chars=max_chars)
+    sentences = splitter.feed(text)
+    rest = splitter.flush()
+    if rest:
+        sentences.append(rest)
+    return sentences
@@ -1,16 +1,29 @@
 """
 Speech-to-Text Module for Chatbot Translator Mini
 Supports English (en-US) and Vietnamese (vi-VN) recognition.
+
+listen_streaming() recognizes while the user is still talking: partial
+hypotheses (with the prefix that has stopped changing) go to a callback so
+translation / the assistant can start before the endpoint.
 """
 
 import sys
-from typing import Optional, List, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 try:
     import speech_recognition as sr
 except ImportError as e:
     raise RuntimeError("speech_recognition is required. Install with: pip install SpeechRecognition") from e
 
+from translator_mini import audio_codec, vad
+from translator_mini.mic_session import MicSession
+from translator_mini.stt_backends import STTBackend, get_backend
+
+# Backend argument: an STTBackend, a name ("google", "sphinx", "vosk") or None for the default
+BackendArg = Union[STTBackend, str, None]
+
 
 def list_microphones() -> List[Tuple[int, str]]:
     """
@@ -20,112 +33,370 @@ def list_microphones() -> List[Tuple[int, str]]:
     return list(enumerate(mics))
 
 
+AUTO_LANGUAGES = ["en-US", "vi-VN"]
+
+# Recognition requests for the candidate languages run side by side
+_recognition_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stt-recognize")
+# Partial-transcript jobs wait on _recognition_pool, so they must not run on it
+# (a saturated pool would deadlock); one job in flight per StreamingRecognizer
+_partial_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stt-partial")
+
+
+def capture(
+    mic_index: Optional[int] = None,
+    timeout: float = 5.0,
+    phrase_time_limit: Optional[float] = 10.0,
+    energy_threshold: int = 300,
+    session: Optional[MicSession] = None,
+) -> Optional[sr.AudioData]:
+    """
+    Record one phrase (from `session` if given, else a freshly opened mic).
+
+    With NumPy, leading/trailing silence is trimmed by the VAD before the
+    audio is uploaded anywhere.
+
+    Returns:
+        AudioData, or None on timeout / microphone error / no speech.
+    """
+    try:
+        if session is not None:
+            print("[STT] Listening… Speak now.")
+            audio = session.listen(timeout=timeout, phrase_time_limit=phrase_time_limit)
+        else:
+            recognizer = sr.Recognizer()
+            recognizer.energy_threshold = energy_threshold
+            mic_kwargs = {"device_index": mic_index} if mic_index is not None else {}
+            with sr.Microphone(**mic_kwargs) as source:
+                print("[STT] Calibrating for ambient noise…")
+                recognizer.adjust_for_ambient_noise(source, duration=0.6)
+                print("[STT] Listening… Speak now.")
+                audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+    except sr.WaitTimeoutError:
+        print("[STT] No speech detected within timeout.")
+        return None
+    except Exception as e:
+        print(f"[STT] Microphone error: {e}")
+        return None
+    return _trim_silence(audio)
+
+
+def _trim_silence(audio: sr.AudioData) -> Optional[sr.AudioData]:
+    if not vad.NUMPY_AVAILABLE:
+        return audio
+    trimmed = vad.trim(audio)
+    if trimmed is None:
+        print("[STT] No speech in the recording (VAD); skipping recognition.")
+        return None
+    before = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    after = len(trimmed.frame_data) / (trimmed.sample_rate * trimmed.sample_width)
+    if before - after >= 0.1:
+        print(f"[STT] Trimmed silence: {before:.1f}s → {after:.1f}s")
+    return trimmed
+
+
 def listen_and_recognize(
     mic_index: Optional[int] = None,
     language: str = "en-US",
     timeout: float = 5.0,
     phrase_time_limit: Optional[float] = 10.0,
     energy_threshold: int = 300,
+    session: Optional[MicSession] = None,
+    backend: BackendArg = None,
 ) -> Optional[str]:
     """
-    Listen from the selected microphone and recognize speech using Google's free Web Speech API.
+    Listen from the selected microphone and recognize speech (Google's free
+    Web Speech API by default, see stt_backends.py).
 
     Args:
         mic_index: index from list_microphones() or None for default
-        language: BCP-47 code like 'en-US', 'vi-VN', or 'auto' (tries en-US first, then vi-VN)
+        language: BCP-47 code like 'en-US', 'vi-VN', or 'auto' (en-US and
+            vi-VN recognized concurrently, most confident wins)
         timeout: seconds to wait for phrase start
         phrase_time_limit: max seconds to record phrase
         energy_threshold: ambient energy threshold
+        session: open MicSession to capture from (no reopen / recalibration
+            per call; see mic_session.py). mic_index and energy_threshold
+            are ignored when given.
+        backend: STT backend or its name (None = configured default)
 
     Returns:
         Recognized text or None if not understood.
     """
-    recognizer = sr.Recognizer()
-    recognizer.energy_threshold = energy_threshold
-
-    mic_kwargs = {"device_index": mic_index} if mic_index is not None else {}
-
-    try:
-        with sr.Microphone(**mic_kwargs) as source:
-            print("[STT] Calibrating for ambient noise…")
-            recognizer.adjust_for_ambient_noise(source, duration=0.6)
-            print("[STT] Listening… Speak now.")
-            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-    except sr.WaitTimeoutError:
-        print("[STT] No speech detected within timeout.")
-        return None
-    except Exception as e:
-        print(f"[STT] Microphone error: {e}")
+    audio = capture(mic_index, timeout, phrase_time_limit, energy_threshold, session)
+    if audio is None:
         return None
 
-    # Handle "auto" language detection
     if language == "auto":
-        # Try English first
-        text = _recognize_audio(recognizer, audio, "en-US")
-        if text:
-            return text
-        # Then try Vietnamese
-        print("[STT] Trying Vietnamese recognition...")
-        return _recognize_audio(recognizer, audio, "vi-VN")
-    else:
-        return _recognize_audio(recognizer, audio, language)
+        text, _ = recognize_multilingual(audio, AUTO_LANGUAGES, backend=backend)
+        return text
+    return recognize(audio, language, backend=backend)
 
 
-def _recognize_audio(recognizer: sr.Recognizer, audio: sr.AudioData, language: str) -> Optional[str]:
-    """
-    Internal function to recognize audio with specified language.
-    """
+def _resolve_backend(backend: BackendArg) -> STTBackend:
+    return backend if isinstance(backend, STTBackend) else get_backend(backend)
+
+
+def _recognize_candidate(backend: STTBackend, audio: sr.AudioData,
+                         language: str) -> Optional[Tuple[str, float]]:
+    """Best (transcript, confidence) for one language, or None."""
     try:
-        print(f"[STT] Recognizing ({language})…")
-        text = recognizer.recognize_google(audio, language=language)
-        print(f"[STT] Heard: {text}")
-        return text
+        return backend.recognize(audio, language)
     except sr.UnknownValueError:
-        print(f"[STT] Could not understand audio ({language}).")
         return None
     except sr.RequestError as e:
-        print(f"[STT] API unavailable or quota exceeded: {e}")
+        print(f"[STT] {backend.name} unavailable ({language}): {e}")
         return None
 
 
+def recognize(audio: sr.AudioData, language: str = "en-US", backend: BackendArg = None) -> Optional[str]:
+    """Recognize a recording in one language."""
+    backend = _resolve_backend(backend)
+    print(f"[STT] Recognizing ({language}, {backend.name})…")
+    candidate = _recognize_candidate(backend, audio, language)
+    if candidate is None:
+        print(f"[STT] Could not understand audio ({language}).")
+        return None
+    print(f"[STT] Heard: {candidate[0]}")
+    return candidate[0]
+
+
+def _candidates(backend: STTBackend, audio: sr.AudioData,
+                languages: Sequence[str]) -> List[Tuple[str, Tuple[str, float]]]:
+    """(language, (transcript, confidence)) for every language that understood the audio."""
+    futures = [_recognition_pool.submit(_recognize_candidate, backend, audio, lang) for lang in languages]
+    results = [(lang, future.result()) for lang, future in zip(languages, futures)]
+    return [(lang, result) for lang, result in results if result is not None]
+
+
+def _best(candidates: List[Tuple[str, Tuple[str, float]]]) -> Tuple[Optional[str], Optional[str]]:
+    """Most confident (text, language); ties go to the earlier language."""
+    best: Tuple[Optional[str], Optional[str]] = (None, None)
+    best_confidence = -1.0
+    for lang, (text, confidence) in candidates:
+        if confidence > best_confidence:
+            best, best_confidence = (text, lang), confidence
+    return best
+
+
+def _supported(backend: STTBackend, languages: Sequence[str]) -> List[str]:
+    return [lang for lang in languages if backend.supports(lang)] or list(languages[:1])
+
+
+def recognize_multilingual(
+    audio: sr.AudioData,
+    languages: Sequence[str] = AUTO_LANGUAGES,
+    backend: BackendArg = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Recognize one recording in several languages at once.
+
+    All requests run concurrently; the transcript with the highest
+    confidence wins (ties go to the earlier language in `languages`).
+    Languages the backend has no model for are skipped.
+
+    Returns:
+        Tuple of (recognized_text, detected_language) or (None, None)
+    """
+    backend = _resolve_backend(backend)
+    languages = _supported(backend, languages)
+    print(f"[STT] Recognizing ({', '.join(languages)}, {backend.name})…")
+    candidates = _candidates(backend, audio, languages)
+    for lang, (text, confidence) in candidates:
+        print(f"[STT]   {lang}: {text} (confidence {confidence:.2f})")
+    best = _best(candidates)
+
+    if best[0] is None:
+        print("[STT] Could not recognize in any language.")
+    else:
+        print(f"[STT] Heard ({best[1]}): {best[0]}")
+    return best
+
+
 def listen_multilingual(
     mic_index: Optional[int] = None,
     languages: List[str] = ["en-US", "vi-VN"],
     timeout: float = 5.0,
     phrase_time_limit: Optional[float] = 10.0,
+    session: Optional[MicSession] = None,
+    backend: BackendArg = None,
 ) -> Tuple[Optional[str], Optional[str]]:
     """
-    Listen and try to recognize in multiple languages.
+    Listen once and recognize in multiple languages concurrently.
     
     Returns:
         Tuple of (recognized_text, detected_language) or (None, None)
     """
-    recognizer = sr.Recognizer()
-    
-    mic_kwargs = {"device_index": mic_index} if mic_index is not None else {}
-    
+    audio = capture(mic_index, timeout, phrase_time_limit, session=session)
+    if audio is None:
+        return None, None
+    return recognize_multilingual(audio, languages, backend=backend)
+
+
+# ==============================================================================
+# STREAMING (PARTIAL) RECOGNITION
+# ==============================================================================
+
+PARTIAL_INTERVAL_S = 1.0   # new audio between two partial recognitions
+PAUSE_TRIGGER_MS = 120     # a pause this long triggers a partial right away
+
+
+class PartialTranscript(NamedTuple):
+    text: str
+    stable: str                 # prefix unchanged since the previous hypothesis
+    language: Optional[str]
+    final: bool
+
+
+def stable_prefix(previous: str, current: str) -> str:
+    """Longest common word prefix of two hypotheses (case-insensitive)."""
+    words = current.split()
+    count = 0
+    for old, new in zip(previous.split(), words):
+        if old.lower() != new.lower():
+            break
+        count += 1
+    return " ".join(words[:count])
+
+
+class StreamingRecognizer:
+    """
+    Partial hypotheses while a phrase is being recorded.
+
+    Feed it the phrase as it is captured (MicSession.listen's on_chunk).
+    Every PARTIAL_INTERVAL_S of new audio, and as soon as the VAD hears a
+    pause, the whole phrase so far is recognized again in the background:
+    the windows overlap, so a word cut at the end of one window is heard
+    whole in the next. At most one request is in flight; the newest audio
+    wins. finish() gives the final hypothesis, reusing the last partial when
+    it already covered all the speech (no extra round trip at the endpoint).
+    """
+
+    def __init__(
+        self,
+        languages: Sequence[str],
+        sample_rate: int,
+        sample_width: int,
+        backend: BackendArg = None,
+        on_partial: Optional[Callable[[PartialTranscript], None]] = None,
+        interval_s: float = PARTIAL_INTERVAL_S,
+    ):
+        self.backend = _resolve_backend(backend)
+        self.languages = _supported(self.backend, languages)
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.on_partial = on_partial
+        self.interval_bytes = int(interval_s * sample_rate) * sample_width
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buf = bytearray()
+        self._next_at = self.interval_bytes
+        self._endpointer = vad.Endpointer(self.sample_rate, self.sample_width) if vad.NUMPY_AVAILABLE else None
+        self._paused = False
+        self._due = False
+        # (bytes covered, future of (text, language)) of the newest request
+        self._latest: Optional[Tuple[int, "Future[Tuple[Optional[str], Optional[str]]]"]] = None
+        self._previous = ""
+
+    def feed(self, data: bytes, start: bool = False) -> None:
+        with self._lock:
+            if start:
+                self._reset()
+            self._buf += data
+            self._due = self._due or len(self._buf) >= self._next_at
+            if self._endpointer is not None:
+                self._endpointer.feed(data)
+                paused = self._endpointer.pause_ms >= PAUSE_TRIGGER_MS
+                # Speaker just stopped: this window may already be the final one
+                # (still due if a request is in flight, sent once it returns)
+                self._due = self._due or (paused and not self._paused)
+                self._paused = paused
+            if self._due and (self._latest is None or self._latest[1].done()):
+                self._due = False
+                self._next_at = len(self._buf) + self.interval_bytes
+                audio = sr.AudioData(bytes(self._buf), self.sample_rate, self.sample_width)
+                self._latest = (len(self._buf), _partial_pool.submit(self._recognize, audio))
+
+    def _recognize(self, audio: sr.AudioData) -> Tuple[Optional[str], Optional[str]]:
+        text, language = _best(_candidates(self.backend, audio, self.languages))
+        if text:
+            with self._lock:
+                stable = stable_prefix(self._previous, text)
+                self._previous = text
+            if self.on_partial is not None:
+                self.on_partial(PartialTranscript(text, stable, language, False))
+        return text, language
+
+    def finish(self, audio: sr.AudioData) -> Tuple[Optional[str], Optional[str]]:
+        """Final (text, language) for the recorded phrase."""
+        speech_end = len(audio.frame_data)
+        trimmed = audio
+        if vad.NUMPY_AVAILABLE:
+            samples = audio_codec.pcm_to_int16(audio.frame_data, audio.sample_width)
+            bounds = vad.speech_bounds(samples, audio.sample_rate)
+            if bounds is None:
+                print("[STT] No speech in the recording (VAD); skipping recognition.")
+                return None, None
+            # bounds end HANGOVER_MS after the last speech frame; a window that
+            # reached PAUSE_TRIGGER_MS into that pause heard everything
+            slack = (vad.HANGOVER_MS - PAUSE_TRIGGER_MS) * audio.sample_rate // 1000
+            speech_end = (bounds[1] - slack if bounds[1] < len(samples) else bounds[1]) * audio.sample_width
+            trimmed = sr.AudioData(samples[bounds[0]:bounds[1]].tobytes(), audio.sample_rate, 2)
+
+        with self._lock:
+            latest = self._latest
+        if latest is not None and latest[0] >= speech_end:
+            text, language = latest[1].result()
+            if text:
+                print(f"[STT] Heard ({language}, from the last partial): {text}")
+        elif len(self.languages) > 1:
+            text, language = recognize_multilingual(trimmed, self.languages, self.backend)
+        else:
+            language = self.languages[0]
+            text = recognize(trimmed, language, self.backend)
+        if text and self.on_partial is not None:
+            self.on_partial(PartialTranscript(text, text, language, True))
+        return text, language
+
+
+def listen_streaming(
+    mic_index: Optional[int] = None,
+    languages: Sequence[str] = ("en-US",),
+    timeout: float = 5.0,
+    phrase_time_limit: Optional[float] = 10.0,
+    session: Optional[MicSession] = None,
+    backend: BackendArg = None,
+    on_partial: Optional[Callable[[PartialTranscript], None]] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Listen once, emitting partial hypotheses while the user speaks.
+
+    on_partial runs on a recognition thread for every partial and once
+    more for the final transcript (final=True). Without a session, a
+    MicSession is opened just for this phrase.
+
+    Returns:
+        Tuple of (recognized_text, detected_language) or (None, None)
+    """
+    own_session = session is None
     try:
-        with sr.Microphone(**mic_kwargs) as source:
-            print("[STT] Calibrating...")
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            print("[STT] Listening...")
-            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+        if own_session:
+            session = MicSession(mic_index)
+        if session.sample_rate is None:
+            session.start()
+        streamer = StreamingRecognizer(languages, session.sample_rate, session.sample_width,
+                                       backend=backend, on_partial=on_partial)
+        print("[STT] Listening… Speak now.")
+        audio = session.listen(timeout=timeout, phrase_time_limit=phrase_time_limit,
+                               on_chunk=streamer.feed)
     except sr.WaitTimeoutError:
-        print("[STT] No speech detected.")
+        print("[STT] No speech detected within timeout.")
         return None, None
     except Exception as e:
         print(f"[STT] Microphone error: {e}")
         return None, None
-    
-    # Try each language
-    for lang in languages:
-        try:
-            text = recognizer.recognize_google(audio, language=lang)
-            if text:
-                print(f"[STT] Recognized ({lang}): {text}")
-                return text, lang
-        except (sr.UnknownValueError, sr.RequestError):
-            continue
-    
-    print("[STT] Could not recognize in any language.")
-    return None, None
+    finally:
+        if own_session and session is not None:
+            session.close()
+    return streamer.finish(audio)
@@ -0,0 +1,137 @@
+"""
+Incremental Server-Sent Events decoder.
+
+Bytes go in as they come off the socket; each event comes out as soon as
+its terminating blank line has arrived. Nothing waits for a fixed-size
+read buffer to fill up, which is what delays tokens with iter_lines().
+
+Follows the SSE spec's parsing rules: LF / CRLF / CR line endings, multi-line
+`data:` fields joined with "\n", comment lines (":" keep-alives) ignored,
+`event:` / `id:` / `retry:` fields kept on the event.
+"""
+
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional
+
+# Bytes asked for per socket read; read1() returns whatever is available
+# (up to this) without waiting for more
+READ_SIZE = 64 * 1024
+
+
+class SSEEvent(NamedTuple):
+    data: str
+    event: str = "message"
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+
+class SSEDecoder:
+    """Feed raw bytes, get back completed events."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._data: List[str] = []
+        self._event = ""
+        self._retry: Optional[int] = None
+        self._last_id: Optional[str] = None
+        self._pending_cr = False
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Add received bytes; return the events they completed (maybe none)."""
+        buf = self._buf
+        buf += chunk
+        events: List[SSEEvent] = []
+        pos = 0
+
+        # A CR at the end of the previous chunk may be the first half of CRLF
+        if self._pending_cr and pos < len(buf):
+            if buf[pos] == 0x0A:
+                pos += 1
+            self._pending_cr = False
+
+        while True:
+            lf = buf.find(b"\n", pos)
+            cr = buf.find(b"\r", pos)
+            if lf < 0 and cr < 0:
+                break
+            end = lf if cr < 0 or (0 <= lf < cr) else cr
+            line = buf[pos:end]
+            pos = end + 1
+            if buf[end] == 0x0D:
+                if pos < len(buf):
+                    if buf[pos] == 0x0A:
+                        pos += 1
+                else:
+                    self._pending_cr = True
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+
+        # Drop parsed bytes in one go instead of once per line
+        if pos:
+            del buf[:pos]
+        return events
+
+    def _process_line(self, line: bytearray) -> Optional[SSEEvent]:
+        if not line:
+            return self._dispatch()
+        if line[:1] == b":":
+            return None  # comment / keep-alive
+        field, sep, value = line.partition(b":")
+        if sep and value[:1] == b" ":
+            value = value[1:]
+        name = field.decode("utf-8", "replace")
+        text = value.decode("utf-8", "replace")
+        if name == "data":
+            self._data.append(text)
+        elif name == "event":
+            self._event = text
+        elif name == "id":
+            if "\x00" not in text:
+                self._last_id = text
+        elif name == "retry":
+            if text.isdigit():
+                self._retry = int(text)
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        if not self._data:
+            self._event = ""
+            return None
+        event = SSEEvent(
+            data="\n".join(self._data),
+            event=self._event or "message",
+            id=self._last_id,
+            retry=self._retry,
+        )
+        self._data = []
+        self._event = ""
+        self._retry = None
+        return event
+
+
+def iter_sse(response) -> Iterator[SSEEvent]:
+    """
+    Yield events from a streaming `requests` response as they arrive.
+
+    Reads with urllib3's read1(), which returns as soon as any bytes are
+    available (chunked transfer-encoding and gzip/deflate Content-Encoding
+    are decoded underneath).
+    """
+    decoder = SSEDecoder()
+    raw = response.raw
+    read1 = getattr(raw, "read1", None)
+    if read1 is None:
+        # urllib3 < 2: stream(None) yields each chunk as received
+        chunks: Iterator[bytes] = raw.stream(None, decode_content=True)
+    else:
+        chunks = iter(lambda: read1(READ_SIZE, decode_content=True), b"")
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+
+
+async def aiter_sse(response) -> AsyncIterator[SSEEvent]:
+    """Async version of iter_sse() for an aiohttp response."""
+    decoder = SSEDecoder()
+    async for chunk in response.content.iter_any():
+        for event in decoder.feed(chunk):
+            yield event
@@ -0,0 +1,267 @@
+"""
+Speech-to-text backends.
+
+- google: Google Web Speech API (default; online, free, no SLA). With NumPy
+  (and SpeechRecognition >= 3.11, which has recognizers.google) the upload
+  is encoded in-process (audio_codec) and POSTed over a keep-alive session
+  instead of forking `flac` and opening a new connection per utterance;
+  otherwise it goes through recognize_google().
+- sphinx: CMU PocketSphinx via speech_recognition (offline, en-US out of the box)
+- vosk:   Vosk/Kaldi (offline, small models for en-US and vi-VN)
+
+Pick one with --stt-backend or TRANSLATOR_MINI_STT_BACKEND. Every backend
+returns the best (transcript, confidence) for one language, so
+speech_to_text can compare languages the same way whatever engine runs.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+import speech_recognition as sr
+from requests.adapters import HTTPAdapter
+
+from translator_mini import audio_codec, resilience
+from translator_mini.resilience import CircuitOpenError, RateLimitedError, TransientError
+from translator_mini.translation_cache import default_cache_dir
+
+try:
+    import pocketsphinx  # noqa: F401  (used through Recognizer.recognize_sphinx)
+    SPHINX_AVAILABLE = True
+except ImportError:
+    SPHINX_AVAILABLE = False
+
+# Request builder / response parser of recognize_google (SpeechRecognition 3.11+)
+try:
+    from speech_recognition.recognizers import google as sr_google
+    SR_GOOGLE_AVAILABLE = hasattr(sr_google, "create_request_builder") and hasattr(sr_google, "OutputParser")
+except ImportError:
+    SR_GOOGLE_AVAILABLE = False
+
+try:
+    import vosk
+    vosk.SetLogLevel(-1)
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+DEFAULT_BACKEND = "google"
+
+# Google only sometimes sends a confidence; 0.5 is its own default
+DEFAULT_CONFIDENCE = 0.5
+
+GOOGLE_TIMEOUT_S = 10.0
+
+# Vosk model directory per language: $TRANSLATOR_MINI_VOSK_MODELS/<lang>
+# (e.g. vosk-model-small-en-us-0.15 → .../vosk/en-US, vosk-model-small-vn-0.4 → .../vosk/vi-VN)
+VOSK_SAMPLE_RATE = 16000
+
+# (transcript, confidence)
+Candidate = Tuple[str, float]
+
+
+class STTBackend:
+    """Recognize one AudioData in one language."""
+
+    name = "base"
+    offline = False
+
+    def available(self) -> bool:
+        return True
+
+    def supports(self, language: str) -> bool:
+        return True
+
+    def warm_up(self, language: str) -> None:
+        """Load whatever the first recognition would otherwise wait for."""
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Optional[Candidate]:
+        """
+        Best (transcript, confidence) or None if nothing was understood.
+
+        Raises sr.RequestError when the engine can't run (network down,
+        missing model, ...).
+        """
+        raise NotImplementedError
+
+
+class GoogleBackend(STTBackend):
+    """
+    Web Speech API v2 (the endpoint recognize_google uses).
+
+    Audio goes up as 16 kHz mono FLAC from audio_codec, over one pooled
+    requests.Session (several connections, for concurrent languages).
+    """
+
+    name = "google"
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    def _http(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+                self._session = session
+            return self._session
+
+    def _post(self, audio: sr.AudioData, language: str) -> str:
+        url = sr_google.create_request_builder(
+            endpoint=sr_google.ENDPOINT, key=self.key, language=language
+        ).build_url()
+        body = audio_codec.encode_for_stt(audio)
+        headers = {"Content-Type": f"audio/x-flac; rate={audio_codec.STT_SAMPLE_RATE}"}
+
+        def attempt() -> str:
+            try:
+                response = self._http().post(url, data=body, headers=headers, timeout=GOOGLE_TIMEOUT_S)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                raise TransientError(f"recognition connection failed: {e}") from e
+            except requests.RequestException as e:
+                raise sr.RequestError(f"recognition connection failed: {e}")
+            if response.status_code == 429:
+                raise RateLimitedError("recognition request throttled: 429",
+                                       retry_after=resilience.parse_retry_after(response.headers.get("Retry-After")))
+            if response.status_code >= 500:
+                raise TransientError(f"recognition request failed: {response.status_code} {response.reason}")
+            if response.status_code != 200:
+                raise sr.RequestError(f"recognition request failed: {response.status_code} {response.reason}")
+            return response.content.decode("utf-8")
+
+        # Rate limit + retry on 429/5xx + circuit breaker (see resilience.py)
+        try:
+            return resilience.call("google_stt", attempt, key=self.key)
+        except (TransientError, CircuitOpenError) as e:
+            raise sr.RequestError(str(e)) from e
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Optional[Candidate]:
+        try:
+            if audio_codec.NUMPY_AVAILABLE and SR_GOOGLE_AVAILABLE:
+                result = sr_google.OutputParser.convert_to_result(self._post(audio, language))
+            else:
+                result = sr.Recognizer().recognize_google(audio, key=self.key, language=language, show_all=True)
+        except sr.UnknownValueError:
+            return None
+        # Older SpeechRecognition returns [] instead of raising when nothing was heard
+        alternatives = result.get("alternative", []) if isinstance(result, dict) else []
+        if not alternatives:
+            return None
+        best = max(alternatives, key=lambda alt: alt.get("confidence", 0.0))
+        return best["transcript"], float(best.get("confidence", DEFAULT_CONFIDENCE))
+
+
+class SphinxBackend(STTBackend):
+    """PocketSphinx through speech_recognition's recognize_sphinx hook."""
+
+    name = "sphinx"
+    offline = True
+
+    def available(self) -> bool:
+        return SPHINX_AVAILABLE
+
+    def supports(self, language: str) -> bool:
+        # Languages with a pocketsphinx-data/<lang> directory (en-US ships with it)
+        data_dir = os.path.join(os.path.dirname(sr.__file__), "pocketsphinx-data", language)
+        return os.path.isdir(data_dir)
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Optional[Candidate]:
+        try:
+            text = sr.Recognizer().recognize_sphinx(audio, language=language)
+        except sr.UnknownValueError:
+            return None
+        return (text, DEFAULT_CONFIDENCE) if text else None
+
+
+class VoskBackend(STTBackend):
+    """
+    Vosk with one loaded model per language.
+
+    speech_recognition's recognize_vosk hook loads the model from a single
+    fixed path on every call (seconds per utterance), so models are loaded
+    here once and kept.
+    """
+
+    name = "vosk"
+    offline = True
+
+    def __init__(self, model_dir: Optional[str] = None):
+        self.model_dir = model_dir or os.getenv("TRANSLATOR_MINI_VOSK_MODELS") or os.path.join(
+            default_cache_dir(), "vosk"
+        )
+        self._models: Dict[str, "vosk.Model"] = {}
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return VOSK_AVAILABLE and os.path.isdir(self.model_dir)
+
+    def supports(self, language: str) -> bool:
+        return os.path.isdir(os.path.join(self.model_dir, language))
+
+    def warm_up(self, language: str) -> None:
+        self._model(language)
+
+    def _model(self, language: str) -> "vosk.Model":
+        with self._lock:
+            model = self._models.get(language)
+            if model is None:
+                path = os.path.join(self.model_dir, language)
+                if not VOSK_AVAILABLE or not os.path.isdir(path):
+                    raise sr.RequestError(f"no Vosk model for {language} in {self.model_dir}")
+                print(f"[STT] Loading Vosk model {path}…")
+                model = self._models[language] = vosk.Model(path)
+            return model
+
+    def recognize(self, audio: sr.AudioData, language: str) -> Optional[Candidate]:
+        recognizer = vosk.KaldiRecognizer(self._model(language), VOSK_SAMPLE_RATE)
+        recognizer.SetWords(True)
+        if audio_codec.NUMPY_AVAILABLE:
+            pcm = audio_codec.to_stt_samples(audio, VOSK_SAMPLE_RATE).tobytes()
+        else:
+            pcm = audio.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2)
+        recognizer.AcceptWaveform(pcm)
+        result = json.loads(recognizer.FinalResult())
+        text = result.get("text", "").strip()
+        if not text:
+            return None
+        words = result.get("result") or []
+        confidence = (sum(w.get("conf", 0.0) for w in words) / len(words)) if words else DEFAULT_CONFIDENCE
+        return text, confidence
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "sphinx": SphinxBackend,
+    "vosk": VoskBackend,
+}
+
+_instances: Dict[str, STTBackend] = {}
+_default_name: Optional[str] = None
+
+
+def get_backend(name: Optional[str] = None) -> STTBackend:
+    """
+    Backend by name; None = the configured default
+    (set_default_backend() > $TRANSLATOR_MINI_STT_BACKEND > google).
+    """
+    name = (name or _default_name or os.getenv("TRANSLATOR_MINI_STT_BACKEND") or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STT backend: {name} (expected one of {', '.join(BACKENDS)})")
+    backend = _instances.get(name)
+    if backend is None:
+        backend = _instances[name] = BACKENDS[name]()
+    return backend
+
+
+def set_default_backend(name: str) -> STTBackend:
+    """Use `name` for every recognition that doesn't pass a backend."""
+    global _default_name
+    backend = get_backend(name)
+    if not backend.available():
+        print(f"[STT] Backend '{name}' is not installed / has no model; recognition will fail")
+    _default_name = name.lower()
+    return backend
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+audio_codec tests (in-process conversion, no external tools)
+
+The FLAC tests decode the encoder's output with a small reference decoder
+written from the format spec (the subset the encoder emits), with its own
+bit-by-bit CRCs, so neither the encoder's CRC tables nor its bit packing
+check themselves.
+"""
+
+import numpy as np
+import pytest
+
+from translator_mini import audio_codec
+
+
+def _pcm(width: int, count: int = 999) -> bytes:
+    return np.random.default_rng(0).integers(0, 256, size=width * count, dtype=np.uint8).tobytes()
+
+
+def test_rms_fallback_matches_numpy():
+    """The pure-Python rms (no NumPy, no audioop) agrees with the NumPy one"""
+    for width in (1, 2, 4):
+        data = _pcm(width)
+        assert audio_codec._rms_python(data, width) == audio_codec.rms(data, width)
+    # 24-bit: NumPy goes through the int16 view, so only the top 16 bits count
+    data = _pcm(3)
+    assert abs(audio_codec._rms_python(data, 3) - audio_codec.rms(data, 3)) <= 256
+
+
+def test_rms_of_silence_and_partial_samples():
+    assert audio_codec.rms(b"", 2) == 0
+    assert audio_codec.rms(bytes(101), 2) == 0
+    assert audio_codec._rms_python(np.full(10, -1000, dtype="<i2").tobytes(), 2) == 1000
+
+
+# ==============================================================================
+# FLAC ROUND TRIP
+# ==============================================================================
+
+def _crc(data: bytes, poly: int, width: int) -> int:
+    """Plain MSB-first CRC, one bit at a time."""
+    crc, top, mask = 0, 1 << (width - 1), (1 << width) - 1
+    for byte in data:
+        crc ^= byte << (width - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & top else crc << 1
+            crc &= mask
+    return crc
+
+
+class _Bits:
+    def __init__(self, data: bytes, byte_pos: int):
+        self.bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+        self.pos = byte_pos * 8
+
+    def read(self, count: int) -> int:
+        value = 0
+        for bit in self.bits[self.pos:self.pos + count]:
+            value = (value << 1) | int(bit)
+        self.pos += count
+        return value
+
+    def signed(self, count: int) -> int:
+        value = self.read(count)
+        return value - (1 << count) if value >> (count - 1) else value
+
+    def unary(self) -> int:
+        zeros = int(np.argmax(self.bits[self.pos:]))
+        assert self.bits[self.pos + zeros] == 1
+        self.pos += zeros + 1
+        return zeros
+
+    def align(self) -> None:
+        self.pos = -(-self.pos // 8) * 8
+
+    @property
+    def byte_pos(self) -> int:
+        assert self.pos % 8 == 0
+        return self.pos // 8
+
+
+_FIXED = {0: [], 1: [1], 2: [2, -1], 3: [3, -3, 1], 4: [4, -6, 4, -1]}
+
+
+def _block_size(code: int, bits: _Bits) -> int:
+    if code == 1:
+        return 192
+    if 2 <= code <= 5:
+        return 576 << (code - 2)
+    if code == 6:
+        return bits.read(8) + 1
+    if code == 7:
+        return bits.read(16) + 1
+    return 256 << (code - 8)
+
+
+def _decode_subframe(bits: _Bits, n: int) -> list:
+    assert bits.read(1) == 0
+    kind = bits.read(6)
+    assert bits.read(1) == 0  # no wasted bits
+    if kind == 0:
+        return [bits.signed(16)] * n
+    if kind == 1:
+        return [bits.signed(16) for _ in range(n)]
+    assert 8 <= kind <= 12, kind
+    order = kind - 8
+    x = [bits.signed(16) for _ in range(order)]
+    assert bits.read(2) == 0 and bits.read(4) == 0  # Rice, one partition
+    k = bits.read(4)
+    assert k != 15
+    for _ in range(n - order):
+        u = (bits.unary() << k) | bits.read(k)
+        residual = (u >> 1) ^ -(u & 1)
+        x.append(residual + sum(c * x[-1 - i] for i, c in enumerate(_FIXED[order])))
+    return x
+
+
+def _decode_flac(data: bytes):
+    """(sample rate, total samples, samples) of a mono 16-bit FLAC stream."""
+    assert data[:4] == b"fLaC"
+    assert data[4] == 0x80 and int.from_bytes(data[5:8], "big") == 34  # last block: STREAMINFO
+    packed = int.from_bytes(data[18:26], "big")
+    rate, channels, depth, total = packed >> 44, (packed >> 41) & 7, (packed >> 36) & 31, packed & (2 ** 36 - 1)
+    assert (channels, depth) == (0, 15)
+
+    pos, samples, number = 42, [], 0
+    while pos < len(data):
+        bits = _Bits(data, pos)
+        assert bits.read(16) == 0xFFF8
+        size_code, rate_code = bits.read(4), bits.read(4)
+        assert bits.read(4) == 0 and bits.read(3) == 0b100 and bits.read(1) == 0  # mono, 16 bit
+        lead = bits.read(8)
+        extra = 0
+        while lead & (0x80 >> extra) and extra < 7:
+            extra += 1
+        value = lead & (0xFF >> (extra + 1))
+        for _ in range(max(0, extra - 1)):
+            value = (value << 6) | (bits.read(8) & 0x3F)
+        assert value == number
+        n = _block_size(size_code, bits)
+        assert rate_code in (0, audio_codec._SAMPLE_RATE_CODES.get(rate, 0))
+        header_end = bits.byte_pos
+        assert bits.read(8) == _crc(data[pos:header_end], 0x07, 8), "header CRC-8"
+
+        samples.extend(_decode_subframe(bits, n))
+        bits.align()
+        frame_end = bits.byte_pos
+        assert bits.read(16) == _crc(data[pos:frame_end], 0x8005, 16), "frame CRC-16"
+        pos, number = frame_end + 2, number + 1
+    return rate, total, np.array(samples, dtype=np.int64)
+
+
+def _tone(count: int) -> np.ndarray:
+    t = np.arange(count)
+    return (np.sin(t * 0.05) * 8000 + np.random.default_rng(1).normal(0, 50, count)).astype(np.int16)
+
+
+@pytest.mark.parametrize("samples", [
+    np.zeros(5000, dtype=np.int16),                                          # silence (CONSTANT)
+    np.array([-1234], dtype=np.int16),                                       # one sample
+    _tone(2 * audio_codec.FLAC_BLOCK_SIZE + 123),                            # partial last block
+    np.tile(np.array([-32768, 32767], dtype=np.int16), 3000),                # full scale
+    np.random.default_rng(2).integers(-32768, 32768, 6000).astype(np.int16),  # noise (VERBATIM)
+], ids=["silence", "one-sample", "partial-block", "full-scale", "noise"])
+def test_flac_round_trip(samples):
+    rate, total, decoded = _decode_flac(audio_codec.FlacEncoder().encode(samples, 16000))
+    assert rate == 16000
+    assert total == len(samples)
+    assert np.array_equal(decoded, samples.astype(np.int64))
+
+
+def test_flac_odd_block_size_and_rate():
+    samples = _tone(1000)
+    data = audio_codec.FlacEncoder(block_size=300).encode(samples, 11025)
+    rate, total, decoded = _decode_flac(data)
+    assert (rate, total) == (11025, 1000)
+    assert np.array_equal(decoded, samples.astype(np.int64))
+
+
+def test_crc16_matches_bitwise_reference():
+    data = np.random.default_rng(3).integers(0, 256, 5000, dtype=np.uint8).tobytes()
+    for size in (0, 1, 63, 64, 65, 1000, 5000):
+        assert audio_codec._crc16(data[:size]) == _crc(data[:size], 0x8005, 16)
+
+
+# ==============================================================================
+# RESAMPLING
+# ==============================================================================
+
+def _sine(freq: float, rate: int, seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * freq * t) * 10000).astype(np.int16)
+
+
+@pytest.mark.parametrize("src_rate", [8000, 16000, 22050, 44100, 48000])
+def test_resample_length_and_pitch(src_rate):
+    y = audio_codec.resample(_sine(440, src_rate), src_rate, 16000)
+    assert y.dtype == np.int16
+    assert len(y) == int(src_rate * 16000 / src_rate)
+    peak_hz = np.argmax(np.abs(np.fft.rfft(y))) * 16000 / len(y)
+    assert abs(peak_hz - 440) <= 2
+
+
+def test_resample_filters_what_would_alias():
+    """A 12 kHz tone can't be represented at 16 kHz and must not fold down to 4 kHz"""
+    y = audio_codec.resample(_sine(12000, 48000), 48000, 16000)
+    assert np.sqrt(np.mean(y[100:-100].astype(float) ** 2)) < 100
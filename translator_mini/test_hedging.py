@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Hedged request tests with fake attempts (no network)
+"""
+
+import threading
+
+from translator_mini.hedging import hedged_stream, on_cancel
+
+
+def test_loser_is_closed_when_winner_is_chosen():
+    """A loser blocked before its first chunk gets its closer called"""
+    closed = threading.Event()
+
+    def slow():
+        # Stands in for a response still waiting for its first byte
+        on_cancel(closed.set)
+        if not closed.wait(5.0):
+            yield "too late"
+
+    def fast():
+        yield "Xin chào"
+
+    assert list(hedged_stream([slow, fast], hedge_after_s=0.05)) == ["Xin chào"]
+    assert closed.wait(1.0)
+
+
+def test_fails_over_on_error():
+    def broken():
+        raise RuntimeError("503")
+        yield  # pragma: no cover
+
+    def backup():
+        yield "ok"
+
+    assert list(hedged_stream([broken, backup], hedge_after_s=5.0)) == ["ok"]
+
+
+def test_on_cancel_outside_hedging_is_a_no_op():
+    on_cancel(lambda: (_ for _ in ()).throw(AssertionError("called")))
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+ConversationHistory tests (summary placement, no network)
+"""
+
+from translator_mini.gemini_client import _to_contents
+from translator_mini.history import ConversationHistory
+
+PROMPT = "Bạn là trợ lý AI."
+
+
+def test_summary_does_not_change_the_system_prompt():
+    history = ConversationHistory(PROMPT)
+    before = history.build("xin chào")
+    history.summary = "- User is planning a trip to Huế"
+    after = history.build("xin chào")
+
+    assert before[0] == after[0] == {"role": "system", "content": PROMPT}
+    assert after[1]["role"] == "system" and "Huế" in after[1]["content"]
+
+
+def test_gemini_sends_the_summary_as_a_leading_turn():
+    """The system instruction (and the context cache keyed on it) survives summary updates"""
+    history = ConversationHistory(PROMPT)
+    history.summary = "- User is planning a trip to Huế"
+    system_instruction, contents = _to_contents(history.build("còn Hội An?"))
+
+    assert system_instruction == PROMPT
+    assert contents == [{"role": "user", "parts": [history.build("")[1]["content"], "còn Hội An?"]}]
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+MicSession regression tests with a fake microphone (no audio device needed)
+"""
+
+import time
+
+import numpy as np
+import pytest
+import speech_recognition as sr
+
+from translator_mini.mic_session import MicSession
+
+
+class NoiseSource(sr.AudioSource):
+    """Endless white noise at real-time pace, like a mic next to a fan."""
+
+    def __init__(self, level: float = 3000.0, sample_rate: int = 16000, chunk: int = 1024):
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk
+        self.level = level
+        self.stream = None
+
+    def __enter__(self):
+        self.stream = self
+        return self
+
+    def __exit__(self, *exc):
+        self.stream = None
+
+    def read(self, size: int) -> bytes:
+        time.sleep(size / self.SAMPLE_RATE)
+        noise = np.random.default_rng().normal(0.0, self.level, size)
+        return np.clip(noise, -32768, 32767).astype("<i2").tobytes()
+
+
+class ScriptedSource(NoiseSource):
+    """Plays `script` chunk by chunk (int16 arrays), then silence."""
+
+    def __init__(self, script, **kwargs):
+        super().__init__(**kwargs)
+        self.script = list(script)
+
+    def read(self, size: int) -> bytes:
+        time.sleep(size / self.SAMPLE_RATE)
+        chunk = self.script.pop(0) if self.script else np.zeros(size, dtype="<i2")
+        return chunk.astype("<i2").tobytes()
+
+
+def test_pre_roll_excludes_audio_before_listen():
+    """Audio heard before listen() (e.g. our own TTS tail) is not in the phrase"""
+    chunk = 1024
+    marker = np.full(chunk, 7000)                       # "TTS" playing before listen()
+    tone = np.where(np.arange(chunk) % 40 < 20, 3000, -3000)
+    script = [marker] * 5 + [np.zeros(chunk)] * 5 + [tone] * 10
+    with MicSession(energy_threshold=300, use_vad=False, source=ScriptedSource(script, chunk=chunk)) as mic:
+        time.sleep(0.45)                                # the markers have been read
+        audio = mic.listen(timeout=3.0, phrase_time_limit=5.0)
+    samples = np.frombuffer(audio.frame_data, dtype="<i2")
+    assert np.count_nonzero(samples == 3000) > 0
+    assert np.count_nonzero(samples == 7000) == 0
+
+
+def test_listen_times_out_on_steady_noise():
+    """Loud non-speech noise must not keep listen() waiting past its timeout"""
+    with MicSession(energy_threshold=300, source=NoiseSource()) as mic:
+        started = time.monotonic()
+        with pytest.raises(sr.WaitTimeoutError):
+            mic.listen(timeout=2.0, phrase_time_limit=15.0)
+        assert time.monotonic() - started < 4.0
+
+
+def test_rejected_noise_raises_dynamic_threshold(tmp_path):
+    """After the VAD rejects noise, the dynamic threshold moves above it"""
+    calibration = str(tmp_path / "mic_calibration.json")
+    with MicSession(source=NoiseSource(), calibration_file=calibration) as mic:
+        with pytest.raises(sr.WaitTimeoutError):
+            mic.listen(timeout=2.0, phrase_time_limit=15.0)
+        assert mic.energy_threshold > 3000
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+OfflineSpeaker tests with a fake pyttsx3 engine (no audio)
+"""
+
+import threading
+import time
+import types
+from collections import defaultdict
+
+import pytest
+
+from translator_mini import offline_tts
+
+
+class FakeEngine:
+    """Speaks one word per 20 ms, firing the callbacks pyttsx3 fires."""
+
+    def __init__(self, fail_after_start: bool = False):
+        self.fail_after_start = fail_after_start
+        self.callbacks = defaultdict(list)
+        self.queued = []
+        self.spoken = []
+        self.stop_threads = []
+        self._stopped = False
+
+    def connect(self, topic, callback):
+        self.callbacks[topic].append(callback)
+
+    def getProperty(self, name):
+        return [] if name == "voices" else "default"
+
+    def setProperty(self, name, value):
+        pass
+
+    def say(self, text):
+        self.queued.append(text)
+
+    def stop(self):
+        self.stop_threads.append(threading.current_thread().name)
+        self._stopped = True
+
+    def runAndWait(self):
+        self._stopped = False
+        queued, self.queued = self.queued, []
+        for text in queued:
+            for callback in self.callbacks["started-utterance"]:
+                callback(name=None)
+            self.spoken.append(text)
+            if self.fail_after_start:
+                raise RuntimeError("driver died")
+            for word in text.split():
+                if self._stopped:
+                    return
+                for callback in self.callbacks["started-word"]:
+                    callback(name=word, location=0, length=len(word))
+                time.sleep(0.02)
+
+
+class Engines(list):
+    """Engines created by the speaker; `fail` makes the next ones die mid-utterance."""
+
+    fail = False
+
+    def init(self, driver_name=None):
+        self.append(FakeEngine(fail_after_start=self.fail))
+        return self[-1]
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    engines = Engines()
+    monkeypatch.setattr(offline_tts, "pyttsx3", types.SimpleNamespace(init=engines.init))
+    return engines
+
+
+@pytest.fixture
+def speaker(engines):
+    speaker = offline_tts.OfflineSpeaker()
+    yield speaker
+    speaker.close()
+
+
+def test_requests_are_spoken_in_order(speaker, engines):
+    futures = [speaker.say(text) for text in ("một", "hai", "ba")]
+    assert all(future.result(timeout=2.0) for future in futures)
+    assert engines[0].spoken == ["một", "hai", "ba"]
+
+
+def test_cancel_skips_a_queued_request(speaker, engines):
+    first = speaker.say("một hai ba bốn năm")
+    second = speaker.say("sáu")
+    assert second.cancel()
+    assert first.result(timeout=2.0)
+    assert engines[0].spoken == ["một hai ba bốn năm"]
+
+
+def test_stop_cuts_off_the_current_request_from_the_worker(speaker, engines):
+    started = threading.Event()
+    current = speaker.say("chữ " * 50, on_start=started.set)
+    queued = speaker.say("không bao giờ")
+    assert started.wait(1.0)
+    speaker.stop()
+
+    assert current.result(timeout=1.0) is False
+    assert queued.result(timeout=1.0) is False
+    # engine.stop() ran on the worker, not on the thread calling stop()
+    assert engines[0].stop_threads == ["pyttsx3"]
+    assert speaker.say("tiếp").result(timeout=1.0)
+
+
+def test_failing_on_start_does_not_repeat_the_text(speaker, engines):
+    def boom():
+        raise RuntimeError("caller bug")
+
+    assert speaker.say("xin chào", on_start=boom).result(timeout=2.0)
+    assert engines[0].spoken == ["xin chào"]
+
+
+def test_no_retry_once_speech_started(speaker, engines):
+    engines.fail = True
+    assert speaker.say("xin chào").result(timeout=2.0) is False
+    assert [engine.spoken for engine in engines] == [["xin chào"]]
+
+    # The next request gets a fresh engine
+    engines.fail = False
+    assert speaker.say("tạm biệt").result(timeout=2.0)
+    assert engines[-1].spoken == ["tạm biệt"]
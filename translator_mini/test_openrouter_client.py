@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+OpenRouter client tests with a recording client (no network)
+"""
+
+import json
+
+import requests
+
+from translator_mini.openrouter_client import OpenRouterChatbot, OpenRouterClient
+
+
+class RecordingClient(OpenRouterClient):
+    """Pooled client whose POSTs are answered locally, keeping the keys they used."""
+
+    def __init__(self, key_file: str):
+        super().__init__(key_file=key_file)
+        self.keys = []
+
+    def post(self, payload, api_key, stream=False, headers=None, on_headers=None):
+        self.keys.append(api_key)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"choices": [{"message": {"content": "Xin chào"}}]}).encode()
+        return response
+
+
+def test_chatbot_picks_up_a_changed_key_file(tmp_path, monkeypatch):
+    """The key is resolved per turn by the client, not frozen when the bot is built"""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "sk-or-env")
+    key_file = tmp_path / "api_key.txt"
+    key_file.write_text("sk-or-first")
+    client = RecordingClient(str(key_file))
+    bot = OpenRouterChatbot(model="free", client=client, summary_model=None)
+
+    assert bot.chat("hello") == "Xin chào"
+    key_file.write_text("sk-or-rotated-key")
+    assert bot.chat("hello again") == "Xin chào"
+    assert client.keys == ["sk-or-first", "sk-or-rotated-key"]
+
+
+def test_explicit_key_wins(tmp_path):
+    key_file = tmp_path / "api_key.txt"
+    key_file.write_text("sk-or-file")
+    client = RecordingClient(str(key_file))
+    bot = OpenRouterChatbot(model="free", api_key="sk-or-explicit", client=client, summary_model=None)
+
+    assert bot.chat("hello") == "Xin chào"
+    assert client.keys == ["sk-or-explicit"]
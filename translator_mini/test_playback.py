@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+AudioPlayer tests with a fake pygame mixer (no audio device)
+"""
+
+import time
+import types
+
+import pytest
+
+from translator_mini import playback
+
+
+class FakeError(Exception):
+    pass
+
+
+class FakeSound:
+    """A clip whose payload is its length in seconds, e.g. b"0.05"."""
+
+    def __init__(self, file):
+        data = file.read()
+        if data == b"garbage":
+            raise FakeError("not audio")
+        self.length = float(data)
+
+    def get_length(self) -> float:
+        return self.length
+
+
+class FakeChannel:
+    """Plays the current sound for its length, then the queued one (gapless)."""
+
+    def __init__(self, mixer: "FakeMixer"):
+        self.mixer = mixer
+        self.sound = None
+        self.next = None
+        self.ends_at = 0.0
+
+    def play(self, sound):
+        self.sound, self.next = sound, None
+        self.ends_at = time.monotonic() + sound.length
+
+    def queue(self, sound):
+        self.next = sound
+
+    def stop(self):
+        self.sound = self.next = None
+
+    def get_sound(self):
+        if self.mixer.stuck:
+            return self.sound
+        if self.sound is not None and time.monotonic() >= self.ends_at:
+            if self.next is not None:
+                self.play(self.next)
+            else:
+                self.sound = None
+        return self.sound
+
+
+class FakeMixer:
+    def __init__(self):
+        self.stuck = False
+        self.opened = 0
+
+    def init(self, **kwargs):
+        self.opened += 1
+
+    def set_reserved(self, count):
+        pass
+
+    def Channel(self, index):
+        return FakeChannel(self)
+
+    def Sound(self, file):
+        return FakeSound(file)
+
+    def stop(self):
+        pass
+
+    def quit(self):
+        # A stuck device comes back working after a re-open
+        self.stuck = False
+
+
+@pytest.fixture
+def mixer(monkeypatch):
+    mixer = FakeMixer()
+    monkeypatch.setattr(playback, "pygame", types.SimpleNamespace(error=FakeError, mixer=mixer),
+                        raising=False)
+    monkeypatch.setattr(playback, "PYGAME_AVAILABLE", True)
+    monkeypatch.setattr(playback, "STUCK_GRACE_S", 0.1)
+    return mixer
+
+
+@pytest.fixture
+def player(mixer):
+    player = playback.AudioPlayer()
+    yield player
+    player.close()
+
+
+def test_clips_play_in_order(player):
+    order = []
+    items = [player.play(b"0.03", on_start=lambda i=i: order.append(i)) for i in range(4)]
+    assert all(item.wait(2.0) for item in items)
+    assert order == [0, 1, 2, 3]
+
+
+def test_cancel_skips_only_that_clip(player):
+    long, short = player.play(b"10"), player.play(b"0.02")
+    assert long.started.wait(1.0)
+    long.cancel()
+    assert not long.wait(1.0)
+    assert short.wait(1.0)
+
+
+def test_stop_cancels_everything_queued_before_it(player):
+    items = [player.play(b"10") for _ in range(3)]
+    assert items[0].started.wait(1.0)
+    player.stop()
+    assert not any(item.wait(1.0) for item in items)
+    assert player.play(b"0.02").wait(1.0)
+
+
+def test_overrun_reopens_the_mixer_and_keeps_going(player, mixer):
+    """A stuck mixer cuts the clip, and the lined-up clip plays on a fresh one"""
+    mixer.stuck = True
+    stuck, lined_up = player.play(b"0.02"), player.play(b"0.02")
+    assert not stuck.wait(2.0)
+    assert lined_up.wait(2.0)
+    assert mixer.opened == 2
+    assert player.running
+
+
+def test_bad_clip_or_callback_does_not_kill_the_worker(player):
+    def boom():
+        raise RuntimeError("callback")
+
+    bad = player.play(b"garbage")
+    noisy = player.play(b"0.02", on_start=boom)
+    good = player.play(b"0.02")
+    assert not bad.wait(1.0)
+    assert noisy.wait(1.0)
+    assert good.wait(1.0)
+    assert player.running
+
+
+def test_queued_items_finish_when_the_player_closes(player):
+    items = [player.play(b"10") for _ in range(3)]
+    assert items[0].started.wait(1.0)
+    player.close()
+    assert all(item.done.is_set() and not item.ok for item in items)
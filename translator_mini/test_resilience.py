@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Resilience layer tests (sync and async retry paths, no network)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from translator_mini import resilience
+from translator_mini.resilience import RateLimitedError, RetryPolicy, TransientError
+
+
+def _flaky(provider: str, error: Exception, rate: float = 100.0):
+    """Fresh provider config + a call counter that fails on the first attempt."""
+    resilience.configure(provider, rate=rate, burst=5, policy=RetryPolicy(base_delay_s=0.01))
+    calls = {"n": 0}
+
+    def attempt() -> str:
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise error
+        return "ok"
+
+    return calls, attempt
+
+
+def test_retry_after_is_waited_once():
+    """A 429 with Retry-After delays the retry by about Retry-After, not twice that"""
+    calls, attempt = _flaky("test-retry-after", RateLimitedError("429", retry_after=0.5))
+    started = time.monotonic()
+    assert resilience.call("test-retry-after", attempt) == "ok"
+    assert calls["n"] == 2
+    assert 0.5 <= time.monotonic() - started < 0.9
+
+
+def test_acall_retries_transient_errors():
+    calls, attempt = _flaky("test-acall", TransientError("503"))
+
+    async def fn() -> str:
+        return attempt()
+
+    assert asyncio.run(resilience.acall("test-acall", fn)) == "ok"
+    assert calls["n"] == 2
+
+
+def test_acall_shares_the_rate_limit_pause():
+    """Retry-After seen by an async caller also holds back sync callers"""
+    resilience.configure("test-shared", rate=100.0, burst=5, policy=RetryPolicy(max_attempts=1))
+
+    async def fn() -> str:
+        raise RateLimitedError("429", retry_after=0.5)
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(resilience.acall("test-shared", fn))
+    started = time.monotonic()
+    assert resilience.call("test-shared", lambda: "ok") == "ok"
+    assert time.monotonic() - started >= 0.4
+
+
+def test_hard_errors_are_not_retried():
+    calls = {"n": 0}
+
+    async def fn() -> str:
+        calls["n"] += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(resilience.acall("test-hard", fn))
+    assert calls["n"] == 1
+
+
+def test_long_retry_after_pauses_at_most_the_cap():
+    """Retry-After past max_retry_after_s gives up, and later calls wait only the cap"""
+    policy = RetryPolicy(max_retry_after_s=0.3)
+    resilience.configure("test-long-pause", rate=100.0, burst=5, policy=policy)
+
+    def throttled() -> str:
+        raise RateLimitedError("429", retry_after=600)
+
+    with pytest.raises(RateLimitedError):
+        resilience.call("test-long-pause", throttled)
+    started = time.monotonic()
+    assert resilience.call("test-long-pause", lambda: "ok") == "ok"
+    assert time.monotonic() - started < 1.0
+
+
+def test_breakers_and_pauses_are_per_scope():
+    """A dead or throttled model does not fail fast the fallback model"""
+    resilience.configure("test-scope", rate=100.0, burst=5, policy=RetryPolicy(max_attempts=1))
+
+    def dead() -> str:
+        raise TransientError("503")
+
+    for _ in range(resilience.get_breaker("test-scope", "primary").failure_threshold):
+        with pytest.raises(TransientError):
+            resilience.call("test-scope", dead, scope="primary")
+    with pytest.raises(resilience.CircuitOpenError):
+        resilience.call("test-scope", lambda: "ok", scope="primary")
+
+    def throttled() -> str:
+        raise RateLimitedError("429", retry_after=5)
+
+    with pytest.raises(RateLimitedError):
+        resilience.call("test-scope", throttled, scope="throttled")
+    started = time.monotonic()
+    assert resilience.call("test-scope", lambda: "ok", scope="fallback") == "ok"
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Sentence splitter tests
+"""
+
+from translator_mini.sentences import SentenceSplitter, split_sentences
+
+
+def test_number_ends_sentence():
+    """A year before the period still ends the sentence"""
+    assert split_sentences("Tôi sinh năm 1990. Bạn thì sao?") == ["Tôi sinh năm 1990.", "Bạn thì sao?"]
+
+
+def test_numbered_list_items_stay_whole():
+    text = "Các bước:\n1. Mở ứng dụng lên.\n2. Chọn ngôn ngữ.\n  3. Bắt đầu nói."
+    assert split_sentences(text) == ["Các bước:", "1. Mở ứng dụng lên.", "2. Chọn ngôn ngữ.", "3. Bắt đầu nói."]
+
+
+def test_streamed_chunks_match_whole_text():
+    text = "Hôm nay là ngày 20. Trời đẹp quá! Bạn có muốn đi dạo không?"
+    splitter = SentenceSplitter()
+    sentences = []
+    for i in range(0, len(text), 3):
+        sentences += splitter.feed(text[i:i + 3])
+    rest = splitter.flush()
+    if rest:
+        sentences.append(rest)
+    assert sentences == split_sentences(text)
+    assert sentences == ["Hôm nay là ngày 20.", "Trời đẹp quá!", "Bạn có muốn đi dạo không?"]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Speech-to-text orchestration tests with a fake backend (no network, no mic)
+"""
+
+import threading
+import time
+
+import speech_recognition as sr
+
+from translator_mini.speech_to_text import StreamingRecognizer, recognize_multilingual
+from translator_mini.stt_backends import STTBackend
+
+SAMPLE_RATE = 16000
+
+
+class FakeBackend(STTBackend):
+    """Answers every language after a short delay; vi-VN is the most confident."""
+
+    name = "fake"
+
+    def recognize(self, audio: sr.AudioData, language: str):
+        time.sleep(0.05)
+        if language == "vi-VN":
+            return "xin chào", 0.9
+        return "sin chow", 0.4
+
+
+def _silence(seconds: float) -> bytes:
+    return bytes(int(SAMPLE_RATE * seconds) * 2)
+
+
+def test_multilingual_picks_most_confident():
+    audio = sr.AudioData(_silence(0.5), SAMPLE_RATE, 2)
+    assert recognize_multilingual(audio, ["en-US", "vi-VN"], backend=FakeBackend()) == ("xin chào", "vi-VN")
+
+
+def test_many_streaming_recognizers_do_not_deadlock():
+    """More partial jobs than recognition workers still all complete"""
+    done = threading.Semaphore(0)
+    recognizers = [
+        StreamingRecognizer(["en-US", "vi-VN"], SAMPLE_RATE, 2, backend=FakeBackend(),
+                            on_partial=lambda partial: done.release())
+        for _ in range(6)
+    ]
+    for recognizer in recognizers:
+        recognizer.feed(_silence(1.2), start=True)
+    for _ in recognizers:
+        assert done.acquire(timeout=5.0)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+SSE decoder tests on in-memory `requests` responses (no network)
+"""
+
+import gzip
+import io
+
+import requests
+from urllib3.response import HTTPResponse
+
+from translator_mini.sse import SSEDecoder, iter_sse
+
+STREAM = (
+    ": keep-alive\n\n"
+    "data: {\"delta\": \"Xin \"}\n\n"
+    "data: {\"delta\": \"chào\"}\r\n\r\n"
+    "data: [DONE]\n\n"
+).encode("utf-8")
+
+
+def _response(body: bytes, headers=None) -> requests.Response:
+    # Built like requests.adapters.HTTPAdapter does (decode_content=False)
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = HTTPResponse(body=io.BytesIO(body), headers=headers or {},
+                                preload_content=False, decode_content=False)
+    return response
+
+
+def test_decoder_split_across_chunks():
+    """Events split at any byte (even inside CRLF) decode the same"""
+    decoder = SSEDecoder()
+    events = []
+    for i in range(len(STREAM)):
+        events += decoder.feed(STREAM[i:i + 1])
+    assert [e.data for e in events] == ['{"delta": "Xin "}', '{"delta": "chào"}', "[DONE]"]
+
+
+def test_iter_sse_plain():
+    events = list(iter_sse(_response(STREAM)))
+    assert [e.data for e in events][-1] == "[DONE]"
+    assert len(events) == 3
+
+
+def test_iter_sse_gzip():
+    """A gzip-encoded stream is decompressed before parsing"""
+    response = _response(gzip.compress(STREAM), {"Content-Encoding": "gzip"})
+    events = list(iter_sse(response))
+    assert [e.data for e in events] == ['{"delta": "Xin "}', '{"delta": "chào"}', "[DONE]"]
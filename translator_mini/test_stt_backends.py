@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+STT backend tests (no network)
+"""
+
+import speech_recognition as sr
+
+from translator_mini import stt_backends
+
+SAMPLE_RATE = 16000
+
+
+def test_google_falls_back_to_recognize_google(monkeypatch):
+    """Without recognizers.google (SpeechRecognition < 3.11) recognize_google is used"""
+    answers = [
+        {"alternative": [{"transcript": "sin chow", "confidence": 0.3},
+                         {"transcript": "xin chào", "confidence": 0.8}]},
+        [],
+    ]
+
+    def recognize_google(self, audio, key=None, language="en-US", show_all=False):
+        assert show_all
+        return answers.pop(0)
+
+    monkeypatch.setattr(stt_backends, "SR_GOOGLE_AVAILABLE", False)
+    monkeypatch.setattr(sr.Recognizer, "recognize_google", recognize_google)
+    audio = sr.AudioData(bytes(SAMPLE_RATE), SAMPLE_RATE, 2)
+    backend = stt_backends.GoogleBackend()
+    assert backend.recognize(audio, "vi-VN") == ("xin chào", 0.8)
+    assert backend.recognize(audio, "vi-VN") is None
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b""):
+        self.status_code = status_code
+        self.reason = "Service Unavailable" if status_code >= 500 else "OK"
+        self.content = content
+        self.headers = {}
+
+
+class FlakySession:
+    """503 on the first POST, then Google's streaming-JSON answer."""
+
+    def __init__(self):
+        self.posts = 0
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts += 1
+        if self.posts == 1:
+            return FakeResponse(503)
+        return FakeResponse(200, (
+            '{"result":[]}\n'
+            '{"result":[{"alternative":[{"transcript":"xin chào","confidence":0.9}],"final":true}],'
+            '"result_index":0}\n'
+        ).encode("utf-8"))
+
+
+def test_google_retries_server_errors():
+    """A 5xx from the Web Speech API is retried (resilience layer), not reported as a failure"""
+    stt_backends.resilience.configure("google_stt", policy=stt_backends.resilience.RetryPolicy(base_delay_s=0.01))
+    backend = stt_backends.GoogleBackend()
+    backend._session = FlakySession()
+    audio = sr.AudioData(bytes(SAMPLE_RATE), SAMPLE_RATE, 2)
+    assert backend.recognize(audio, "vi-VN") == ("xin chào", 0.9)
+    assert backend._session.posts == 2
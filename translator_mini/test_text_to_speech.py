@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+text_to_speech tests with a fake player and recorded gTTS replies (no audio, no network)
+"""
+
+import base64
+
+import requests
+
+from translator_mini import text_to_speech
+from translator_mini.playback import Playback
+
+MP3 = b"\xff\xf3\x44\xc4" + bytes(60)
+
+
+def _batchexecute_response(audio: bytes) -> str:
+    """Body of a Google TTS batchexecute reply, as gTTS 2.5 receives it."""
+    payload = base64.b64encode(audio).decode("ascii")
+    return (
+        ")]}'\n\n"
+        f"{len(payload) + 80}\n"
+        f'[["wrb.fr","jQ1olc","[\\"{payload}\\"]",null,null,null,"generic"],'
+        '["di",52],["af.httprm",51,"-4467851239541245536",6]]\n'
+        "25\n"
+        '[["e",4,null,null,150]]\n'
+    )
+
+
+class RecordedSession:
+    """Answers every prepared gTTS request with the same recorded reply."""
+
+    def __init__(self):
+        self.requests = []
+
+    def send(self, request, timeout=None):
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = _batchexecute_response(MP3).encode("utf-8")
+        response.encoding = "utf-8"
+        return response
+
+
+class WedgedPlayer:
+    """Accepts clips but never plays them (a dead player worker)."""
+
+    generation = 0
+
+    def play_mp3(self, data, timeout_s=15.0, on_start=None):
+        return Playback(self, data, "mp3", timeout_s, on_start, self.generation)
+
+
+def test_wait_gives_up_on_a_wedged_player(monkeypatch):
+    monkeypatch.setattr(text_to_speech, "get_player", WedgedPlayer)
+    monkeypatch.setattr(text_to_speech, "PLAYBACK_MARGIN_S", 0.05)
+    clips = text_to_speech._OrderedClips(timeout_s=0.05)
+    clips.add_audio(b"mp3", "Câu một.")
+    clips.add_audio(b"mp3", "Câu hai.")
+
+    assert clips.wait() is False
+    assert not clips.played_any
+    # The whole reply is left for the pyttsx3 fallback, and nothing plays late
+    assert clips.unplayed_tail() == ["Câu một.", "Câu hai."]
+    assert all(playback.cancelled for playback in clips.playbacks)
+    assert clips.wait() is False
+
+
+def test_parse_recorded_gtts_response():
+    response = requests.Response()
+    response._content = _batchexecute_response(MP3).encode("utf-8")
+    response.encoding = "utf-8"
+    assert text_to_speech._parse_gtts_response(None, response) == MP3
+
+
+def test_gtts_parts_go_over_the_pooled_session(monkeypatch):
+    """gTTS still prepares batchexecute POSTs we can send ourselves (one per text part)"""
+    session = RecordedSession()
+    monkeypatch.setattr(text_to_speech, "_gtts_session", session)
+    text = "Xin chào. " * 20  # longer than one gTTS part
+    parts = list(text_to_speech._gtts_parts(text, "vi"))
+
+    assert len(parts) == len(session.requests) > 1
+    assert all(part == MP3 for part in parts)
+    request = session.requests[0]
+    assert request.method == "POST"
+    assert request.url.endswith("/_/TranslateWebserverUi/data/batchexecute")
+    assert "jQ1olc" in request.body
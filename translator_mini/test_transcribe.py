@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Batch transcription tests (segmentation and failure handling, no network)
+"""
+
+import wave
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from translator_mini import transcribe
+from translator_mini.transcribe import SAMPLE_RATE, _cap_length, _pop, split_at_silences
+
+
+def _voice(seconds: float) -> np.ndarray:
+    """Voiced-speech stand-in: a 150 Hz tone with harmonics (not flat, crosses zero)."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    wave_ = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))
+    return (wave_ * 3000).astype(np.int16)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(SAMPLE_RATE * seconds), dtype=np.int16)
+
+
+def _framed(*parts: np.ndarray) -> np.ndarray:
+    """parts between 1 s of silence (the noise floor is estimated from quiet frames)."""
+    return np.concatenate([_silence(1), *parts, _silence(1)])
+
+
+def _seconds(span) -> float:
+    return (span[1] - span[0]) / SAMPLE_RATE
+
+
+def test_long_pauses_end_segments():
+    samples = np.concatenate([_silence(1), _voice(2), _silence(2), _voice(1.5), _silence(0.5)])
+    spans = split_at_silences(samples)
+    assert len(spans) == 2
+    (a_start, a_end), (b_start, b_end) = spans
+    # Speech is inside its segment, with only a little padding around it
+    assert 0.8 * SAMPLE_RATE <= a_start <= SAMPLE_RATE
+    assert 3 * SAMPLE_RATE <= a_end <= 3.5 * SAMPLE_RATE
+    assert 4.5 * SAMPLE_RATE <= b_start <= 5 * SAMPLE_RATE
+    assert b_end <= len(samples)
+
+
+def test_long_utterance_is_cut_at_a_pause():
+    samples = _framed(_voice(2.5), _silence(0.3), _voice(1.5))
+    spans = split_at_silences(samples, max_segment_s=3)
+    assert len(spans) == 2
+    assert 3.5 * SAMPLE_RATE <= spans[0][1] <= spans[1][0] <= 3.8 * SAMPLE_RATE
+
+
+def test_speech_without_pauses_is_hard_cut():
+    spans = split_at_silences(_framed(_voice(5)), max_segment_s=2)
+    assert len(spans) == 3
+    assert all(_seconds(span) <= 2 + 0.4 for span in spans)
+    # Back to back: nothing of the speech is lost between pieces
+    assert spans[0][0] <= SAMPLE_RATE and spans[-1][1] >= 6 * SAMPLE_RATE
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+
+
+def test_silence_has_no_segments():
+    assert split_at_silences(_silence(3)) == []
+
+
+def test_cap_length_prefers_the_longest_pause_that_fits():
+    runs = [(0, 50), (60, 100), (130, 200)]
+    assert _cap_length(runs, 250) == [(0, 200)]
+    assert _cap_length(runs, 120) == [(0, 100), (130, 200)]
+    # No pause early enough: hard cut, the rest continues
+    assert _cap_length([(0, 300)], 120) == [(0, 120), (120, 240), (240, 300)]
+
+
+def test_a_failed_segment_does_not_abort_the_batch():
+    failed: Future = Future()
+    failed.set_exception(RuntimeError("boom"))
+    ok: Future = Future()
+    ok.set_result(("hello", None))
+    pending = deque([("a.wav", 2, (0, 100), failed, None), ("a.wav", 2, (100, 200), ok, None)])
+
+    assert _pop(pending)[3][0].startswith("[error:")
+    assert _pop(pending)[3] == ("hello", None)
+
+
+def test_file_without_speech_still_gets_a_transcript(tmp_path):
+    path = tmp_path / "quiet.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(_silence(2).tobytes())
+
+    transcribe.transcribe([str(path)], workers=1, output_dir=str(tmp_path / "out"))
+    assert (tmp_path / "out" / "quiet.txt").read_text(encoding="utf-8") == "(no speech)\n"
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+TranslationCache tests (memory and SQLite tiers, no network)
+"""
+
+import asyncio
+import time
+
+from translator_mini.translation_cache import SQLiteStore, TranslationCache
+
+
+def test_lookup_counts_misses():
+    """A miss seen through lookup() lowers the hit rate"""
+    cache = TranslationCache(persistent=False)
+    assert cache.lookup("google", "", "en-vi", "Hello") is None
+    cache.store("google", "", "en-vi", "Hello", "Xin chào")
+    assert cache.lookup("google", "", "en-vi", "Hello") == "Xin chào"
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_get_or_compute_counts_one_miss():
+    cache = TranslationCache(persistent=False)
+    assert cache.get_or_compute("google", "", "en-vi", "Hello", lambda: "Xin chào") == "Xin chào"
+    assert cache.get_or_compute("google", "", "en-vi", "Hello", lambda: "?") == "Xin chào"
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 1)
+
+
+def test_aget_or_compute_single_flight():
+    """Concurrent tasks for the same text await one computation"""
+    cache = TranslationCache(persistent=False)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "Xin chào"
+
+    async def main():
+        return await asyncio.gather(*(
+            cache.aget_or_compute("openrouter", "m", "auto", "Hello", compute) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["Xin chào"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.lookup("openrouter", "m", "auto", "Hello") == "Xin chào"
+
+
+def test_aget_or_compute_follower_takes_over_after_cancel():
+    cache = TranslationCache(persistent=False)
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "Xin chào"
+
+    async def main():
+        leader = asyncio.create_task(cache.aget_or_compute("openrouter", "m", "auto", "Hi", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.aget_or_compute("openrouter", "m", "auto", "Hi", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "Xin chào"
+
+
+def _count_rows(store: SQLiteStore) -> int:
+    return store._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+def test_expired_rows_are_purged_on_open_and_periodically(tmp_path):
+    path = str(tmp_path / "translations.sqlite3")
+    store = SQLiteStore(path, ttl_s=60)
+    store.put("old", "cũ")
+    store._conn.execute("UPDATE translations SET created = ?", (time.time() - 3600,))
+    store._conn.commit()
+    store.close()
+
+    # Opening the store deletes what expired while the app was down
+    store = SQLiteStore(path, ttl_s=60)
+    assert _count_rows(store) == 0
+
+    # ...and a long-running process purges again once the interval has passed
+    store.put("old", "cũ")
+    store._conn.execute("UPDATE translations SET created = ?", (time.time() - 3600,))
+    store._conn.commit()
+    store.put("new", "mới")
+    assert _count_rows(store) == 2
+    store._next_purge = 0.0  # PURGE_INTERVAL_S later
+    store.put("newer", "mới hơn")
+    assert _count_rows(store) == 2 and store.get("old") is None
+    store.close()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+TTS cache tests (disk store eviction, single-flight; no network)
+"""
+
+import os
+import threading
+import time
+
+from translator_mini.tts_cache import AudioFileStore, TTSCache, audio_key
+
+CLIP = b"\xff\xf3" + bytes(98)  # 100 bytes
+
+
+def test_disk_store_evicts_least_recently_used(tmp_path):
+    store = AudioFileStore(str(tmp_path), max_bytes=250)
+    store.put("a", CLIP)
+    store.put("b", CLIP)
+    os.utime(store._path("a"), (1000, 1000))
+    os.utime(store._path("b"), (2000, 2000))
+    # Playing "a" makes "b" the least recently used
+    assert store.get("a") == CLIP
+
+    store.put("c", CLIP)
+    assert "b" not in store and not os.path.exists(store._path("b"))
+    assert "a" in store and "c" in store
+    assert store.size == 200
+
+
+def test_disk_store_size_survives_a_restart(tmp_path):
+    store = AudioFileStore(str(tmp_path))
+    store.put("a", CLIP)
+    store.put("b", CLIP + CLIP)
+    reopened = AudioFileStore(str(tmp_path))
+    assert reopened.size == store.size == 300
+    assert len(reopened) == 2
+    assert reopened.get("b") == CLIP + CLIP
+
+
+def test_get_or_render_renders_once_for_concurrent_callers():
+    cache = TTSCache(persistent=False)
+    key = audio_key("gtts", "vi", "Xin chào")
+    renders = []
+    results = []
+
+    def render():
+        renders.append(1)
+        time.sleep(0.1)
+        return CLIP
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_render(key, render)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(renders) == 1
+    assert results == [CLIP] * 5
+    stats = cache.stats()
+    assert stats["coalesced"] == 4 and stats["misses"] == 5
+    assert cache.get_or_render(key, render) == CLIP and len(renders) == 1
+
+
+def test_failed_render_is_not_cached():
+    cache = TTSCache(persistent=False)
+    key = audio_key("gtts", "vi", "Tạm biệt")
+    assert cache.get_or_render(key, lambda: None) is None
+    assert not cache.contains(key)
+    assert cache.get_or_render(key, lambda: CLIP) == CLIP
+    assert cache.contains(key)
@@ -1,120 +1,377 @@
-from typing import Optional
-import os
-import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from typing import Optional, Callable, Deque, Dict, Iterable, Iterator, List, Tuple
+import base64
+import queue
+import re
+import threading
 import time
 
+import requests
+from requests.adapters import HTTPAdapter
+
+from translator_mini.sentences import SentenceSplitter, split_sentences
+
 try:
-    import pyttsx3
+    import pyttsx3  # noqa: F401  (engine lives in offline_tts.py)
 except ImportError as e:
     raise RuntimeError("pyttsx3 is required. Install with: pip install pyttsx3") from e
 
+from translator_mini import resilience
+from translator_mini.resilience import RateLimitedError, TransientError
+from translator_mini.tts_cache import audio_key, get_tts_cache
+
 # Try to import gTTS for better Vietnamese voice
 try:
-    from gtts import gTTS
+    from gtts import gTTS, gTTSError
     GTTS_AVAILABLE = True
 except ImportError:
     GTTS_AVAILABLE = False
     print("[TTS] gTTS not available. Install with: pip install gtts")
 
-# Try pygame for audio playback
-try:
-    import pygame
-    PYGAME_AVAILABLE = True
-except ImportError:
-    PYGAME_AVAILABLE = False
-    print("[TTS] pygame not available. Install with: pip install pygame")
-
+GTTS_TLD = "com"  # Google host (accent); part of the TTS cache key
 
-_engine = None
+# Audio playback: one long-lived pygame mixer on a worker thread
+from translator_mini.playback import PYGAME_AVAILABLE, Playback, get_player
+# Offline voice: one long-lived pyttsx3 engine on a worker thread
+from translator_mini import offline_tts
 
+# Slack on top of timeout_s for one clip to be decoded and finished by the
+# player before wait() gives up on it (e.g. the player worker is wedged)
+PLAYBACK_MARGIN_S = 5.0
 
-def _get_engine():
-    global _engine
-    if _engine is None:
-        _engine = pyttsx3.init()
-    return _engine
 
-
-def _choose_vi_voice(engine) -> Optional[str]:
+class _OrderedClips:
     """
-    Try to find a Vietnamese voice id from available voices.
-    Returns voice id or None if not found.
+    MP3 clips for one utterance, queued on the shared player in the order
+    they were added as soon as each one (and every one before it) is ready.
+    Synthesis futures may finish in any order; the player plays what it
+    gets back to back without gaps. Each clip may carry the text it speaks,
+    so a failed tail can be handed to another engine (unplayed_tail()).
     """
-    for v in engine.getProperty("voices"):
-        name = (v.name or "").lower()
-        vid = (v.id or "").lower()
-        langs = [str(x).lower() for x in getattr(v, "languages", [])]
-        if "vi" in vid or "vietnam" in name:
-            return v.id
-        if any("vi" in l for l in langs):
-            return v.id
-    return None
+
+    def __init__(self, timeout_s: float = 15.0, on_start: Optional[Callable[[], None]] = None):
+        self.player = get_player()
+        self.timeout_s = timeout_s
+        self.on_start = on_start
+        self.playbacks = []
+        self._generation = self.player.generation
+        self._lock = threading.Lock()
+        self._pending: Deque[Tuple[Future, str]] = deque()
+        self._futures: List[Future] = []
+        # (text, playback or None if it could not be synthesized), in order
+        self._outcomes: List[Tuple[str, Optional[Playback]]] = []
+        self._gave_up = False
+
+    @property
+    def cancelled(self) -> bool:
+        """True after stop_speaking()."""
+        return self.player.generation != self._generation
+
+    def add(self, future: "Future[Optional[bytes]]", text: str = "") -> None:
+        with self._lock:
+            self._pending.append((future, text))
+            self._futures.append(future)
+        future.add_done_callback(lambda _: self._flush())
+
+    def add_audio(self, data: bytes, text: str = "") -> None:
+        future: "Future[Optional[bytes]]" = Future()
+        future.set_result(data)
+        self.add(future, text)
+
+    def _flush(self) -> None:
+        with self._lock:
+            while self._pending and self._pending[0][0].done():
+                future, text = self._pending.popleft()
+                if self.cancelled or future.cancelled():
+                    continue
+                playback = None
+                try:
+                    data = future.result()
+                except Exception as e:
+                    # Skip the piece; the rest of the reply still plays
+                    print(f"[TTS] gTTS error: {e}")
+                    data = None
+                if data:
+                    playback = self.player.play_mp3(
+                        data, timeout_s=self.timeout_s,
+                        on_start=None if self.playbacks else self.on_start)
+                    self.playbacks.append(playback)
+                self._outcomes.append((text, playback))
+
+    def wait(self) -> Optional[bool]:
+        """
+        Wait until everything played. True if anything played (and all of
+        it to the end), False if something could not be played, None if
+        cancelled. Calling it again just returns the result.
+
+        Clips play one after another, so each gets timeout_s (plus a
+        margin) after the one before it; a clip that does not finish by
+        then counts as failed, and it and the rest are cancelled so the
+        caller's fallback does not talk over them.
+        """
+        while True:
+            with self._lock:
+                running = [f for f in self._futures if not f.done()]
+            if not running:
+                break
+            if self.cancelled:
+                # Requests already sent finish in the background (and get cached)
+                for future in running:
+                    future.cancel()
+                break
+            wait_futures(running, timeout=0.1)
+        # wait_futures() can return before the last done-callback has run
+        self._flush()
+        for playback in self.playbacks:
+            if self._gave_up:
+                break
+            if not playback.done.wait(self.timeout_s + PLAYBACK_MARGIN_S):
+                print(f"[TTS] Playback did not finish within {self.timeout_s:.0f}s, giving up")
+                self._gave_up = True
+                for late in self.playbacks:
+                    late.cancel()
+        if self.cancelled:
+            return None
+        return bool(self._outcomes) and all(
+            playback is not None and playback.ok for _, playback in self._outcomes)
+
+    @property
+    def played_any(self) -> bool:
+        """True if at least one clip played to the end (after wait())."""
+        return any(playback.ok for playback in self.playbacks)
+
+    def unplayed_tail(self) -> List[str]:
+        """
+        Texts of the clips after the last one that played (after wait()):
+        everything if nothing played. A clip that failed between two that
+        played is skipped rather than spoken out of order.
+        """
+        tail: List[str] = []
+        for text, playback in self._outcomes:
+            if playback is not None and playback.ok:
+                tail = []
+            elif text:
+                tail.append(text)
+        return tail
 
 
-def _play_audio_pygame(filepath: str, timeout_s: float = 15.0) -> bool:
+def _play_mp3(parts: Iterable[bytes], timeout_s: float = 15.0,
+              on_start: Optional[Callable[[], None]] = None, text: str = "") -> _OrderedClips:
     """
-    Play audio file using pygame.
-    CRITICAL: Fully quit and reinit pygame for each playback to avoid stuck state.
+    Queue MP3 clips on the shared player as they arrive (the first one
+    plays while the next are still downloading) and wait until all end.
+    on_start (optional) is called right after playback starts; `text` is
+    what the parts say (kept on the first one for unplayed_tail()).
+
+    Returns the waited clips: see wait() (True when played, False on
+    failure, None if cancelled by stop_speaking()), played_any and
+    unplayed_tail().
     """
-    if not PYGAME_AVAILABLE:
-        return False
-    
+    clips = _OrderedClips(timeout_s, on_start)
     try:
-        # ALWAYS fully quit pygame first (not just mixer)
-        try:
-            pygame.mixer.music.stop()
-        except:
-            pass
-        try:
-            pygame.mixer.music.unload()
-        except:
-            pass
-        try:
-            pygame.mixer.quit()
-        except:
-            pass
-        try:
-            pygame.quit()
-        except:
-            pass
-        
-        # Small delay to ensure full cleanup
-        time.sleep(0.15)
-        
-        # Fresh init
-        pygame.init()
-        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
-        
-        # Load and play
-        pygame.mixer.music.load(filepath)
-        pygame.mixer.music.play()
-        
-        # Wait for playback with timeout
-        start_time = time.time()
-        while pygame.mixer.music.get_busy():
-            pygame.time.wait(100)
-            if time.time() - start_time > timeout_s:
-                pygame.mixer.music.stop()
+        for part in parts:
+            if clips.cancelled:
                 break
-        
-        # Full cleanup after playback
-        pygame.mixer.music.stop()
-        pygame.mixer.music.unload()
-        pygame.mixer.quit()
-        pygame.quit()
-        
-        return True
-        
+            clips.add_audio(part, "" if clips.playbacks else text)
     except Exception as e:
-        print(f"[TTS] pygame playback error: {e}")
+        if not clips.playbacks:
+            raise
+        # Keep what is already playing rather than starting over in another voice
+        print(f"[TTS] gTTS stream interrupted: {e}")
+    clips.wait()
+    return clips
+
+
+def stop_speaking() -> None:
+    """Cut off the reply being spoken (and anything queued behind it)."""
+    get_player().stop()
+    offline_tts.get_speaker().stop()
+
+
+# ==============================================================================
+# gTTS SYNTHESIS (in memory, one pooled HTTP session)
+# ==============================================================================
+
+GTTS_TIMEOUT_S = 10.0
+_gtts_session: Optional[requests.Session] = None
+_gtts_session_lock = threading.Lock()
+
+
+def _http() -> requests.Session:
+    """Keep-alive session for Google TTS (gTTS itself opens one per request)."""
+    global _gtts_session
+    with _gtts_session_lock:
+        if _gtts_session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            _gtts_session = session
+        return _gtts_session
+
+
+# The MP3 (base64) in a batchexecute response, as gTTS.stream() finds it
+_GTTS_AUDIO = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+def _parse_gtts_response(tts, response: requests.Response) -> bytes:
+    """MP3 of one gTTS part from its response (same parsing as gTTS.stream())."""
+    for line in response.text.splitlines():
+        if "jQ1olc" in line:
+            match = _GTTS_AUDIO.search(line)
+            if match:
+                return base64.b64decode(match.group(1))
+    raise gTTSError(tts=tts, response=response)
+
+
+def _gtts_request(tts, request: requests.PreparedRequest) -> bytes:
+    """Send one gTTS part request; returns its MP3, HTTP errors mapped for the retry layer."""
+    try:
+        response = _http().send(request, timeout=GTTS_TIMEOUT_S)
+    except requests.exceptions.RequestException as e:
+        raise TransientError(f"Google TTS request failed: {e}") from e
+    if response.status_code == 429:
+        raise RateLimitedError("429 from Google TTS",
+                               retry_after=resilience.parse_retry_after(response.headers.get("Retry-After")))
+    if response.status_code >= 500:
+        raise TransientError(f"HTTP {response.status_code} from Google TTS")
+    if response.status_code >= 400:
+        raise gTTSError(tts=tts, response=response)
+    return _parse_gtts_response(tts, response)
+
+
+def _gtts_parts(text: str, lang: str, slow: bool = False) -> Iterator[bytes]:
+    """
+    MP3 per gTTS text part (≤100 chars, split at punctuation), each yielded
+    as soon as it is downloaded. Concatenated they form one valid MP3.
+
+    gTTS builds the requests (URL, headers, body); they are sent over the
+    pooled session instead of gTTS.stream()'s new session per part. A gTTS
+    without _prepare_requests() (outside the range in requirements.txt)
+    falls back to its own stream().
+    """
+    tts = gTTS(text=text, lang=lang, tld=GTTS_TLD, slow=slow)
+    prepare = getattr(tts, "_prepare_requests", None)
+    if prepare is None:
+        yield from tts.stream()
+        return
+    for request in prepare():
+        yield resilience.call("gtts", lambda: _gtts_request(tts, request))
+
+
+def _gtts_key(text: str, lang: str, slow: bool = False) -> str:
+    return audio_key("gtts", lang, text, voice=GTTS_TLD, rate="slow" if slow else "normal")
+
+
+def synthesize_gtts(text: str, lang: str = "vi", slow: bool = False) -> Optional[bytes]:
+    """
+    MP3 for text, from the TTS cache (tts_cache.py) or new gTTS requests.
+    Raises on network errors when the phrase isn't cached.
+    """
+    def render() -> bytes:
+        print(f"[TTS] 🔊 Generating audio ({lang}): '{text[:30]}...'")
+        return b"".join(_gtts_parts(text, lang, slow))
+
+    return get_tts_cache().get_or_render(_gtts_key(text, lang, slow), render)
+
+
+def stream_gtts(text: str, lang: str = "vi", slow: bool = False) -> Iterator[bytes]:
+    """
+    MP3 clips for text as they become available: the cached clip, or the
+    gTTS parts one by one (cached once all of them have arrived).
+    """
+    cache = get_tts_cache()
+    key = _gtts_key(text, lang, slow)
+    cached = cache.lookup(key)
+    if cached is not None:
+        yield cached
+        return
+    print(f"[TTS] 🔊 Generating audio ({lang}): '{text[:30]}...'")
+    parts = []
+    for part in _gtts_parts(text, lang, slow):
+        parts.append(part)
+        yield part
+    cache.store(key, b"".join(parts))
+
+
+# ==============================================================================
+# CHUNKED SYNTHESIS (parallel requests, ordered gapless playback)
+# ==============================================================================
+
+CHUNK_MAX_CHARS = 160   # longer sentences are cut at a clause break
+SYNTH_WORKERS = 3       # concurrent gTTS requests
+
+_synth_pool = ThreadPoolExecutor(max_workers=SYNTH_WORKERS, thread_name_prefix="tts-synth")
+
+
+def speech_chunks(text: str) -> List[str]:
+    """Sentences / clauses of text, each synthesized (and cached) on its own."""
+    return split_sentences(text, max_chars=CHUNK_MAX_CHARS) or [text]
+
+
+def _speak_chunks(chunks: List[str], lang: str, timeout_s: float,
+                  on_start: Optional[Callable[[], None]]) -> _OrderedClips:
+    """Synthesize chunks on the pool, chunk N+1 while chunk N plays (returns the waited clips)."""
+    clips = _OrderedClips(timeout_s, on_start)
+    for chunk in chunks:
+        clips.add(_synth_pool.submit(synthesize_gtts, chunk, lang), chunk)
+    clips.wait()
+    return clips
+
+
+def prerender(phrases: Iterable, lang: str = "vi", workers: int = 4) -> int:
+    """
+    Synthesize phrases that are not cached yet.
+
+    Args:
+        phrases: texts, or (text, lang) pairs
+        lang: language for plain texts
+        workers: parallel gTTS requests
+
+    Returns:
+        Number of pieces (sentences / clauses) newly rendered.
+    """
+    if not GTTS_AVAILABLE:
+        return 0
+    cache = get_tts_cache()
+    todo = []
+    for phrase in phrases:
+        text, phrase_lang = phrase if isinstance(phrase, tuple) else (phrase, lang)
+        # Same pieces speak_gtts() will ask for
+        for chunk in speech_chunks(text) if text else []:
+            if not cache.contains(_gtts_key(chunk, phrase_lang)):
+                todo.append((chunk, phrase_lang))
+
+    def render(item: Tuple[str, str]) -> bool:
         try:
-            pygame.quit()
-        except:
-            pass
-        return False
+            return bool(synthesize_gtts(*item))
+        except Exception as e:
+            print(f"[TTS] Pre-render failed for '{item[0][:30]}': {e}")
+            return False
+
+    if not todo:
+        return 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo))),
+                            thread_name_prefix="tts-prerender") as pool:
+        return sum(pool.map(render, todo))
+
 
+def warm_up_tts(phrases: Iterable, lang: str = "vi", background: bool = True) -> Optional[threading.Thread]:
+    """
+    Pre-render stock phrases (see prerender); with background=True this
+    returns immediately with the worker thread.
+    """
+    phrases = list(phrases)
+    if not background:
+        prerender(phrases, lang)
+        return None
+    thread = threading.Thread(target=prerender, args=(phrases, lang), name="tts-warmup", daemon=True)
+    thread.start()
+    return thread
 
-def speak_gtts(text: str, lang: str = "vi", timeout_s: float = 15.0) -> bool:
+
+def speak_gtts(text: str, lang: str = "vi", timeout_s: float = 15.0,
+               on_start: Optional[Callable[[], None]] = None,
+               fallback: Optional[Callable[[str], bool]] = None) -> bool:
     """
     Speak using Google TTS (better Vietnamese voice).
     Requires: pip install gtts pygame
@@ -122,9 +379,19 @@ def speak_gtts(text: str, lang: str = "vi", timeout_s: float = 15.0) -> bool:
     Args:
         text: Text to speak
         lang: Language code ('vi' or 'en')
-        timeout_s: Max playback time
+        timeout_s: Max playback time per clip
+        on_start: Called when audio starts playing
+        fallback: Speaks the rest of the text when gTTS fails part-way
+            (e.g. the network drops after the first sentences played)
     
-    Fully reinits pygame each call to prevent stuck state between turns.
+    Long texts are split into sentences / clauses that are synthesized
+    concurrently and played in order without gaps; a single sentence
+    starts playing with its first downloaded part. Pieces spoken before
+    come from the TTS cache. Everything stays in memory and goes to the
+    shared playback worker (playback.py).
+
+    Returns False only if nothing could be played (the caller may then
+    speak the whole text another way).
     """
     if not GTTS_AVAILABLE:
         print("[TTS] gTTS not available")
@@ -134,66 +401,61 @@ def speak_gtts(text: str, lang: str = "vi", timeout_s: float = 15.0) -> bool:
         print("[TTS] pygame not available for audio playback")
         return False
 
-    temp_file = None
+    chunks = speech_chunks(text)
     try:
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-            temp_file = fp.name
-
-        # Generate speech using Google TTS
-        print(f"[TTS] 🔊 Generating audio ({lang}): '{text[:30]}...'")
-        tts = gTTS(text=text, lang=lang, slow=False)
-        tts.save(temp_file)
-
-        # Play audio
-        success = _play_audio_pygame(temp_file, timeout_s)
-        
-        if success:
-            print("[TTS] ✓ Audio playback complete")
+        if len(chunks) > 1:
+            clips = _speak_chunks(chunks, lang, timeout_s, on_start)
         else:
-            print("[TTS] ✗ Audio playback failed")
-            
-        return success
-        
+            clips = _play_mp3(stream_gtts(text, lang), timeout_s, on_start=on_start, text=text)
     except Exception as e:
         print(f"[TTS] gTTS error: {e}")
         return False
-    finally:
-        # Cleanup temp file
-        if temp_file:
-            try:
-                time.sleep(0.2)
-                os.unlink(temp_file)
-            except:
-                pass
+
+    success = clips.wait()
+    if success is None:
+        print("[TTS] ■ Audio playback stopped")
+        return True
+    if success:
+        print("[TTS] ✓ Audio playback complete")
+        return True
+    if not clips.played_any:
+        print("[TTS] ✗ Audio playback failed")
+        return False
+    # Part of it played: finish the rest instead of repeating the whole text
+    rest = clips.unplayed_tail()
+    if rest and fallback is not None:
+        print("[TTS] gTTS failed part-way, speaking the rest with pyttsx3...")
+        fallback(" ".join(rest))
+    else:
+        print("[TTS] ✗ Part of the audio could not be played")
+    return True
 
 
-def speak_pyttsx3(text: str, rate: int = 140, volume: float = 1.0, prefer_vi: bool = True) -> bool:
+def speak_pyttsx3(text: str, rate: int = 140, volume: float = 1.0, prefer_vi: bool = True,
+                  on_start: Optional[Callable[[], None]] = None) -> bool:
     """
-    Speak using pyttsx3 (offline, but poor Vietnamese quality).
+    Speak using pyttsx3 (offline, but poor Vietnamese quality) and wait
+    until done. The engine runs on its own thread (offline_tts.py).
     """
     if not text:
         return True
+    speaker = offline_tts.get_speaker()
+    generation = speaker.generation
+    ok = speak_pyttsx3_async(text, rate, volume, prefer_vi, on_start=on_start).result()
+    # Stopped by stop_speaking(): done, not a failure
+    return ok or speaker.generation != generation
 
-    engine = _get_engine()
-    try:
-        engine.setProperty("rate", rate)
-        engine.setProperty("volume", max(0.0, min(1.0, volume)))
-
-        if prefer_vi:
-            vi_voice = _choose_vi_voice(engine)
-            if vi_voice:
-                engine.setProperty("voice", vi_voice)
-        engine.say(text)
-        engine.runAndWait()
-        return True
-    except Exception as e:
-        print(f"[TTS] pyttsx3 error: {e}")
-        return False
+
+def speak_pyttsx3_async(text: str, rate: int = 140, volume: float = 1.0, prefer_vi: bool = True,
+                        on_start: Optional[Callable[[], None]] = None) -> "Future[bool]":
+    """Queue text on the offline engine and return its Future right away."""
+    return offline_tts.get_speaker().say(text, rate=rate, volume=volume,
+                                         prefer_vi=prefer_vi, on_start=on_start)
 
 
 def speak(text: str, rate: int = 140, volume: float = 1.0, prefer_vi: bool = True, 
-          use_gtts: bool = True, lang: str = "vi") -> bool:
+          use_gtts: bool = True, lang: str = "vi",
+          on_start: Optional[Callable[[], None]] = None) -> bool:
     """
     Speak the given text via system TTS.
     
@@ -204,6 +466,7 @@ def speak(text: str, rate: int = 140, volume: float = 1.0, prefer_vi: bool = Tru
         prefer_vi: try to select Vietnamese voice if available (pyttsx3)
         use_gtts: prefer gTTS over pyttsx3 (better quality)
         lang: Language code for gTTS ('vi' or 'en')
+        on_start: Called when audio starts playing (for latency measurement)
 
     Returns True if queued successfully.
     """
@@ -212,9 +475,131 @@ def speak(text: str, rate: int = 140, volume: float = 1.0, prefer_vi: bool = Tru
     
     # Try gTTS first (better Vietnamese voice)
     if use_gtts and GTTS_AVAILABLE:
-        if speak_gtts(text, lang=lang):
+        def finish_offline(rest: str) -> bool:
+            return speak_pyttsx3(rest, rate, volume, prefer_vi)
+
+        if speak_gtts(text, lang=lang, on_start=on_start, fallback=finish_offline):
             return True
         print("[TTS] gTTS failed, falling back to pyttsx3...")
     
     # Fallback to pyttsx3
-    return speak_pyttsx3(text, rate, volume, prefer_vi)
+    return speak_pyttsx3(text, rate, volume, prefer_vi, on_start=on_start)
+
+
+def speak_stream(
+    chunks: Iterable[str],
+    lang: str = "vi",
+    detect_lang: Optional[Callable[[str], str]] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+    speak_fn: Optional[Callable[..., bool]] = None,
+    **speak_kwargs,
+) -> Tuple[str, Dict[str, float]]:
+    """
+    Speak text while it is still being generated.
+
+    Streamed chunks are split into sentences; each finished sentence is
+    queued to a speaker thread right away, so sentence 1 plays while the
+    model is still writing sentence 2. With gTTS (the default speak_fn),
+    sentences are synthesized concurrently as they complete and played
+    back to back without gaps.
+
+    Args:
+        chunks: Text chunks (e.g. OpenRouterChatbot.chat_stream(...))
+        lang: Language for TTS
+        detect_lang: If given, called on the first sentence to pick lang
+        on_text: Called with every chunk as it arrives (e.g. to print it)
+        speak_fn: TTS function (default: speak); must accept lang and on_start
+        **speak_kwargs: Extra arguments for speak_fn (rate, use_gtts, ...)
+
+    Returns:
+        (full_text, timings) where timings holds seconds since the call for
+        first_token, first_sentence, first_audio, and total.
+    """
+    # Default speak_fn: with gTTS every sentence is synthesized as soon as it
+    # is complete (several at once) and played in order without gaps; with
+    # pyttsx3 sentences go straight onto the offline engine's queue
+    online = speak_kwargs.get("use_gtts", True) and GTTS_AVAILABLE and PYGAME_AVAILABLE
+    pipelined = speak_fn is None and online
+    offline = speak_fn is None and not online
+    speak_fn = speak_fn or speak
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    parts = []
+
+    def mark(name: str) -> None:
+        timings.setdefault(name, time.perf_counter() - start)
+
+    def first_audio() -> None:
+        mark("first_audio")
+
+    chosen_lang = [lang]
+
+    if pipelined:
+        clips = _OrderedClips(on_start=first_audio)
+
+        def deliver(sentence: str) -> None:
+            for piece in speech_chunks(sentence):
+                clips.add(_synth_pool.submit(synthesize_gtts, piece, chosen_lang[0]), piece)
+
+        def finish() -> None:
+            if clips.wait() is not False:
+                return
+            # Only what did not play (all of it if nothing did), not the whole reply again
+            rest = clips.unplayed_tail()
+            if not rest:
+                return
+            print("[TTS] gTTS failed, " + ("speaking the rest with pyttsx3..." if clips.played_any
+                                           else "falling back to pyttsx3..."))
+            speak(" ".join(rest), lang=chosen_lang[0], on_start=first_audio,
+                  **dict(speak_kwargs, use_gtts=False))
+    elif offline:
+        futures: List["Future[bool]"] = []
+        engine_kwargs = {k: v for k, v in speak_kwargs.items() if k in ("rate", "volume", "prefer_vi")}
+
+        def deliver(sentence: str) -> None:
+            futures.append(speak_pyttsx3_async(sentence, on_start=first_audio, **engine_kwargs))
+
+        def finish() -> None:
+            wait_futures(futures)
+    else:
+        sentences: "queue.Queue[Optional[str]]" = queue.Queue()
+
+        def speaker() -> None:
+            while True:
+                sentence = sentences.get()
+                if sentence is None:
+                    return
+                speak_fn(sentence, lang=chosen_lang[0], on_start=first_audio, **speak_kwargs)
+
+        worker = threading.Thread(target=speaker, name="tts-stream", daemon=True)
+        worker.start()
+        deliver = sentences.put
+
+        def finish() -> None:
+            sentences.put(None)
+            worker.join()
+
+    def enqueue(sentence: str) -> None:
+        if "first_sentence" not in timings:
+            mark("first_sentence")
+            if detect_lang:
+                chosen_lang[0] = detect_lang(sentence)
+        deliver(sentence)
+
+    splitter = SentenceSplitter()
+    try:
+        for chunk in chunks:
+            mark("first_token")
+            parts.append(chunk)
+            if on_text:
+                on_text(chunk)
+            for sentence in splitter.feed(chunk):
+                enqueue(sentence)
+        rest = splitter.flush()
+        if rest:
+            enqueue(rest)
+    finally:
+        finish()
+
+    timings["total"] = time.perf_counter() - start
+    return "".join(parts), timings
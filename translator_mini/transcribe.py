@@ -0,0 +1,343 @@
+"""
+Batch transcription of recorded audio (WAV / AIFF / FLAC).
+
+Long recordings are split at silences (VAD, see vad.py) into segments the
+recognizer accepts, and the segments of every file are recognized in a
+process pool: network backends overlap their requests, offline backends
+(Vosk, Sphinx) use every core, and each worker keeps its backend warm.
+Output is in order with timestamps, optionally translated to Vietnamese.
+
+    python -m translator_mini.main --mode transcribe --audio meetings/ --translate
+"""
+
+import glob
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Deque, Iterator, List, Optional, Sequence, Tuple
+
+import speech_recognition as sr
+
+from translator_mini import audio_codec, vad
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".aif", ".aiff")
+
+SAMPLE_RATE = audio_codec.STT_SAMPLE_RATE
+READ_BLOCK_S = 30            # file is read and converted this much at a time
+MAX_SEGMENT_S = 30.0         # Google's free API rejects much longer audio
+LONG_PAUSE_MS = 1000         # always cut at a pause this long
+MIN_PAUSE_MS = 200           # shortest pause a long segment may be cut at
+IN_FLIGHT_PER_WORKER = 4     # queued segments per worker (bounds memory)
+
+# (start sample, end sample) at SAMPLE_RATE
+Span = Tuple[int, int]
+# (transcript, Vietnamese translation) of one segment
+Result = Tuple[Optional[str], Optional[str]]
+# (path, segments in that file, span, future, resubmit) in output order;
+# span and future are None for a file without speech
+Pending = Tuple[str, int, Optional[Span], Optional[Future], Optional[Callable[[], Future]]]
+
+
+def find_audio_files(paths: Sequence[str]) -> List[str]:
+    """Audio files in `paths` (directories are searched non-recursively, sorted)."""
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = [f for f in glob.glob(os.path.join(path, "*")) if f.lower().endswith(AUDIO_EXTENSIONS)]
+            files.extend(sorted(found))
+        else:
+            files.append(path)
+    return files
+
+
+def load_samples(path: str) -> "audio_codec.np.ndarray":
+    """Whole file as 16 kHz mono int16 (read and converted block by block)."""
+    np = audio_codec.np
+    blocks = []
+    with sr.AudioFile(path) as source:
+        frames = READ_BLOCK_S * source.SAMPLE_RATE
+        while True:
+            data = source.stream.read(frames)
+            if not data:
+                break
+            samples = audio_codec.pcm_to_int16(data, source.SAMPLE_WIDTH)
+            blocks.append(audio_codec.resample(samples, source.SAMPLE_RATE, SAMPLE_RATE))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+
+
+def _speech_mask(samples: "audio_codec.np.ndarray") -> "audio_codec.np.ndarray":
+    """Raw (unsmoothed) per-frame speech mask, noise floor estimated per block."""
+    np = audio_codec.np
+    block = READ_BLOCK_S * SAMPLE_RATE
+    masks = []
+    for start in range(0, len(samples), block):
+        energy_db, zcr, flatness = vad.frame_features(samples[start:start + block], SAMPLE_RATE)
+        if len(energy_db):
+            noise_db = float(np.percentile(energy_db, 10))
+            masks.append(vad.classify(energy_db, zcr, flatness, noise_db))
+    return np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+
+
+def split_at_silences(samples: "audio_codec.np.ndarray", max_segment_s: float = MAX_SEGMENT_S) -> List[Span]:
+    """
+    Speech segments of at most max_segment_s.
+
+    Pauses of LONG_PAUSE_MS or more always end a segment; a segment that
+    would still be too long is cut at its longest pause of at least
+    MIN_PAUSE_MS (or hard-cut if the speaker never pauses). Each segment
+    keeps a little of the silence around it, never past half a pause.
+    """
+    np = audio_codec.np
+    # Clicks shorter than MIN_SPEECH_MS are not speech
+    mask = vad.smooth(_speech_mask(samples), vad.MIN_SPEECH_MS // vad.FRAME_MS, 0)
+    frame = SAMPLE_RATE * vad.FRAME_MS // 1000
+    max_frames = int(max_segment_s * 1000) // vad.FRAME_MS
+    min_pause = MIN_PAUSE_MS // vad.FRAME_MS
+    long_pause = LONG_PAUSE_MS // vad.FRAME_MS
+
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    runs: List[Tuple[int, int]] = []
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        if runs and start - runs[-1][1] < min_pause:
+            runs[-1] = (runs[-1][0], int(end))  # gap between syllables, not a pause
+        else:
+            runs.append((int(start), int(end)))
+
+    spans: List[Tuple[int, int]] = []
+    i = 0
+    while i < len(runs):
+        # Runs joined by short pauses form one utterance
+        j = i
+        while j + 1 < len(runs) and runs[j + 1][0] - runs[j][1] < long_pause:
+            j += 1
+        spans.extend(_cap_length(runs[i:j + 1], max_frames))
+        i = j + 1
+
+    lead, trail = vad.LEAD_PAD_MS // vad.FRAME_MS, vad.HANGOVER_MS // vad.FRAME_MS
+    total = len(mask)
+    padded: List[Span] = []
+    for k, (start, end) in enumerate(spans):
+        previous_end = spans[k - 1][1] if k else 0
+        next_start = spans[k + 1][0] if k + 1 < len(spans) else total
+        start = max(start - lead, (previous_end + start) // 2 if k else 0)
+        end = min(end + trail, (end + next_start) // 2 if k + 1 < len(spans) else total)
+        padded.append((start * frame, min(len(samples), end * frame)))
+    return padded
+
+
+def _cap_length(runs: List[Tuple[int, int]], max_frames: int) -> List[Tuple[int, int]]:
+    """Split one utterance (speech runs) into pieces of at most max_frames."""
+    start, end = runs[0][0], runs[-1][1]
+    if end - start <= max_frames:
+        return [(start, end)]
+    # Longest pause that leaves the first piece short enough (the latest
+    # one on ties, so pieces come out long rather than as slivers)
+    best, cut = -1, None
+    for (_, a_end), (b_start, _) in zip(runs, runs[1:]):
+        if a_end - start > max_frames:
+            break
+        if b_start - a_end >= best:
+            best, cut = b_start - a_end, (a_end, b_start)
+    if cut is None:
+        # The speaker never paused: hard cut, the rest continues in the next piece
+        boundary = start + max_frames
+        rest = [(max(s, boundary), e) for s, e in runs if e > boundary]
+        return [(start, boundary)] + _cap_length(rest, max_frames)
+    left = [r for r in runs if r[1] <= cut[0]]
+    right = [r for r in runs if r[0] >= cut[1]]
+    return _cap_length(left, max_frames) + _cap_length(right, max_frames)
+
+
+# ==============================================================================
+# WORKER PROCESSES
+# ==============================================================================
+
+def _recognize_segment(pcm: bytes, language: str, backend_name: str, translate: bool) -> Result:
+    """
+    Runs in a worker: (transcript, Vietnamese translation or None) for one
+    segment. The backend (and its model) stays loaded per process; Google
+    requests are rate limited and retried per process by the backend.
+    """
+    from translator_mini.stt_backends import get_backend
+    backend = get_backend(backend_name)
+    audio = sr.AudioData(pcm, SAMPLE_RATE, 2)
+    try:
+        candidate = backend.recognize(audio, language)
+    except sr.UnknownValueError:
+        candidate = None
+    except sr.RequestError as e:
+        return f"[error: {e}]", None
+    if not candidate:
+        return None, None
+    text = candidate[0]
+    if not translate:
+        return text, None
+    from translator_mini.translator import translate_en_to_vi
+    return text, translate_en_to_vi(text)
+
+
+def _timestamp(samples: int) -> str:
+    seconds = samples / SAMPLE_RATE
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:04.1f}"
+
+
+def _segments(files: Sequence[str]) -> Iterator[Tuple[str, int, Optional[Span], bytes]]:
+    """
+    (path, segment count of that file, span, pcm) for every segment of
+    every file; a file without speech yields one (path, 0, None, b"").
+    """
+    for path in files:
+        try:
+            samples = load_samples(path)
+        except (ValueError, OSError, EOFError) as e:
+            print(f"[Transcribe] Skipping {path}: {e}")
+            continue
+        spans = split_at_silences(samples)
+        print(f"[Transcribe] {os.path.basename(path)}: {len(samples) / SAMPLE_RATE:.0f} s, "
+              f"{len(spans) or 'no'} speech segments")
+        if not spans:
+            yield path, 0, None, b""
+        for span in spans:
+            yield path, len(spans), span, samples[span[0]:span[1]].tobytes()
+
+
+def transcribe(
+    paths: Sequence[str],
+    language: str = "en-US",
+    backend: Optional[str] = None,
+    workers: Optional[int] = None,
+    translate: bool = False,
+    output_dir: Optional[str] = None,
+) -> None:
+    """
+    Transcribe files/directories and print ordered, timestamped lines.
+
+    Args:
+        paths: audio files or directories of them
+        language: recognition language (BCP-47)
+        backend: STT backend name (None = configured default)
+        workers: worker processes (default: CPU count, at least 4)
+        translate: add a Vietnamese translation under each line
+        output_dir: also write <name>.txt per recording here
+    """
+    if not audio_codec.NUMPY_AVAILABLE:
+        print("[Transcribe] NumPy is required (pip install numpy)")
+        return
+    files = find_audio_files(paths)
+    if not files:
+        print(f"[Transcribe] No audio files in {', '.join(paths)}")
+        return
+
+    from translator_mini.stt_backends import get_backend
+    backend_name = get_backend(backend).name
+    workers = workers or max(4, os.cpu_count() or 1)
+    if translate:
+        import translator_mini.translator  # noqa: F401  (fail early if deep-translator is missing)
+    print(f"[Transcribe] {len(files)} file(s), backend={backend_name}, {workers} workers")
+
+    started = time.perf_counter()
+    transcripts = {}
+
+    def emit(path: str, total: int, span: Optional[Span], result: Result) -> None:
+        done, lines = transcripts.setdefault(path, [0, []])
+        if not done:
+            print(f"\n=== {path} ===")
+        transcripts[path][0] = done = done + 1
+        if span is None:
+            lines.append("(no speech)")
+            print(lines[-1])
+        else:
+            text, vi = result
+            lines.append(f"[{_timestamp(span[0])} → {_timestamp(span[1])}] {text or '(inaudible)'}")
+            if vi:
+                lines.append(f"    VI: {vi}")
+            print("\n".join(lines[-2:] if vi else lines[-1:]))
+        if done >= total and output_dir:
+            _write_transcript(output_dir, path, lines)
+
+    pool = _WorkerPool(workers)
+    try:
+        pending: Deque[Pending] = deque()
+        for path, total, span, pcm in _segments(files):
+            if span is None:
+                pending.append((path, total, None, None, None))
+            else:
+                submit = (lambda pcm=pcm: pool.submit(_recognize_segment, pcm, language,
+                                                      backend_name, translate))
+                pending.append((path, total, span, submit(), submit))
+            # Bounded queue; results are printed in order as soon as they are ready
+            while len(pending) >= workers * IN_FLIGHT_PER_WORKER or (
+                    pending and (pending[0][3] is None or pending[0][3].done())):
+                emit(*_pop(pending))
+        while pending:
+            emit(*_pop(pending))
+    finally:
+        pool.shutdown()
+    print(f"\n[Transcribe] Done in {time.perf_counter() - started:.1f} s")
+
+
+class _WorkerPool:
+    """
+    ProcessPoolExecutor that is replaced, with half the workers, when a
+    worker dies (e.g. out of memory loading one Vosk model per process).
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(self, fn, *args) -> Future:
+        try:
+            return self._pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self.restart()
+            return self._pool.submit(fn, *args)
+
+    def restart(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.workers = max(1, self.workers // 2)
+        print(f"[Transcribe] A worker process died; restarting with {self.workers} workers")
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+
+def _pop(pending: Deque[Pending]) -> Tuple[str, int, Optional[Span], Result]:
+    """
+    Oldest entry with its result. A segment whose worker died is submitted
+    again once; any other failure becomes an error line for that segment
+    only, so the rest of the batch (and the other files) still finish.
+    """
+    path, total, span, future, resubmit = pending.popleft()
+    if future is None:
+        return path, total, span, (None, None)
+    for attempt in range(2):
+        try:
+            return path, total, span, future.result()
+        except BrokenProcessPool as e:
+            error: Exception = e
+            if attempt == 0:
+                future = resubmit()
+        except Exception as e:
+            error = e
+            break
+    print(f"[Transcribe] Segment at {_timestamp(span[0])} of {os.path.basename(path)} failed: {error!r}")
+    return path, total, span, (f"[error: {error or type(error).__name__}]", None)
+
+
+def _write_transcript(output_dir: str, path: str, lines: List[str]) -> None:
+    os.makedirs(output_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(path))[0] + ".txt"
+    with open(os.path.join(output_dir, name), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"[Transcribe] Wrote {os.path.join(output_dir, name)}")
+
+
+if __name__ == "__main__":
+    transcribe(sys.argv[1:] or ["."])
@@ -0,0 +1,352 @@
+"""
+Two-tier translation cache for Chatbot Translator Mini.
+
+- Memory tier: LRU (OrderedDict) for the hot phrases.
+- Disk tier: SQLite with a TTL, survives restarts.
+- Single-flight: concurrent requests for the same key share one network call
+  (threads via get_or_compute, coroutines via aget_or_compute).
+
+Keys are (engine, model, direction, normalized text).
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+DEFAULT_MEMORY_SIZE = 1024
+DEFAULT_TTL_S = 30 * 24 * 3600  # 30 days
+PURGE_INTERVAL_S = 3600  # expired rows are deleted at most this often
+
+
+def default_cache_dir() -> str:
+    """Cache directory: $TRANSLATOR_MINI_CACHE_DIR or ~/.cache/translator_mini."""
+    return os.getenv("TRANSLATOR_MINI_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "translator_mini"
+    )
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize, trim and collapse whitespace (case is kept)."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class LRUCache:
+    """Thread-safe fixed-size LRU map."""
+
+    def __init__(self, maxsize: int = DEFAULT_MEMORY_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: str, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteStore:
+    """
+    Key/value store in SQLite; entries older than ttl_s are treated as
+    missing and deleted on open and then every PURGE_INTERVAL_S (on put).
+    """
+
+    def __init__(self, path: str, ttl_s: float = DEFAULT_TTL_S):
+        self.path = path
+        self.ttl_s = ttl_s
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS translations_created ON translations (created)"
+            )
+        self._next_purge = 0.0
+        self._maybe_purge()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if self.ttl_s and time.time() - created > self.ttl_s:
+            return None
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, value, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+        self._maybe_purge()
+
+    def _maybe_purge(self) -> None:
+        """purge_expired() at most once per PURGE_INTERVAL_S (long-running devices)."""
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + PURGE_INTERVAL_S
+        removed = self.purge_expired()
+        if removed:
+            print(f"[Cache] Purged {removed} expired translations")
+
+    def purge_expired(self) -> int:
+        """Delete expired rows; returns how many were removed."""
+        if not self.ttl_s:
+            return 0
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM translations WHERE created < ?", (time.time() - self.ttl_s,)
+            )
+        return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM translations")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Flight:
+    """One in-progress computation that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+
+
+class TranslationCache:
+    """
+    Memory LRU → SQLite → compute, with single-flight on misses.
+
+    Failed computations (None) are never cached so they are retried next time.
+    """
+
+    def __init__(
+        self,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+        db_path: Optional[str] = None,
+        ttl_s: float = DEFAULT_TTL_S,
+        persistent: bool = True,
+    ):
+        self.memory = LRUCache(memory_size)
+        self.disk: Optional[SQLiteStore] = None
+        if persistent:
+            path = db_path or os.path.join(default_cache_dir(), "translations.sqlite3")
+            try:
+                self.disk = SQLiteStore(path, ttl_s=ttl_s)
+            except (OSError, sqlite3.Error) as e:
+                print(f"[Cache] Disk cache disabled ({e}); using memory only")
+
+        self._inflight: Dict[str, _Flight] = {}
+        # Async flights are per event loop (a Future belongs to one loop)
+        self._ainflight: Dict[Tuple[asyncio.AbstractEventLoop, str], "asyncio.Future[Optional[str]]"] = {}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+
+    @staticmethod
+    def make_key(engine: str, model: str, direction: str, text: str) -> str:
+        return "\x1f".join((engine, model or "", direction, normalize_text(text)))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def lookup(self, engine: str, model: str, direction: str, text: str) -> Optional[str]:
+        """Return a cached translation (memory, then disk) or None (counted as a miss)."""
+        key = self.make_key(engine, model, direction, text)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self._count("disk_hits")
+                self.memory.put(key, value)
+                return value
+        self._count("misses")
+        return None
+
+    def store(self, engine: str, model: str, direction: str, text: str, value: Optional[str]) -> None:
+        """Save a translation in both tiers (None is ignored)."""
+        if value is None:
+            return
+        key = self.make_key(engine, model, direction, text)
+        self.memory.put(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except sqlite3.Error as e:
+                print(f"[Cache] Disk write failed: {e}")
+
+    def get_or_compute(
+        self,
+        engine: str,
+        model: str,
+        direction: str,
+        text: str,
+        compute: Callable[[], Optional[str]],
+    ) -> Optional[str]:
+        """
+        Cached value if present; otherwise run compute() once even if several
+        threads ask for the same key at the same time.
+        """
+        cached = self.lookup(engine, model, direction, text)
+        if cached is not None:
+            return cached
+
+        key = self.make_key(engine, model, direction, text)
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = compute()
+            self.store(engine, model, direction, text, flight.result)
+            return flight.result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_compute(
+        self,
+        engine: str,
+        model: str,
+        direction: str,
+        text: str,
+        compute: Callable[[], Awaitable[Optional[str]]],
+    ) -> Optional[str]:
+        """
+        get_or_compute() for coroutines: concurrent tasks asking for the same
+        key await one compute() (shared through an asyncio.Future).
+
+        If the task computing it is cancelled, a waiting task takes over.
+        """
+        cached = self.lookup(engine, model, direction, text)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, self.make_key(engine, model, direction, text))
+        while True:
+            with self._lock:
+                flight = self._ainflight.get(flight_key)
+                leader = flight is None
+                if leader:
+                    flight = loop.create_future()
+                    self._ainflight[flight_key] = flight
+                else:
+                    self._stats["coalesced"] += 1
+
+            if not leader:
+                try:
+                    # shield: our own cancellation must not cancel the shared flight
+                    return await asyncio.shield(flight)
+                except asyncio.CancelledError:
+                    if flight.cancelled():
+                        continue  # the computing task was cancelled; take over
+                    raise
+
+            try:
+                result = await compute()
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError):
+                    flight.cancel()
+                else:
+                    flight.set_exception(e)
+                    flight.exception()  # retrieved here if nobody else was waiting
+                raise
+            else:
+                self.store(engine, model, direction, text, result)
+                flight.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    self._ainflight.pop(flight_key, None)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit/miss counters plus hit rate and current memory size. Every
+        lookup() that found nothing is a miss; `coalesced` counts the misses
+        that waited on another caller's computation instead of running one.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = (hits / total) if total else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+    def clear(self) -> None:
+        """Drop every entry in both tiers (counters are kept)."""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_default_cache: Optional[TranslationCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache() -> TranslationCache:
+    """Process-wide shared cache (created on first use).
+
+    Set TRANSLATOR_MINI_NO_DISK_CACHE=1 to keep it memory-only.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                persistent = os.getenv("TRANSLATOR_MINI_NO_DISK_CACHE", "") not in ("1", "true", "yes")
+                _default_cache = TranslationCache(persistent=persistent)
+    return _default_cache
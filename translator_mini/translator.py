@@ -2,21 +2,44 @@ from typing import Optional
 
 try:
     from deep_translator import GoogleTranslator
+    from deep_translator.exceptions import RequestError, ServerException, TooManyRequests
 except ImportError as e:
     raise RuntimeError("deep-translator is required. Install with: pip install deep-translator") from e
 
+import requests
+
+from translator_mini import resilience
+from translator_mini.resilience import RateLimitedError, TransientError
+from translator_mini.translation_cache import get_cache
+
 
 def translate_en_to_vi(text: str) -> Optional[str]:
     """
     Translate English text to Vietnamese using Google (via deep-translator).
+    Results are cached (see translation_cache); repeated phrases skip the network.
     Returns translated text or None if failed.
     """
     if not text:
         return ""
 
+    return get_cache().get_or_compute("google", "", "en-vi", text, lambda: _google_translate(text))
+
+
+def _google_translate(text: str) -> Optional[str]:
     try:
-        translator = GoogleTranslator(source="en", target="vi")
-        return translator.translate(text)
+        return resilience.call("google_translate", lambda: _translate_once(text))
     except Exception as e:
         print(f"[Translate] Error: {e}")
         return None
+
+
+def _translate_once(text: str) -> str:
+    """One deep-translator call, with errors mapped for the retry layer."""
+    try:
+        translator = GoogleTranslator(source="en", target="vi")
+        return translator.translate(text)
+    except TooManyRequests as e:
+        raise RateLimitedError("429 from Google Translate") from e
+    except (RequestError, ServerException, requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout) as e:
+        raise TransientError(f"Google Translate unavailable: {e}") from e
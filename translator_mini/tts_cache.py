@@ -0,0 +1,263 @@
+"""
+Content-addressed cache for synthesized speech.
+
+- Key: SHA-256 of (engine, lang, voice, rate, normalized text), so the same
+  phrase spoken the same way is synthesized once.
+- Memory tier: LRU of the most recent clips (reuses translation_cache.LRUCache).
+- Disk tier: one file per clip under <cache dir>/tts/, bounded by total size;
+  the least recently played clips are deleted first.
+- Single-flight: a warm-up and a live speak() of the same phrase share one
+  synthesis.
+
+Stock phrases (greeting, goodbye, error prompts) are pre-rendered at startup
+by text_to_speech.warm_up_tts(), so they play instantly and still work when
+the network is down. A phrase list can be rendered ahead of time, one phrase
+per line:
+
+    python -m translator_mini.tts_cache phrases.txt --lang vi
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from translator_mini.translation_cache import LRUCache, default_cache_dir, normalize_text
+
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_DISK_BYTES = 64 * 1024 * 1024   # ~3 h of gTTS speech
+
+
+def audio_key(engine: str, lang: str, text: str, voice: str = "", rate: object = "") -> str:
+    """Hex digest identifying one rendering of a phrase."""
+    parts = (engine, lang, voice or "", str(rate or ""), normalize_text(text))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class AudioFileStore:
+    """Clips as files named by key; total size kept under max_bytes (LRU by mtime)."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_DISK_BYTES, suffix: str = ".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        for name in os.listdir(directory):
+            if name.endswith(suffix):
+                try:
+                    self._sizes[name[:-len(suffix)]] = os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    pass
+        self.size = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        if key not in self._sizes:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime = last use, for eviction
+            return data
+        except OSError:
+            with self._lock:
+                self.size -= self._sizes.pop(key, 0)
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.size += len(data) - self._sizes.get(key, 0)
+            self._sizes[key] = len(data)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used clips down to 90% of max_bytes (lock held)."""
+        entries: List[Tuple[float, str]] = []
+        for key in self._sizes:
+            try:
+                entries.append((os.path.getmtime(self._path(key)), key))
+            except OSError:
+                entries.append((0.0, key))
+        for _, key in sorted(entries):
+            if self.size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+            self.size -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._sizes):
+                try:
+                    os.unlink(self._path(key))
+                except OSError:
+                    pass
+            self._sizes.clear()
+            self.size = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+
+class _Flight:
+    """One in-progress synthesis that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[bytes] = None
+
+
+class TTSCache:
+    """
+    Memory LRU → disk → render, with single-flight on misses.
+
+    Failed renders (None / empty) are never cached.
+    """
+
+    def __init__(
+        self,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+        persistent: bool = True,
+    ):
+        self.memory = LRUCache(memory_entries)
+        self.disk: Optional[AudioFileStore] = None
+        if persistent:
+            try:
+                self.disk = AudioFileStore(directory or os.path.join(default_cache_dir(), "tts"),
+                                           max_bytes=max_disk_bytes)
+            except OSError as e:
+                print(f"[Cache] TTS disk cache disabled ({e}); using memory only")
+
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def lookup(self, key: str) -> Optional[bytes]:
+        """Cached clip (memory, then disk) or None (counted as a miss)."""
+        data = self.memory.get(key)
+        if data is not None:
+            self._count("memory_hits")
+            return data
+        if self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                self._count("disk_hits")
+                self.memory.put(key, data)
+                return data
+        self._count("misses")
+        return None
+
+    def contains(self, key: str) -> bool:
+        """True if the clip is cached (no counters, no disk read)."""
+        return self.memory.get(key) is not None or (self.disk is not None and key in self.disk)
+
+    def store(self, key: str, data: Optional[bytes]) -> None:
+        if not data:
+            return
+        self.memory.put(key, data)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, data)
+            except OSError as e:
+                print(f"[Cache] TTS disk write failed: {e}")
+
+    def get_or_render(self, key: str, render: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """Cached clip, or render() once even if several threads ask at the same time."""
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = render()
+            self.store(key, flight.result)
+            return flight.result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        """Counters as in TranslationCache.stats() (`coalesced` is a subset of misses)."""
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = (hits / total) if total else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["disk_entries"] = len(self.disk) if self.disk is not None else 0
+        stats["disk_bytes"] = self.disk.size if self.disk is not None else 0
+        return stats
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_default_cache: Optional[TTSCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide shared cache (TRANSLATOR_MINI_NO_DISK_CACHE=1 keeps it in memory)."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                persistent = os.getenv("TRANSLATOR_MINI_NO_DISK_CACHE", "") not in ("1", "true", "yes")
+                _default_cache = TTSCache(persistent=persistent)
+    return _default_cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-render phrases into the TTS cache")
+    parser.add_argument("path", help="Text file, one phrase per line")
+    parser.add_argument("--lang", default="vi", help="gTTS language (default: vi)")
+    args = parser.parse_args()
+
+    from translator_mini.text_to_speech import prerender
+
+    with open(args.path, "r", encoding="utf-8") as f:
+        phrases = [line.strip() for line in f if line.strip()]
+    started = time.perf_counter()
+    rendered = prerender(phrases, lang=args.lang)
+    print(f"[Cache] {rendered} new / {len(phrases)} phrases in {time.perf_counter() - started:.1f} s "
+          f"({get_tts_cache().stats()['disk_bytes'] / 1024:.0f} KB on disk)")
@@ -0,0 +1,209 @@
+"""
+Voice activity detection on raw PCM (NumPy).
+
+Each 20 ms frame gets three features, computed for all frames at once:
+
+- energy (dBFS) above an adaptive noise floor: is anything loud happening?
+- spectral flatness: broadband noise (fans, AC, traffic hiss) is flat,
+  voiced speech has harmonics and is not
+- zero-crossing rate: rejects low hum/rumble that is loud but not speech
+
+Speech frames are smoothed with a minimum-run / hangover rule so single
+clicks don't start a phrase and short gaps between words don't end it.
+
+- trim(audio): cut leading/trailing silence off a recording before upload
+- Endpointer: streaming end-of-utterance detection (about 300 ms after the
+  last speech frame) for MicSession.listen()
+"""
+
+from typing import Optional, Tuple
+
+import speech_recognition as sr
+
+from translator_mini import audio_codec
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FRAME_MS = 20
+MARGIN_DB = 6.0           # above the noise floor (flatness does the rest)
+MIN_SPEECH_DB = -55.0     # never call anything quieter than this speech
+MAX_FLATNESS = 0.3        # white noise ≈ 0.5+, voiced speech ≈ 0.01–0.1
+MIN_ZCR = 0.01            # crossings per sample; ~80 Hz hum at 16 kHz is 0.01
+MIN_SPEECH_MS = 60        # consecutive speech needed to count (clicks are shorter)
+HANGOVER_MS = 300         # silence that ends an utterance
+LEAD_PAD_MS = 100         # kept before the first speech frame (soft onsets)
+NOISE_ADAPT = 0.05        # noise floor EWMA weight per non-speech frame
+
+
+def _samples(data: bytes, sample_width: int) -> "np.ndarray":
+    """PCM bytes → int16 samples (other widths converted first)."""
+    return audio_codec.pcm_to_int16(data, sample_width)
+
+
+def frame_features(samples: "np.ndarray", sample_rate: int,
+                   frame_ms: int = FRAME_MS) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Per-frame (energy dBFS, zero-crossing rate, spectral flatness).
+
+    Trailing samples that don't fill a frame are ignored.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    count = len(samples) // frame_len
+    frames = samples[: count * frame_len].reshape(count, frame_len).astype(np.float32) / 32768.0
+
+    energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame_len), axis=1)) ** 2 + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    return energy_db, zcr, flatness
+
+
+def classify(energy_db: "np.ndarray", zcr: "np.ndarray", flatness: "np.ndarray",
+             noise_db: float) -> "np.ndarray":
+    """Boolean speech mask for frames, given the noise floor in dBFS."""
+    threshold = max(noise_db + MARGIN_DB, MIN_SPEECH_DB)
+    return (energy_db > threshold) & (flatness < MAX_FLATNESS) & (zcr > MIN_ZCR)
+
+
+def smooth(speech: "np.ndarray", min_speech_frames: int, hangover_frames: int) -> "np.ndarray":
+    """
+    Keep only runs of at least min_speech_frames, then extend every
+    speech frame by hangover_frames.
+    """
+    n = len(speech)
+    if n == 0:
+        return speech
+    k = max(1, min_speech_frames)
+    # Frame i ends a run of k speech frames...
+    run_end = np.convolve(speech.astype(np.int32), np.ones(k, dtype=np.int32))[:n] >= k
+    # ...so frames i-k+1..i belong to a long enough run
+    in_run = np.convolve(run_end.astype(np.int32), np.ones(k, dtype=np.int32))[k - 1:k - 1 + n] > 0
+    if hangover_frames <= 0:
+        return in_run
+    return np.convolve(in_run.astype(np.int32), np.ones(hangover_frames + 1, dtype=np.int32))[:n] > 0
+
+
+def speech_mask(samples: "np.ndarray", sample_rate: int,
+                noise_db: Optional[float] = None) -> "np.ndarray":
+    """Smoothed per-frame speech mask for a whole recording."""
+    energy_db, zcr, flatness = frame_features(samples, sample_rate)
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    if noise_db is None:
+        # Quietest tenth of the recording ≈ background noise
+        noise_db = float(np.percentile(energy_db, 10))
+    raw = classify(energy_db, zcr, flatness, noise_db)
+    return smooth(raw, MIN_SPEECH_MS // FRAME_MS, HANGOVER_MS // FRAME_MS)
+
+
+def speech_bounds(samples: "np.ndarray", sample_rate: int,
+                  noise_db: Optional[float] = None) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) sample offsets of the speech, keeping LEAD_PAD_MS before
+    the first speech frame and HANGOVER_MS after the last; None if silent.
+    """
+    mask = speech_mask(samples, sample_rate, noise_db)
+    speech = np.flatnonzero(mask)
+    if len(speech) == 0:
+        return None
+    frame_len = int(sample_rate * FRAME_MS / 1000)
+    start = max(0, speech[0] - LEAD_PAD_MS // FRAME_MS) * frame_len
+    end = len(samples) if speech[-1] == len(mask) - 1 else (speech[-1] + 1) * frame_len
+    return start, end
+
+
+def trim(audio: sr.AudioData, noise_db: Optional[float] = None) -> Optional[sr.AudioData]:
+    """
+    Cut leading and trailing silence (see speech_bounds).
+
+    Returns:
+        Trimmed AudioData (16-bit), or None if no speech was found.
+    """
+    samples = _samples(audio.frame_data, audio.sample_width)
+    bounds = speech_bounds(samples, audio.sample_rate, noise_db)
+    if bounds is None:
+        return None
+    start, end = bounds
+    return sr.AudioData(samples[start:end].tobytes(), audio.sample_rate, 2)
+
+
+class Endpointer:
+    """
+    Streaming end-of-utterance detection.
+
+    Feed raw chunks as they arrive; `ended` becomes True HANGOVER_MS after
+    the last speech frame, or after no_speech_ms if the audio that started
+    the phrase turns out not to be speech at all (noise, music, a door).
+    """
+
+    def __init__(self, sample_rate: int, sample_width: int = 2,
+                 end_silence_ms: int = HANGOVER_MS, no_speech_ms: int = 800,
+                 noise_db: Optional[float] = None):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frame_len = int(sample_rate * FRAME_MS / 1000)
+        self.end_silence_frames = max(1, end_silence_ms // FRAME_MS)
+        self.no_speech_frames = max(1, no_speech_ms // FRAME_MS)
+        self.min_speech_frames = max(1, MIN_SPEECH_MS // FRAME_MS)
+        self.noise_db = noise_db
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._run = 0            # consecutive raw speech frames
+        self._silence = 0        # frames since the last speech run
+        self.frames = 0
+        self.speech_frames = 0
+        self.speech_started = False
+        self.ended = False
+
+    @property
+    def speech_ms(self) -> int:
+        return self.speech_frames * FRAME_MS
+
+    @property
+    def pause_ms(self) -> int:
+        """Silence since the last speech frame (0 while talking or before speech)."""
+        return self._silence * FRAME_MS if self.speech_started else 0
+
+    def feed(self, data: bytes) -> bool:
+        """Process a chunk; returns `ended`."""
+        samples = np.concatenate([self._pending, _samples(data, self.sample_width)])
+        usable = len(samples) - len(samples) % self.frame_len
+        self._pending = samples[usable:]
+        if usable == 0 or self.ended:
+            return self.ended
+
+        energy_db, zcr, flatness = frame_features(samples[:usable], self.sample_rate)
+        if self.noise_db is None:
+            self.noise_db = float(np.min(energy_db))
+        speech = classify(energy_db, zcr, flatness, self.noise_db)
+
+        for is_speech, energy in zip(speech, energy_db):
+            self.frames += 1
+            if is_speech:
+                self._run += 1
+                if self._run >= self.min_speech_frames:
+                    if not self.speech_started:
+                        self.speech_started = True
+                        self.speech_frames += self._run - 1
+                    self.speech_frames += 1
+                    self._silence = 0
+                    continue
+            else:
+                self._run = 0
+                # Track the floor on clear background frames only (not quiet speech)
+                if energy < self.noise_db + MARGIN_DB / 2:
+                    self.noise_db = (1 - NOISE_ADAPT) * self.noise_db + NOISE_ADAPT * float(energy)
+            self._silence += 1
+            if self.speech_started and self._silence >= self.end_silence_frames:
+                self.ended = True
+                break
+            if not self.speech_started and self.frames >= self.no_speech_frames:
+                self.ended = True
+                break
+        return self.ended
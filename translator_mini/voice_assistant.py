@@ -5,18 +5,31 @@ Combines voice input (EN/VI), AI chat (OpenRouter), and voice output.
 
 import sys
 import re
-from typing import Optional, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 # Import local modules
-from translator_mini.speech_to_text import listen_and_recognize, list_microphones
-from translator_mini.text_to_speech import speak
+from translator_mini.mic_session import MicSession
+from translator_mini.speech_to_text import (
+    PartialTranscript,
+    listen_and_recognize,
+    listen_multilingual,
+    listen_streaming,
+    list_microphones,
+)
+from translator_mini.stt_backends import BACKENDS as STT_BACKENDS, set_default_backend
+from translator_mini.text_to_speech import speak, speak_stream, warm_up_tts
 from translator_mini.openrouter_client import (
     OpenRouterChatbot,
     get_api_key as get_openrouter_api_key,
+    warm_up as warm_up_openrouter,
     translate_en_to_vi,
     translate_vi_to_en,
     MODELS as OPENROUTER_MODELS,
+    FALLBACK_MODELS as OPENROUTER_FALLBACK_MODELS,
 )
+from translator_mini.hedging import HEDGE_AFTER_S
 
 # Gemini (direct) client is optional; import lazily
 try:
@@ -24,11 +37,22 @@ try:
         GeminiChatbot,
         get_api_key as get_gemini_api_key,
         MODELS as GEMINI_MODELS,
+        FALLBACK_MODELS as GEMINI_FALLBACK_MODELS,
     )
 except Exception:  # pragma: no cover - missing dependency or file
     GeminiChatbot = None
     get_gemini_api_key = None
     GEMINI_MODELS = {}
+    GEMINI_FALLBACK_MODELS = []
+
+
+# Stock phrases: pre-rendered into the TTS cache at startup (instant, and
+# still spoken when the network is down)
+GREETING = ("Xin chào! Tôi là Mini, trợ lý AI của bạn. Bạn có thể hỏi tôi bất cứ điều gì, "
+            "hoặc nói 'dịch' kèm câu tiếng Anh để tôi dịch sang tiếng Việt.")
+GOODBYE = "Tạm biệt! Hẹn gặp lại! Goodbye!"
+NO_RESPONSE = "Xin lỗi, tôi chưa nhận được câu trả lời. Bạn nói lại nhé."
+STOCK_PHRASES = (GREETING, GOODBYE, NO_RESPONSE)
 
 
 def _model_label(provider: str, model: str) -> str:
@@ -78,13 +102,34 @@ def detect_language(text: str) -> str:
 # VOICE ASSISTANT CLASS
 # ==============================================================================
 
-def _build_chatbot(provider: str, model: str, system_prompt: str):
-    """Factory to create chatbot per provider."""
+def _resolve_fallbacks(provider: str, fallback_models: Optional[List[str]]) -> List[str]:
+    """Expand "default" to the provider's fallback chain."""
+    resolved: List[str] = []
+    for name in fallback_models or []:
+        if name == "default":
+            resolved.extend(GEMINI_FALLBACK_MODELS if provider == "gemini" else OPENROUTER_FALLBACK_MODELS)
+        elif name:
+            resolved.append(name)
+    return resolved
+
+
+def _build_chatbot(
+    provider: str,
+    model: str,
+    system_prompt: str,
+    fallback_models: Optional[List[str]] = None,
+    hedge_after_s: float = HEDGE_AFTER_S,
+    quality: str = "basic",
+):
+    """Factory to create chatbot per provider (model="auto" routes by latency)."""
+    fallbacks = _resolve_fallbacks(provider, fallback_models)
     if provider == "gemini":
         if GeminiChatbot is None:
             raise ImportError("Gemini client not available. Install google-generativeai and ensure gemini_client.py exists.")
-        return GeminiChatbot(model=model, system_prompt=system_prompt)
-    return OpenRouterChatbot(model=model, system_prompt=system_prompt)
+        return GeminiChatbot(model=model, system_prompt=system_prompt, fallback_models=fallbacks,
+                             hedge_after_s=hedge_after_s, quality=quality)
+    return OpenRouterChatbot(model=model, system_prompt=system_prompt, fallback_models=fallbacks,
+                             hedge_after_s=hedge_after_s, quality=quality)
 
 
 class VoiceAssistant:
@@ -107,6 +152,11 @@ class VoiceAssistant:
         voice_rate: int = 150,
         input_language: str = "auto",  # "auto", "en", "vi"
         provider: str = "openrouter",
+        stream_output: bool = False,
+        fallback_models: Optional[List[str]] = None,
+        hedge_after_s: float = HEDGE_AFTER_S,
+        quality: str = "basic",
+        speculative: bool = False,
     ):
         """
         Initialize Voice Assistant.
@@ -118,6 +168,12 @@ class VoiceAssistant:
             use_gtts: Use Google TTS (True) or pyttsx3 (False)
             voice_rate: Speech rate for pyttsx3
             input_language: Voice input language ("auto", "en", "vi")
+            stream_output: Speak each sentence as soon as the model writes it
+            fallback_models: Models to hedge / fail over to ("default" = provider chain)
+            hedge_after_s: Start the next model if no first token by then
+            quality: Quality tier for model="auto" ("basic", "standard", "premium")
+            speculative: Recognize while the user speaks and start the AI
+                reply as soon as the transcript stops changing
         """
         self.model = model
         self.provider = provider
@@ -125,6 +181,14 @@ class VoiceAssistant:
         self.use_gtts = use_gtts
         self.voice_rate = voice_rate
         self.input_language = input_language
+        self.stream_output = stream_output
+        # Microphone stays open across turns (opened on first listen)
+        self.mic: Optional[MicSession] = None
+        # Speculative reply started on a stable partial transcript: (text, reply)
+        self.speculative = speculative
+        self._speculation: Optional[Tuple[str, "Future[Optional[str]]"]] = None
+        self._speculation_lock = threading.Lock()
+        self._speculation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculate")
         
         # Initialize chatbot
         system_prompt = (
@@ -136,10 +200,27 @@ class VoiceAssistant:
             "Nếu không phải yêu cầu dịch, hãy trả lời bằng tiếng Việt."
         )
 
-        self.chatbot = _build_chatbot(provider=provider, model=model, system_prompt=system_prompt)
+        self.chatbot = _build_chatbot(provider=provider, model=model, system_prompt=system_prompt,
+                                      fallback_models=fallback_models, hedge_after_s=hedge_after_s,
+                                      quality=quality)
         model_label = (GEMINI_MODELS if provider == "gemini" else OPENROUTER_MODELS).get(model, model)
         print(f"[VoiceAssistant] Initialized with provider={provider}, model: {model_label}")
     
+    def open_mic(self) -> Optional[MicSession]:
+        """Open the persistent mic session (None → fall back to per-turn capture)."""
+        if self.mic is None or not self.mic.running:
+            try:
+                self.mic = MicSession(self.mic_index).start()
+            except Exception as e:
+                print(f"[VoiceAssistant] Persistent mic unavailable ({e}); reopening per turn")
+                self.mic = None
+        return self.mic
+    
+    def close_mic(self) -> None:
+        if self.mic is not None:
+            self.mic.close()
+            self.mic = None
+    
     def listen(self, prompt: str = "🎤 Đang nghe... (Listening...)") -> Optional[str]:
         """
         Listen for voice input.
@@ -148,35 +229,73 @@ class VoiceAssistant:
             Recognized text or None
         """
         print(prompt)
+        session = self.open_mic()
         
-        # Determine language code for recognition
-        if self.input_language == "vi":
-            lang_code = "vi-VN"
-        elif self.input_language == "en":
-            lang_code = "en-US"
-        else:
-            # Auto: try Vietnamese first (default), then English
-            lang_code = "vi-VN"
+        if self.speculative:
+            with self._speculation_lock:
+                self._speculation = None  # never carry a guess into the next turn
+            languages = {"auto": ["vi-VN", "en-US"], "vi": ["vi-VN"]}.get(self.input_language, ["en-US"])
+            text, _ = listen_streaming(
+                mic_index=self.mic_index,
+                languages=languages,
+                timeout=8.0,
+                phrase_time_limit=15.0,
+                session=session,
+                on_partial=self._on_partial,
+            )
+            return text
         
+        # Auto: one recording, recognized as Vietnamese and English at once
+        # (Vietnamese first on equal confidence)
+        if self.input_language == "auto":
+            text, _ = listen_multilingual(
+                mic_index=self.mic_index,
+                languages=["vi-VN", "en-US"],
+                timeout=8.0,
+                phrase_time_limit=15.0,
+                session=session,
+            )
+            return text
+        
+        lang_code = "vi-VN" if self.input_language == "vi" else "en-US"
         text = listen_and_recognize(
             mic_index=self.mic_index,
             language=lang_code,
             timeout=8.0,
-            phrase_time_limit=15.0
+            phrase_time_limit=15.0,
+            session=session,
         )
         
-        # If auto mode and got nothing, try English
-        if text is None and self.input_language == "auto":
-            print("   → Thử nhận dạng tiếng Anh...")
-            text = listen_and_recognize(
-                mic_index=self.mic_index,
-                language="en-US",
-                timeout=5.0,
-                phrase_time_limit=15.0
-            )
-        
         return text
     
+    def _on_partial(self, partial: PartialTranscript) -> None:
+        """
+        Start the reply speculatively once a partial transcript stops
+        changing (the user has most likely finished). Runs on a recognition
+        thread; at most one speculative request is in flight.
+        """
+        if partial.final or partial.stable != partial.text or not hasattr(self.chatbot, "commit_turn"):
+            return
+        with self._speculation_lock:
+            current = self._speculation
+            if current is not None and (current[0] == partial.text or not current[1].done()):
+                return
+            print(f"[VoiceAssistant] Speculating on: {partial.text}")
+            self._speculation = (partial.text, self._speculation_pool.submit(
+                self.chatbot.chat, partial.text, commit=False))
+    
+    def _take_speculation(self, user_input: str) -> Optional[str]:
+        """Reply of the speculation on exactly this input (committed to history), else None."""
+        with self._speculation_lock:
+            speculation, self._speculation = self._speculation, None
+        if speculation is None or speculation[0].strip().lower() != user_input.strip().lower():
+            return None
+        reply = speculation[1].result()
+        if reply:
+            self.chatbot.commit_turn(user_input, reply)
+            print("[VoiceAssistant] Reply was started while you were speaking")
+        return reply
+    
     def think(self, user_input: str) -> Optional[str]:
         """
         Process user input and get AI response.
@@ -189,7 +308,7 @@ class VoiceAssistant:
         """
         print(f"💭 Đang suy nghĩ... (Thinking...)")
         
-        response = self.chatbot.chat(user_input)
+        response = self._take_speculation(user_input) or self.chatbot.chat(user_input)
         
         if response:
             print(f"🤖 AI: {response}")
@@ -198,6 +317,45 @@ class VoiceAssistant:
         
         return response
     
+    def think_and_speak_stream(self, user_input: str) -> Optional[str]:
+        """
+        Streaming turn: speak the reply sentence by sentence while the model
+        is still generating it. Falls back to think() + speak_response() if
+        the chatbot has no chat_stream().
+        
+        Returns:
+            Full AI response text
+        """
+        speculated = self._take_speculation(user_input)
+        if not hasattr(self.chatbot, "chat_stream"):
+            response = speculated or self.think(user_input)
+            if response:
+                self.speak_response(response)
+            return response
+        
+        print(f"💭 Đang suy nghĩ... (Thinking...)")
+        print("🤖 AI: ", end="", flush=True)
+        
+        response, timings = speak_stream(
+            [speculated] if speculated else self.chatbot.chat_stream(user_input),
+            detect_lang=detect_language,
+            on_text=lambda chunk: print(chunk, end="", flush=True),
+            use_gtts=self.use_gtts,
+            rate=self.voice_rate,
+        )
+        print()
+        
+        if not response:
+            print("❌ Không nhận được phản hồi từ AI")
+            return None
+        
+        first_audio = timings.get("first_audio")
+        if first_audio is not None:
+            print(f"⏱️  Time-to-first-audio: {first_audio * 1000:.0f} ms "
+                  f"(first token {timings.get('first_token', 0) * 1000:.0f} ms, "
+                  f"total {timings['total'] * 1000:.0f} ms)")
+        return response
+    
     def speak_response(self, text: str, language: str = "auto") -> None:
         """
         Speak the response using TTS.
@@ -207,7 +365,6 @@ class VoiceAssistant:
             language: "vi", "en", or "auto" (detect)
         """
         import sys
-        import time
         
         if language == "auto":
             language = detect_language(text)
@@ -215,9 +372,6 @@ class VoiceAssistant:
         print(f"🔊 Đang phát âm thanh... ({language})")
         sys.stdout.flush()
         
-        # Small delay to ensure audio device is ready
-        time.sleep(0.1)
-        
         success = speak(
             text=text,
             lang=language,
@@ -251,15 +405,21 @@ class VoiceAssistant:
         exit_commands = ["quit", "exit", "bye", "goodbye", "thoát", "tạm biệt", "kết thúc", "dừng lại"]
         if user_input.lower().strip() in exit_commands:
             print("👋 Tạm biệt! Goodbye!")
-            self.speak_response("Tạm biệt! Hẹn gặp lại! Goodbye!")
+            self.speak_response(GOODBYE, language="vi")
             return False, user_input, None
         
-        # Think
-        response = self.think(user_input)
+        # Think + speak (streaming: speak sentence by sentence as it arrives)
+        if self.stream_output:
+            response = self.think_and_speak_stream(user_input)
+        else:
+            response = self.think(user_input)
+            
+            if response:
+                # Speak response
+                self.speak_response(response)
         
-        if response:
-            # Speak response
-            self.speak_response(response)
+        if not response:
+            self.speak_response(NO_RESPONSE, language="vi")
         
         return True, user_input, response
     
@@ -274,10 +434,18 @@ class VoiceAssistant:
         print("   💡 Nói 'dịch [câu tiếng Anh]' để dịch sang tiếng Việt")
         print("=" * 60 + "\n")
         
+        # Open the API connection in the background while the greeting plays
+        if self.provider == "openrouter":
+            warm_up_openrouter(background=True)
+        # Stock phrases come from the TTS cache (rendered once, in the background)
+        if self.use_gtts:
+            warm_up_tts(STOCK_PHRASES, lang="vi")
+        # Open the mic now so a first-run calibration happens during the greeting
+        self.open_mic()
+        
         # Greeting
-        greeting = "Xin chào! Tôi là Mini, trợ lý AI của bạn. Bạn có thể hỏi tôi bất cứ điều gì, hoặc nói 'dịch' kèm câu tiếng Anh để tôi dịch sang tiếng Việt."
-        print(f"🤖 AI: {greeting}")
-        self.speak_response(greeting, language="vi")
+        print(f"🤖 AI: {GREETING}")
+        self.speak_response(GREETING, language="vi")
         
         # Main loop
         while True:
@@ -291,6 +459,7 @@ class VoiceAssistant:
             except KeyboardInterrupt:
                 print("\n\n👋 Đã dừng bởi người dùng. Tạm biệt!")
                 break
+        self.close_mic()
     
     def reset(self) -> None:
         """Reset conversation history."""
@@ -315,6 +484,9 @@ class TextAssistant:
         voice_rate: int = 150,
         speak_output: bool = True,
         provider: str = "openrouter",
+        fallback_models: Optional[List[str]] = None,
+        hedge_after_s: float = HEDGE_AFTER_S,
+        quality: str = "basic",
     ):
         self.model = model
         self.provider = provider
@@ -329,7 +501,9 @@ class TextAssistant:
             "Chỉ trả về bản dịch, không giải thích thêm. "
             "Nếu không phải yêu cầu dịch, hãy trả lời bằng tiếng Việt."
         )
-        self.chatbot = _build_chatbot(provider=provider, model=model, system_prompt=system_prompt)
+        self.chatbot = _build_chatbot(provider=provider, model=model, system_prompt=system_prompt,
+                                      fallback_models=fallback_models, hedge_after_s=hedge_after_s,
+                                      quality=quality)
     
     def chat(self, user_input: str) -> Optional[str]:
         """Process text input and return/speak response."""
@@ -346,6 +520,30 @@ class TextAssistant:
         
         return response
     
+    def chat_stream(self, user_input: str) -> Optional[str]:
+        """
+        Streaming turn: print the reply as it is generated and, with voice
+        on, speak it sentence by sentence. Returns the full reply.
+        """
+        print("🤖 AI: ", end="", flush=True)
+        print_chunk = lambda chunk: print(chunk, end="", flush=True)
+        if self.speak_output:
+            response, _ = speak_stream(
+                self.chatbot.chat_stream(user_input),
+                detect_lang=detect_language,
+                on_text=print_chunk,
+                use_gtts=self.use_gtts,
+                rate=self.voice_rate,
+            )
+        else:
+            parts = []
+            for chunk in self.chatbot.chat_stream(user_input):
+                parts.append(chunk)
+                print_chunk(chunk)
+            response = "".join(parts)
+        print()
+        return response or None
+    
     def run(self) -> None:
         """Run interactive text chat."""
         print("\n" + "=" * 60)
@@ -356,6 +554,10 @@ class TextAssistant:
         print("   💡 Gõ 'dịch [câu tiếng Anh]' để dịch sang tiếng Việt")
         print("=" * 60 + "\n")
         
+        # Open the API connection while the user is typing
+        if self.provider == "openrouter":
+            warm_up_openrouter(background=True)
+        
         while True:
             try:
                 user_input = input("👤 Bạn: ").strip()
@@ -383,13 +585,16 @@ class TextAssistant:
                     print("🔇 Đã tắt giọng nói.")
                     continue
                 
-                # Get response
+                # Get response (streamed when the chatbot supports it)
                 print("💭 Đang suy nghĩ...")
-                response = self.chat(user_input)
-                
-                if response:
-                    print(f"🤖 AI: {response}")
+                if hasattr(self.chatbot, "chat_stream"):
+                    response = self.chat_stream(user_input)
                 else:
+                    response = self.chat(user_input)
+                    if response:
+                        print(f"🤖 AI: {response}")
+                
+                if not response:
                     print("❌ Không nhận được phản hồi.")
                     
             except KeyboardInterrupt:
@@ -407,6 +612,11 @@ def run_voice_assistant(
     use_gtts: bool = False,
     input_language: str = "auto",
     provider: str = "openrouter",
+    stream_output: bool = False,
+    fallback_models: Optional[List[str]] = None,
+    hedge_after_s: float = HEDGE_AFTER_S,
+    quality: str = "basic",
+    speculative: bool = False,
 ) -> None:
     """Run voice assistant with specified settings."""
     if provider == "gemini":
@@ -427,6 +637,11 @@ def run_voice_assistant(
         use_gtts=use_gtts,
         input_language=input_language,
         provider=provider,
+        stream_output=stream_output,
+        fallback_models=fallback_models,
+        hedge_after_s=hedge_after_s,
+        quality=quality,
+        speculative=speculative,
     )
     assistant.run()
 
@@ -436,6 +651,9 @@ def run_text_assistant(
     use_gtts: bool = False,
     speak_output: bool = True,
     provider: str = "openrouter",
+    fallback_models: Optional[List[str]] = None,
+    hedge_after_s: float = HEDGE_AFTER_S,
+    quality: str = "basic",
 ) -> None:
     """Run text assistant with optional voice output."""
     if provider == "gemini":
@@ -455,6 +673,9 @@ def run_text_assistant(
         use_gtts=use_gtts,
         speak_output=speak_output,
         provider=provider,
+        fallback_models=fallback_models,
+        hedge_after_s=hedge_after_s,
+        quality=quality,
     )
     assistant.run()
 
@@ -470,19 +691,34 @@ if __name__ == "__main__":
     parser.add_argument("--mode", choices=["voice", "text"], default="text",
                         help="Assistant mode: voice (with microphone) or text (keyboard)")
     parser.add_argument("--model", default="free",
-                        help="AI model to use (free, gpt-4o-mini, claude-sonnet, etc.)")
+                        help="AI model to use (free, gpt-4o-mini, claude-sonnet, etc.; auto = fastest healthy)")
+    parser.add_argument("--quality", choices=["basic", "standard", "premium"], default="basic",
+                        help="Quality tier for --model auto")
     parser.add_argument("--gtts", action="store_true",
                         help="Use Google TTS instead of pyttsx3")
     parser.add_argument("--lang", choices=["auto", "en", "vi"], default="auto",
                         help="Voice input language")
+    parser.add_argument("--stt-backend", choices=list(STT_BACKENDS), default=None,
+                        help="Speech recognition engine: google (default), sphinx or vosk (offline)")
     parser.add_argument("--no-voice", action="store_true",
                         help="Disable voice output (text mode only)")
     parser.add_argument("--list-mics", action="store_true",
                         help="List available microphones and exit")
     parser.add_argument("--mic", type=int, default=None,
                         help="Microphone index to use")
+    parser.add_argument("--stream", action="store_true",
+                        help="Voice mode: speak each sentence while the AI is still answering")
+    parser.add_argument("--speculative", action="store_true",
+                        help="Voice mode: recognize while you speak and start the reply on a stable transcript")
+    parser.add_argument("--fallback-models", default=None,
+                        help="Comma-separated models to hedge/fail over to ('default' = built-in chain)")
+    parser.add_argument("--hedge-after", type=float, default=HEDGE_AFTER_S,
+                        help="Seconds to wait for the first token before trying the next model")
     
     args = parser.parse_args()
+    fallback_models = args.fallback_models.split(",") if args.fallback_models else None
+    if args.stt_backend:
+        set_default_backend(args.stt_backend)
     
     if args.list_mics:
         print("🎤 Available microphones:")
@@ -495,11 +731,19 @@ if __name__ == "__main__":
             model=args.model,
             mic_index=args.mic,
             use_gtts=args.gtts,
-            input_language=args.lang
+            input_language=args.lang,
+            stream_output=args.stream,
+            fallback_models=fallback_models,
+            hedge_after_s=args.hedge_after,
+            quality=args.quality,
+            speculative=args.speculative,
         )
     else:
         run_text_assistant(
             model=args.model,
             use_gtts=args.gtts,
-            speak_output=not args.no_voice
+            speak_output=not args.no_voice,
+            fallback_models=fallback_models,
+            hedge_after_s=args.hedge_after,
+            quality=args.quality,
         )